@@ -48,15 +48,20 @@
             # Additional build tools
             openssl      # For SHA-384 hashing
             git          # Version control
+            inotify-tools  # File watching for ./build --watch
+            oxipng       # Maximum-effort lossless PNG recompression (utilities/pngopt.py)
 
             # Testing tools
             htmltest     # HTML validation and internal link checking
             lychee       # External link checking (config: lychee.toml)
             python3      # Python runtime for pytest
             python3Packages.pytest  # Python testing framework
+            python3Packages.pytest-xdist  # Page batches across cores (pytest -n auto --dist loadgroup)
             python3Packages.beautifulsoup4  # HTML parsing for tests
             python3Packages.lxml  # XML/HTML parser for BeautifulSoup
             python3Packages.pyyaml  # YAML parsing for htmltest config
+            python3Packages.brotli  # Precompressed .br siblings (./build --precompress)
+            python3Packages.pillow  # Face-dataset gallery derivatives and PNG recompression (utilities/gallery.py, pngopt.py)
 
             # Node.js tools (for prettier formatting)
             nodejs
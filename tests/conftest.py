@@ -1,28 +1,590 @@
 """Shared pytest fixtures for Hugo static site tests."""
 
+import functools
+import hashlib
 import json
+import os
+import sys
+from dataclasses import dataclass, field
+from functools import cached_property
+from html.parser import HTMLParser
+from importlib.metadata import version
 from pathlib import Path
-from typing import Iterator
+from typing import Iterable, Iterator
+from urllib.parse import unquote, urljoin, urlsplit
 
 import pytest
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, Tag
+
+PUBLIC_DIR = Path(__file__).parent.parent / "public"
+# Pages per page_batch item; --page-batch overrides it.
+PAGE_BATCH = 25
+# pytest cache key of the pages' hashes and the page-level rules they
+# passed (--incremental)
+INCREMENTAL_CACHE = "site/incremental"
+HEADINGS = ["h1", "h2", "h3", "h4", "h5", "h6"]
+# Attributes holding a URL (srcset holds several)
+URL_ATTRIBUTES = ["href", "src", "srcset", "poster"]
+# Fragments that need no target: the top of the page
+TOP_FRAGMENTS = {"", "top"}
+# Elements the head may hold; any other start tag begins the body.
+HEAD_ELEMENTS = {
+    "html", "head", "title", "meta", "link", "base", "style", "script",
+    "noscript", "template",
+}
+# Elements that open an omitted <head>, as an HTML5 parser does
+IMPLIED_HEAD = {"title", "meta", "link", "base", "style", "script"}
+HEAD_CHUNK = 16 * 1024
+
+
+@dataclass
+class Head:
+    """What a page declares before its body."""
+
+    doctype: str | None = None  # only if nothing but whitespace precedes it
+    has_html: bool = False  # <html>, or content implying it
+    lang: str | None = None
+    has_head: bool = False  # <head>, or a head element implying it
+    title: str | None = None
+    charset: str | None = None  # <meta charset> or http-equiv Content-Type
+    meta: dict[str, str] = field(default_factory=dict)  # name or property
+    http_equiv: dict[str, str] = field(default_factory=dict)
+    canonical: str | None = None
+
+
+class _EndOfHead(Exception):
+    pass
+
+
+class HeadParser(HTMLParser):
+    """Reads a page up to </head> (or the first body element) and no
+    further; the body is never read from disk, let alone parsed."""
+
+    def __init__(self):
+        super().__init__()
+        self.head = Head()
+        self._started = False
+        self._html_tag = False
+        self._title: list[str] | None = None
+
+    def handle_decl(self, decl):
+        if not self._started and decl.lower().startswith("doctype"):
+            self.head.doctype = decl
+        self._started = True
+
+    def handle_starttag(self, tag, attrs):
+        self._started = True
+        head = self.head
+        # <html> and <head> are optional: any element implies <html>,
+        # and a head-only element before the body implies <head>.
+        head.has_html = True
+        if tag not in HEAD_ELEMENTS:
+            raise _EndOfHead
+        if tag in IMPLIED_HEAD:
+            head.has_head = True
+        attrs = {name: value or "" for name, value in reversed(attrs)}
+        if tag == "html" and not self._html_tag:
+            self._html_tag = True
+            head.lang = attrs.get("lang")
+        elif tag == "head":
+            head.has_head = True
+        elif tag == "title" and head.title is None:
+            self._title = []
+        elif tag == "meta":
+            if "charset" in attrs and head.charset is None:
+                head.charset = attrs["charset"]
+            for key in (attrs.get("name"), attrs.get("property")):
+                if key and key not in head.meta:
+                    head.meta[key] = attrs.get("content", "")
+            equiv = attrs.get("http-equiv")
+            if equiv and equiv not in head.http_equiv:
+                head.http_equiv[equiv] = attrs.get("content", "")
+                if equiv.lower() == "content-type" and head.charset is None:
+                    head.charset = attrs.get("content", "")
+        elif tag == "link" and head.canonical is None:
+            if "canonical" in attrs.get("rel", "").lower().split():
+                head.canonical = attrs.get("href", "")
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+
+    def handle_endtag(self, tag):
+        if tag == "title" and self._title is not None:
+            self.head.title = "".join(self._title)
+            self._title = None
+        elif tag in ("head", "html"):
+            raise _EndOfHead
+
+    def handle_data(self, data):
+        if self._title is not None:
+            self._title.append(data)
+        elif data.strip():
+            self._started = True
+            self.head.has_html = True
+
+    def handle_comment(self, data):
+        self._started = True
+
+    def handle_pi(self, data):
+        self._started = True
+
+
+def read_head(path: Path) -> Head:
+    """Stream a page through HeadParser until its head ends."""
+    parser = HeadParser()
+    size = HEAD_CHUNK
+    with open(path, encoding="utf-8") as f:
+        try:
+            # HTMLParser rescans an unfinished tag on every feed, and heads
+            # can carry megabyte data: URIs, so each read is twice the last.
+            while chunk := f.read(size):
+                parser.feed(chunk)
+                size *= 2
+            parser.close()
+        except _EndOfHead:
+            pass
+    return parser.head
+
+
+class Page:
+    """A parsed HTML file, shared by every test that reads it.
+
+    The tree and the indexes built from it are shared across the session,
+    so tests must treat them as read-only.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.text = path.read_text(encoding="utf-8")
+        self.soup = BeautifulSoup(self.text, "lxml")
+
+    @cached_property
+    def meta(self) -> dict[str, str]:
+        """The content of each <meta name> or <meta property>; the first
+        one wins."""
+        found = {}
+        for tag in self.soup.find_all("meta"):
+            for key in (tag.get("name"), tag.get("property")):
+                if key and key not in found:
+                    found[key] = tag.get("content", "")
+        return found
+
+    @cached_property
+    def json_ld(self) -> list[dict]:
+        """Every JSON-LD block, parsed; a block that isn't valid JSON is
+        {"_error": message, "_content": text}."""
+        blocks = []
+        for script in self.soup.find_all("script", {"type": "application/ld+json"}):
+            try:
+                blocks.append(json.loads(script.string))
+            except json.JSONDecodeError as e:
+                blocks.append({"_error": str(e), "_content": script.string})
+        return blocks
+
+    @cached_property
+    def label_for(self) -> set[str]:
+        """The ids that a <label for> names."""
+        return {label["for"] for label in self.soup.find_all("label", attrs={"for": True})}
+
+    @cached_property
+    def headings(self) -> list[Tag]:
+        """The h1-h6 elements in document order."""
+        return self.soup.find_all(HEADINGS)
+
+
+class Corpus:
+    """Every page parsed at most once per session.
+
+    A page is parsed again only if its file changed since (tests that
+    rewrite a file under tmp_path and parse it again). Tests that only
+    look at the head use head(), which never parses the body.
+    """
+
+    def __init__(self):
+        self._pages: dict[Path, tuple[tuple[int, int], Page]] = {}
+        self._heads: dict[Path, tuple[tuple[int, int], Head]] = {}
+
+    @staticmethod
+    def _cached(cache: dict, path: Path, load):
+        key = Path(os.path.abspath(path))
+        st = key.stat()
+        stamp = (st.st_mtime_ns, st.st_size)
+        cached = cache.get(key)
+        if cached is None or cached[0] != stamp:
+            cached = (stamp, load(path))
+            cache[key] = cached
+        return cached[1]
+
+    def page(self, path: Path) -> Page:
+        return self._cached(self._pages, path, Page)
+
+    def head(self, path: Path) -> Head:
+        return self._cached(self._heads, path, read_head)
+
+    def __len__(self) -> int:
+        return len(self._pages)
+
+
+CORPUS = Corpus()
+
+
+@pytest.fixture(scope="session")
+def corpus() -> Corpus:
+    """The session's parsed pages; corpus.page(path) and corpus.head(path)
+    parse on first use."""
+    return CORPUS
+
+
+@dataclass(frozen=True)
+class Link:
+    """A same-site reference, as written on a page and as resolved."""
+
+    page: str  # the referring page, relative to public/
+    url: str
+    target: str  # the file it resolves to, relative to public/
+    fragment: str
+
+
+class LinkGraph:
+    """Every same-site href, src and srcset entry and every id on the
+    site, from one walk over the corpus's parsed pages.
+
+    URLs with a scheme or a host (including the site's own canonical
+    URLs) are left to the external checks, as in htmltest with
+    CheckExternal off. Directory URLs resolve to their index.html.
+    """
+
+    def __init__(self, public_dir: Path, pages: Iterable[Path], corpus: Corpus):
+        self.public_dir = public_dir
+        self.corpus = corpus
+        self.files = {
+            path.relative_to(public_dir).as_posix()
+            for path in public_dir.rglob("*") if path.is_file()
+        }
+        self.ids: dict[str, set[str]] = {}
+        self.links: list[Link] = []
+        for path in pages:
+            self._walk(path)
+
+    def _walk(self, path: Path) -> None:
+        page = path.relative_to(self.public_dir).as_posix()
+        soup = self.corpus.page(path).soup
+        base = "/" + page
+        tag = soup.find("base", href=True)
+        if tag is not None:
+            base = urljoin(base, tag["href"])
+        ids = self.ids.setdefault(page, set())
+        for tag in soup.find_all(True):
+            if tag.get("id"):
+                ids.add(tag["id"])
+            if tag.name == "a" and tag.get("name"):
+                ids.add(tag["name"])
+            for attribute in URL_ATTRIBUTES:
+                value = tag.get(attribute)
+                if not value or (tag.name == "base" and attribute == "href"):
+                    continue
+                if attribute == "srcset":
+                    urls = [c.split()[0] for c in value.split(",") if c.strip()]
+                else:
+                    urls = [value.strip()]
+                for url in urls:
+                    link = self._resolve(page, base, url)
+                    if link is not None:
+                        self.links.append(link)
+
+    def _resolve(self, page: str, base: str, url: str) -> Link | None:
+        parts = urlsplit(url)
+        if parts.scheme or parts.netloc:
+            return None
+        if not parts.path:
+            target = page
+        else:
+            target = unquote(urlsplit(urljoin(base, parts.path)).path).lstrip("/")
+            if target == "" or target.endswith("/"):
+                target += "index.html"
+            elif target not in self.files and f"{target}/index.html" in self.files:
+                target += "/index.html"
+        return Link(page, url, target, unquote(parts.fragment))
+
+    def ids_of(self, page: str) -> set[str]:
+        """The ids on a page, parsing it if the walk didn't cover it."""
+        if page not in self.ids:
+            self._walk(self.public_dir / page)
+        return self.ids[page]
+
+    def broken_links(self) -> list[Link]:
+        """References to files that don't exist."""
+        return [link for link in self.links if link.target not in self.files]
+
+    def missing_hash_targets(self) -> list[Link]:
+        """References to a fragment that the page it points to has no
+        element with that id for."""
+        return [
+            link for link in self.links
+            if link.fragment.lower() not in TOP_FRAGMENTS
+            and link.target.endswith(".html") and link.target in self.files
+            and link.fragment not in self.ids_of(link.target)
+        ]
+
+    def orphaned_assets(self) -> list[str]:
+        """Files published next to a page (a Hugo page bundle's resources)
+        that nothing on the site references. Precompressed siblings count
+        as their originals; the site root's files are served to clients
+        that don't follow links (robots.txt, the asset map), so it is not
+        a bundle."""
+        referenced = {link.target for link in self.links}
+        bundles = {
+            page.rpartition("/")[0] for page in self.files
+            if page.endswith("/index.html")
+        }
+        orphans = []
+        for path in sorted(self.files):
+            original = path.removesuffix(".gz").removesuffix(".br")
+            if original.endswith((".html", ".xml")):
+                continue
+            if original.rpartition("/")[0] in bundles and original not in referenced:
+                orphans.append(path)
+        return orphans
+
+
+@pytest.fixture(scope="session")
+def link_graph(public_dir: Path, html_files: list[Path], corpus: Corpus) -> LinkGraph:
+    """The site's links and ids, indexed once per session (per worker)."""
+    return LinkGraph(public_dir, html_files, corpus)
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--page-batch", type=int, default=PAGE_BATCH, metavar="N",
+        help=f"pages per item of each page-level rule, 1 for one item per "
+             f"page (default: {PAGE_BATCH})",
+    )
+    parser.addoption(
+        "--incremental", action="store_true",
+        help="check page-level rules only on pages that changed since they "
+             "last passed them; site-wide rules always run",
+    )
+
+
+def pytest_configure(config):
+    global INCREMENTAL
+    # Registered by pytest-xdist too; without it the marks are inert.
+    config.addinivalue_line(
+        "markers", "xdist_group(name): run on the worker that runs the group"
+    )
+    if config.getoption("incremental") and not hasattr(config, "cache"):
+        raise pytest.UsageError("--incremental needs pytest's cacheprovider")
+    INCREMENTAL = Incremental(config)
+
+
+def pytest_runtest_logreport(report):
+    # On the controller this sees every worker's reports too.
+    INCREMENTAL.record(report)
+
+
+def pytest_sessionfinish(session):
+    if not hasattr(session.config, "workerinput"):
+        INCREMENTAL.save()
+
+
+@functools.cache
+def page_hash(path: Path) -> str:
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+@functools.cache
+def incremental_key(public_dir: Path) -> str:
+    """A hash of everything besides a page itself that can change whether
+    it passes a page-level rule: the test modules and pytest.ini, the
+    parser versions, and the asset map with every asset it names (the
+    fingerprint rules read them)."""
+    digest = hashlib.sha256()
+    tests_dir = Path(__file__).parent
+    for path in [*sorted(tests_dir.glob("*.py")), tests_dir.parent / "pytest.ini"]:
+        digest.update(f"{path.name}\0".encode())
+        digest.update(path.read_bytes() if path.is_file() else b"")
+    digest.update(repr((
+        sys.version, version("beautifulsoup4"), version("lxml"),
+    )).encode())
+    asset_map = public_dir / "asset-map.json"
+    if asset_map.is_file():
+        digest.update(asset_map.read_bytes())
+        for target in sorted(set(json.loads(asset_map.read_text(encoding="utf-8")).values())):
+            path = public_dir / target.lstrip("/")
+            digest.update(f"{target}\0".encode())
+            digest.update(path.read_bytes() if path.is_file() else b"")
+    return digest.hexdigest()
+
+
+class Incremental:
+    """Which page-level rules each page passed, by page hash, across runs.
+
+    Every run records the pages each page_batch item checked and whether
+    the rule passed; with --incremental, a page whose hash is unchanged
+    since it passed a rule isn't checked against it again. The record is
+    kept in pytest's cache and dropped whenever incremental_key() changes.
+    """
+
+    def __init__(self, config):
+        self.enabled = config.getoption("incremental")
+        self.cache = getattr(config, "cache", None)
+        # rule -> page -> (hash, passed), from this run's reports
+        self.results: dict[str, dict[str, tuple[str, bool]]] = {}
+
+    @cached_property
+    def key(self) -> str:
+        return incremental_key(PUBLIC_DIR)
+
+    @cached_property
+    def pages(self) -> dict[str, dict]:
+        """{page: {"hash": ..., "passed": [rule, ...]}} from earlier runs."""
+        stored = self.cache.get(INCREMENTAL_CACHE, {}) if self.cache else {}
+        return stored.get("pages", {}) if stored.get("key") == self.key else {}
+
+    def passed(self, rule: str, page: str, digest: str) -> bool:
+        entry = self.pages.get(page)
+        return (self.enabled and entry is not None and entry["hash"] == digest
+                and rule in entry["passed"])
+
+    def record(self, report) -> None:
+        checked = dict(report.user_properties).get("page_batch")
+        if checked is None or report.when != "call":
+            return
+        results = self.results.setdefault(report.nodeid.partition("[")[0], {})
+        for page, digest in checked.items():
+            results[page] = (digest, report.passed)
+
+    def save(self) -> None:
+        if self.cache is None or not self.results or not PUBLIC_DIR.is_dir():
+            return
+        pages = dict(self.pages)
+        for rule, results in self.results.items():
+            for page, (digest, passed) in results.items():
+                entry = pages.get(page)
+                if entry is None or entry["hash"] != digest:
+                    entry = {"hash": digest, "passed": []}
+                rules = set(entry["passed"]) - {rule} | ({rule} if passed else set())
+                pages[page] = {"hash": digest, "passed": sorted(rules)}
+        pages = {page: entry for page, entry in sorted(pages.items())
+                 if (PUBLIC_DIR / page).is_file()}
+        self.cache.set(INCREMENTAL_CACHE, {"key": self.key, "pages": pages})
+
+
+INCREMENTAL: Incremental
+
+
+@functools.cache
+def site_pages(public_dir: Path) -> list[Path]:
+    """Every HTML file under public_dir, sorted; listed once per process
+    (once per pytest-xdist worker)."""
+    return sorted(public_dir.rglob("*.html"))
+
+
+def pytest_generate_tests(metafunc):
+    """Split the site into batches for each test that takes page_batch.
+
+    Batch n of every rule is in xdist_group "pages-n", so under
+    `-n auto --dist loadgroup` each page is parsed by one worker only.
+    """
+    if "page_batch" not in metafunc.fixturenames:
+        return
+    size = max(1, metafunc.config.getoption("page_batch"))
+    files = site_pages(PUBLIC_DIR) if PUBLIC_DIR.is_dir() else []
+    if not files:
+        # The fixture fails through html_files
+        metafunc.parametrize("page_batch", [(0, 0)], indirect=True, ids=["pages"])
+        return
+    width = len(str(len(files)))
+    params = []
+    for start in range(0, len(files), size):
+        stop = min(start + size, len(files))
+        if size == 1:
+            name = files[start].relative_to(PUBLIC_DIR).as_posix()
+        else:
+            name = f"pages{start + 1:0{width}}-{stop:0{width}}"
+        params.append(pytest.param(
+            (start, stop), id=name,
+            marks=pytest.mark.xdist_group(f"pages-{start // size}"),
+        ))
+    metafunc.parametrize("page_batch", params, indirect=True)
+
+
+def failure_lines(report) -> list[str]:
+    """The assertion message of a failed test, without pytest's
+    introspection of the assert expression."""
+    message = getattr(getattr(report.longrepr, "reprcrash", None), "message", "")
+    message = message.removeprefix("AssertionError: ")
+    lines = []
+    for line in message.splitlines():
+        if line.startswith("assert "):
+            break
+        lines.append(line)
+    return lines
+
+
+def pytest_terminal_summary(terminalreporter):
+    """Report each page-level rule's failures as one list, whichever
+    batches (and workers) they came from."""
+    rules: dict[str, list] = {}
+    for report in terminalreporter.stats.get("failed", []):
+        if any(name == "page_batch" for name, _ in report.user_properties):
+            rules.setdefault(report.nodeid.partition("[")[0], []).append(report)
+    if not rules:
+        return
+    terminalreporter.section("failures by rule")
+    for rule in sorted(rules):
+        reports = sorted(rules[rule], key=lambda report: report.nodeid)
+        terminalreporter.write_line(f"{rule} ({len(reports)} batch(es))")
+        header = None
+        for report in reports:
+            lines = failure_lines(report)
+            if not lines:
+                continue
+            # Each batch repeats the rule's message before its pages
+            if lines[0] != header:
+                header = lines[0]
+                terminalreporter.write_line(f"  {header}")
+            for line in lines[1:]:
+                terminalreporter.write_line(f"  {line}")
 
 
 @pytest.fixture(scope="session")
 def public_dir() -> Path:
     """Return the path to the Hugo public directory."""
-    return Path(__file__).parent.parent / "public"
+    return PUBLIC_DIR
 
 
 @pytest.fixture(scope="session")
 def html_files(public_dir: Path) -> list[Path]:
-    """Return all HTML files in the public directory."""
+    """Return all HTML files in the public directory, sorted and shared
+    read-only."""
     if not public_dir.exists():
         pytest.fail(
             f"Public directory not found at {public_dir}. "
             "Run './build' before running tests."
         )
-    return list(public_dir.rglob("*.html"))
+    return site_pages(public_dir)
+
+
+@pytest.fixture
+def page_batch(request, html_files: list[Path], public_dir: Path) -> list[Path]:
+    """This item's share of html_files, for page-level rules; see
+    --page-batch. With --incremental, only the pages that changed since
+    they last passed this rule."""
+    start, stop = request.param
+    rule = request.node.nodeid.partition("[")[0]
+    pages = []
+    checked = {}
+    for path in html_files[start:stop]:
+        page = path.relative_to(public_dir).as_posix()
+        digest = page_hash(path)
+        if not INCREMENTAL.passed(rule, page, digest):
+            pages.append(path)
+            checked[page] = digest
+    request.node.user_properties.append(("page_batch", checked))
+    if stop > start and not pages:
+        pytest.skip("pages unchanged since they passed (--incremental)")
+    return pages
 
 
 @pytest.fixture
@@ -37,9 +599,8 @@ def parse_html_file(file_path: Path) -> str:
 
 
 def parse_html(file_path: Path) -> BeautifulSoup:
-    """Parse an HTML file and return a BeautifulSoup object."""
-    with open(file_path, "r", encoding="utf-8") as f:
-        return BeautifulSoup(f.read(), "lxml")
+    """Return the session's shared, read-only parse of an HTML file."""
+    return CORPUS.page(file_path).soup
 
 
 def is_static_file(file_path: Path, public_dir: Path) -> bool:
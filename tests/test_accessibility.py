@@ -12,11 +12,11 @@ from conftest import is_static_file, parse_html
 class TestARIALandmarks:
     """Tests for ARIA landmarks and semantic HTML."""
 
-    def test_pages_have_main_landmark(self, html_files, public_dir):
+    def test_pages_have_main_landmark(self, page_batch, public_dir):
         """Verify that pages have a main landmark."""
         pages_without_main = []
 
-        for html_file in html_files:
+        for html_file in page_batch:
             # Skip static files (interactive demos/tools)
             if is_static_file(html_file, public_dir):
                 continue
@@ -34,11 +34,11 @@ class TestARIALandmarks:
             f"{chr(10).join(str(p) for p in pages_without_main)}"
         )
 
-    def test_pages_have_navigation_landmark(self, html_files, public_dir):
+    def test_pages_have_navigation_landmark(self, page_batch, public_dir):
         """Verify that pages have a navigation landmark."""
         pages_without_nav = []
 
-        for html_file in html_files:
+        for html_file in page_batch:
             # Skip static files (interactive demos/tools)
             if is_static_file(html_file, public_dir):
                 continue
@@ -61,17 +61,17 @@ class TestARIALandmarks:
 class TestFormAccessibility:
     """Tests for form accessibility."""
 
-    def test_all_form_inputs_have_labels(self, html_files, public_dir):
+    def test_all_form_inputs_have_labels(self, page_batch, public_dir, corpus):
         """Verify that all form inputs have associated labels."""
         inputs_without_labels = []
 
-        for html_file in html_files:
+        for html_file in page_batch:
             # Skip static files (interactive demos/tools)
             if is_static_file(html_file, public_dir):
                 continue
 
-            soup = parse_html(html_file)
-            inputs = soup.find_all(["input", "select", "textarea"])
+            page = corpus.page(html_file)
+            inputs = page.soup.find_all(["input", "select", "textarea"])
 
             for input_elem in inputs:
                 # Skip hidden inputs and buttons
@@ -84,10 +84,8 @@ class TestFormAccessibility:
 
                 # Check for label by 'for' attribute
                 has_label = False
-                if input_id:
-                    label = soup.find("label", {"for": input_id})
-                    if label:
-                        has_label = True
+                if input_id and input_id in page.label_for:
+                    has_label = True
 
                 # Check for aria-label or aria-labelledby
                 if not has_label:
@@ -114,11 +112,11 @@ class TestFormAccessibility:
             f"{chr(10).join(f'{p}: {t} ({n})' for p, t, n in inputs_without_labels)}"
         )
 
-    def test_form_buttons_have_accessible_names(self, html_files, public_dir):
+    def test_form_buttons_have_accessible_names(self, page_batch, public_dir):
         """Verify that all buttons have accessible names."""
         buttons_without_names = []
 
-        for html_file in html_files:
+        for html_file in page_batch:
             # Skip static files (interactive demos/tools)
             if is_static_file(html_file, public_dir):
                 continue
@@ -159,7 +157,7 @@ class TestFormAccessibility:
 class TestLinkAccessibility:
     """Tests for link accessibility."""
 
-    def test_links_have_descriptive_text(self, html_files, public_dir):
+    def test_links_have_descriptive_text(self, page_batch, public_dir):
         """Verify that links have descriptive text (not just 'click here')."""
         NON_DESCRIPTIVE_PHRASES = [
             "click here",
@@ -171,7 +169,7 @@ class TestLinkAccessibility:
 
         links_with_poor_text = []
 
-        for html_file in html_files:
+        for html_file in page_batch:
             # Generated/static documents (e.g. LaTeXML output labels
             # bibliography URLs "Link") are faithful renderings of their
             # sources, not authored site content.
@@ -197,13 +195,13 @@ class TestLinkAccessibility:
             f"{chr(10).join(f'{p}: \"{text}\"' for p, text in links_with_poor_text)}"
         )
 
-    def test_links_to_external_sites_are_marked(self, html_files):
+    def test_links_to_external_sites_are_marked(self, page_batch):
         """Verify that external links are marked (warning only)."""
         import urllib.parse
 
         unmarked_external_links = []
 
-        for html_file in html_files:
+        for html_file in page_batch:
             soup = parse_html(html_file)
             links = soup.find_all("a", href=True)
 
@@ -248,13 +246,13 @@ class TestLinkAccessibility:
 class TestImageAccessibility:
     """Tests for image accessibility (beyond alt text)."""
 
-    def test_decorative_images_have_empty_alt(self, html_files):
+    def test_decorative_images_have_empty_alt(self, page_batch):
         """Verify that decorative images have empty alt attributes."""
         # This is more of a warning - we can't automatically determine
         # if an image is decorative, but we can check for patterns
         images_with_alt_decorative = []
 
-        for html_file in html_files:
+        for html_file in page_batch:
             soup = parse_html(html_file)
             images = soup.find_all("img")
 
@@ -327,11 +325,11 @@ class TestKeyboardNavigation:
         assert "outline: 2px solid var(--color-accent)" in rule.group(1)
         assert "outline-offset: 2px" in rule.group(1)
 
-    def test_no_positive_tabindex(self, html_files):
+    def test_no_positive_tabindex(self, page_batch):
         """Verify that no elements use positive tabindex values."""
         elements_with_positive_tabindex = []
 
-        for html_file in html_files:
+        for html_file in page_batch:
             soup = parse_html(html_file)
             elements = soup.find_all(attrs={"tabindex": True})
 
@@ -354,14 +352,14 @@ class TestKeyboardNavigation:
             f"{chr(10).join(f'{p}: <{tag}> tabindex={idx}' for p, tag, idx in elements_with_positive_tabindex)}"
         )
 
-    def test_interactive_elements_are_keyboard_accessible(self, html_files):
+    def test_interactive_elements_are_keyboard_accessible(self, page_batch):
         """Verify that interactive elements are keyboard accessible."""
         # Check for onclick handlers on non-interactive elements
         non_interactive_with_onclick = []
 
         INTERACTIVE_TAGS = ["a", "button", "input", "select", "textarea"]
 
-        for html_file in html_files:
+        for html_file in page_batch:
             soup = parse_html(html_file)
             elements = soup.find_all(attrs={"onclick": True})
 
@@ -0,0 +1,66 @@
+"""Tests for the content-hashed asset URLs written by utilities/fingerprint.py.
+
+Scripts, fonts, and the LaTeXML and demo stylesheets are published under
+<name>.<hash>.<ext> so they can be cached as immutable; asset-map.json
+maps each original path to its fingerprinted one.
+"""
+
+import base64
+import hashlib
+import json
+import re
+from pathlib import Path
+
+import pytest
+
+from conftest import parse_html
+
+FINGERPRINTED = re.compile(r"\.([0-9a-f]{16})\.[a-z0-9]+$")
+
+
+def asset_map(public_dir: Path) -> dict[str, str]:
+    path = public_dir / "asset-map.json"
+    if not path.is_file():
+        pytest.fail("public/asset-map.json not found. Run './build' first.")
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+@pytest.mark.performance
+class TestAssetFingerprints:
+    def test_fingerprints_match_content(self, public_dir):
+        """Every fingerprinted file is named after its own bytes, so an
+        immutable cache entry can never go stale."""
+        for original, target in asset_map(public_dir).items():
+            path = public_dir / target.lstrip("/")
+            assert path.is_file(), f"{original}: {target} missing"
+            digest = hashlib.sha256(path.read_bytes()).hexdigest()[:16]
+            assert FINGERPRINTED.search(target).group(1) == digest, (
+                f"{target} does not match its content"
+            )
+
+    def test_pages_reference_fingerprinted_assets(self, page_batch, public_dir):
+        """No page loads a mapped asset from its revalidated original path."""
+        originals = set(asset_map(public_dir))
+        stale = []
+        for html_file in page_batch:
+            soup = parse_html(html_file)
+            for tag in soup.find_all(["script", "link"]):
+                url = tag.get("src") or tag.get("href") or ""
+                if url.split("?")[0] in originals:
+                    stale.append(f"{html_file.relative_to(public_dir)}: {url}")
+        assert not stale, f"References to unfingerprinted assets: {stale}"
+
+    def test_integrity_matches_fingerprinted_assets(self, page_batch, public_dir):
+        """Rewritten references keep a correct SRI integrity value."""
+        wrong = []
+        for html_file in page_batch:
+            for tag in parse_html(html_file).find_all(integrity=True):
+                url = tag.get("src") or tag.get("href")
+                if not url or not url.startswith("/"):
+                    continue
+                algorithm, _, expected = tag["integrity"].partition("-")
+                data = (public_dir / url.lstrip("/")).read_bytes()
+                actual = base64.b64encode(hashlib.new(algorithm, data).digest())
+                if actual.decode() != expected:
+                    wrong.append(f"{html_file.relative_to(public_dir)}: {url}")
+        assert not wrong, f"Integrity mismatches: {wrong}"
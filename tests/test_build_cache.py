@@ -0,0 +1,75 @@
+"""Tests for the shell side of the build cache, utilities/cache.sh."""
+
+import os
+import subprocess
+from pathlib import Path
+
+import pytest
+
+REPO_DIR = Path(__file__).parent.parent
+# two entries fit in a 1 MB store
+ENTRY_BYTES = 400 * 1024
+
+
+def cache(tmp_path: Path, script: str) -> subprocess.CompletedProcess:
+    """Run script with cache.sh sourced and the cache under tmp_path."""
+    return subprocess.run(
+        ["bash", "-c", f"source {REPO_DIR / 'utilities' / 'cache.sh'}\n{script}"],
+        env={**os.environ, "BUILD_CACHE_DIR": str(tmp_path / "cache")},
+        capture_output=True, text=True,
+    )
+
+
+@pytest.fixture
+def store(tmp_path):
+    """A store holding entries a to d, least recently used first."""
+    source = tmp_path / "entry"
+    source.write_bytes(b"x" * ENTRY_BYTES)
+    result = cache(tmp_path, "\n".join(
+        f"cacheput store {key} {source} && touch -d @{1000 + i} \"$(buildcachedir)/store/{key}\""
+        for i, key in enumerate("abcd")
+    ))
+    assert result.returncode == 0, result.stderr
+    return tmp_path / "cache" / "store"
+
+
+class TestCache:
+    """Tests for cacheput, cacheget, cachehas and cacheevict."""
+
+    def test_get_copies_an_entry(self, tmp_path, store):
+        """Verify cacheget copies a stored entry out."""
+        result = cache(tmp_path, f"cacheget store a {tmp_path / 'out'}")
+
+        assert result.returncode == 0, result.stderr
+        assert (tmp_path / "out").read_bytes() == (store / "a").read_bytes()
+
+    def test_get_fails_on_a_miss(self, tmp_path, store):
+        """Verify cacheget fails and writes nothing for a missing key."""
+        result = cache(tmp_path, f"cacheget store missing {tmp_path / 'out'}")
+
+        assert result.returncode == 1
+        assert not (tmp_path / "out").exists()
+
+    def test_put_leaves_no_temporary_files(self, tmp_path, store):
+        """Verify cacheput renames its temporary file into place."""
+        assert sorted(path.name for path in store.iterdir()) == ["a", "b", "c", "d"]
+
+    @pytest.mark.parametrize("use, kept", [
+        (":", ["c", "d"]),
+        ("cacheget store a /dev/null", ["a", "d"]),
+        ("cachehas store b", ["b", "d"]),
+    ])
+    def test_evict_deletes_least_recently_used(self, tmp_path, store, use, kept):
+        """Entries are kept newest first while they fit; reading an entry
+        with cacheget or cachehas makes it the newest."""
+        result = cache(tmp_path, f"{use}\ncacheevict store 1")
+
+        assert result.returncode == 0, result.stderr
+        assert sorted(path.name for path in store.iterdir()) == kept
+
+    def test_evict_keeps_a_store_that_fits(self, tmp_path, store):
+        """Verify BUILD_CACHE_MAX_MB sets the default limit."""
+        result = cache(tmp_path, "BUILD_CACHE_MAX_MB=2 cacheevict store")
+
+        assert result.returncode == 0, result.stderr
+        assert sorted(path.name for path in store.iterdir()) == ["a", "b", "c", "d"]
@@ -0,0 +1,484 @@
+"""Tests for utilities/build.sh, run against a scratch site.
+
+The build is sourced from utilities.sh and run with its toolchain
+replaced: LaTeX compiles by writing a placeholder PDF or HTML document,
+and hugo, git and inotifywait are scripts on PATH. The scripts under
+utilities/ (latexdeps, buildstate, fingerprint, sitesync, ...) are the
+real ones.
+"""
+
+import json
+import os
+import shutil
+import socket
+import subprocess
+import textwrap
+from pathlib import Path
+
+import pytest
+
+REPO_DIR = Path(__file__).parent.parent
+
+# Shell functions standing in for the LaTeX toolchain (utilities/latex.sh);
+# run_build keeps the real ones named in `real`. A PDF's stamp is a
+# trailing line instead of XMP metadata.
+STUBS = {
+    "compilepdf": """
+compilepdf() { sleep "${COMPILE_SECONDS:-0}"; printf 'pdf %s\\n' "$(cat "$1")" > "$2"; }
+""",
+    "converthtml": """
+converthtml() {
+    printf '<!DOCTYPE html><html><head><title>doc</title></head><body><p>%s</p></body></html>\\n' \\
+        "$(cat "$1")" > "$2"
+}
+""",
+    "markpdf": """
+markpdf() { printf 'texhash %s\\n' "$(getlatexhash "$1")" >> "$2"; }
+""",
+    "getpdfhash": """
+getpdfhash() { sed -n 's/^texhash //p' "$1" 2>/dev/null; }
+""",
+    "gettoolchain": """
+gettoolchain() { echo stub; }
+""",
+}
+
+
+def write_script(path: Path, body: str) -> None:
+    path.write_text("#!/usr/bin/env bash\n" + textwrap.dedent(body))
+    path.chmod(0o755)
+
+
+@pytest.fixture
+def site(tmp_path):
+    """A site with one pdf document, its own build cache and stub tools."""
+    root = tmp_path / "site"
+    (root / "latex" / "doc").mkdir(parents=True)
+    (root / "latex" / "latex.manifest").write_text("doc/doc.tex pdf\n")
+    (root / "latex" / "doc" / "doc.tex").write_text("\\documentclass{article}\n")
+    (root / "utilities").symlink_to(REPO_DIR / "utilities")
+    (tmp_path / "bin").mkdir()
+    return root
+
+
+@pytest.fixture
+def full_site(site):
+    """The site with what a full build needs besides LaTeX: the
+    stylesheets LaTeXML documents link, a Hugo that only copies static/
+    and the LaTeX output, a git that does nothing, and an already cloned
+    public/."""
+    sheets = site / "static" / "css" / "latexml"
+    sheets.mkdir(parents=True)
+    for name in ("LaTeXML.css", "ltx-article.css", "site.css"):
+        (sheets / name).write_text(f"/* {name} */\n")
+    (site / ".prettierrc").write_text("{}\n")
+    (site / ".prettierignore").write_text("")
+    (site / "public").mkdir()
+    bin_dir = site.parent / "bin"
+    write_script(bin_dir / "git", "exit 0\n")
+    write_script(bin_dir / "hugo", """\
+        for arg
+        do
+            case $arg in --destination=*) dest=${arg#*=} ;; esac
+        done
+        rm -rf "$dest"
+        mkdir -p "$dest/docs"
+        cp -r static/. "$dest/"
+        [[ ! -d latex/output ]] || cp -r latex/output/. "$dest/docs/"
+    """)
+    return site
+
+
+def add_document(site: Path, texfile: str, formats: str = "pdf") -> None:
+    """Add a document to the site's manifest."""
+    path = site / "latex" / texfile
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(f"\\documentclass{{article}}\n% {texfile}\n")
+    with open(site / "latex" / "latex.manifest", "a") as manifest:
+        manifest.write(f"{texfile} {formats}\n")
+
+
+def run_build(site: Path, *args: str, env: dict | None = None, stubs: str = "",
+              real: tuple[str, ...] = (), timeout: float = 60
+              ) -> subprocess.CompletedProcess:
+    """Run build with the stubs replaced by `stubs` and the functions in
+    `real` left as utilities/latex.sh defines them."""
+    script = (
+        f"source {REPO_DIR / 'utilities.sh'}\n"
+        f"hugo_repo_dir={site}\n"
+        + "".join(body for name, body in STUBS.items() if name not in real)
+        + f"{stubs}\n"
+        f"build {' '.join(args)}\n"
+    )
+    env = dict(
+        os.environ,
+        BUILD_CACHE_DIR=str(site.parent / "cache"),
+        PATH=f"{site.parent / 'bin'}{os.pathsep}{os.environ['PATH']}",
+        **(env or {}),
+    )
+    return subprocess.run(
+        ["bash", "-c", script], cwd=site, env=env,
+        capture_output=True, text=True, timeout=timeout,
+    )
+
+
+class TestWatch:
+    """Tests for build --watch."""
+
+    def test_rebuild_with_hugo_in_background(self, site):
+        """The job pool only reaps its own jobs: hugo server, running in
+        the background, exiting while a rebuild's pool drains must not be
+        taken for one of the pool's jobs."""
+        bin_dir = site.parent / "bin"
+        # Each compile takes 1 s. The initial build ends at about 1 s and
+        # starts hugo, which exits at about 2.5 s, during the rebuild of
+        # the edit made at about 2 s.
+        write_script(bin_dir / "hugo", "sleep 1.5\n")
+        write_script(bin_dir / "inotifywait", f"""\
+            sleep 1
+            echo '% edited' >> {site}/latex/doc/doc.tex
+            echo {site.resolve()}/latex/doc/doc.tex
+        """)
+
+        result = run_build(site, "--watch", env={"COMPILE_SECONDS": "1"})
+
+        assert result.returncode == 0, result.stderr
+        assert result.stdout.count("Built: doc/doc.tex (pdf)") == 2, result.stdout
+
+
+    def test_jobs_finishing_together_are_all_reaped(self, site):
+        """Jobs that exit while another one is being reaped are still
+        collected, whether or not bash has already reaped them itself."""
+        names = ["doc/doc.tex", "a/a.tex", "b/b.tex", "c/c.tex"]
+        for name in names[1:]:
+            add_document(site, name)
+        bin_dir = site.parent / "bin"
+        write_script(bin_dir / "hugo", "exit 0\n")
+        write_script(bin_dir / "inotifywait", "exit 0\n")
+
+        for _ in range(3):
+            shutil.rmtree(site.parent / "cache", ignore_errors=True)
+            result = run_build(site, "--watch", "--jobs", "4",
+                               env={"COMPILE_SECONDS": "0.3"})
+
+            assert result.returncode == 0, result.stderr
+            for name in names:
+                assert f"Built: {name} (pdf)" in result.stdout, result.stderr
+
+
+class TestJobPool:
+    """Tests for the pool building LaTeX artifacts in parallel."""
+
+    @pytest.fixture
+    def two_docs(self, full_site):
+        add_document(full_site, "other/other.tex")
+        return full_site
+
+    @pytest.mark.parametrize("jobs, order", [
+        ("1", ["start", "end", "start", "end"]),
+        ("2", ["start", "start", "end", "end"]),
+    ])
+    def test_jobs_run_concurrently(self, two_docs, jobs, order):
+        """--jobs bounds how many documents compile at once."""
+        log = two_docs.parent / "compiles.log"
+        logged = (
+            f'compilepdf() {{ echo "start $1" >> {log}; sleep 0.5; '
+            f'echo "end $1" >> {log}; echo pdf > "$2"; }}'
+        )
+
+        result = run_build(two_docs, "--no-pretty", "--jobs", jobs, stubs=logged)
+
+        assert result.returncode == 0, result.stderr
+        assert [line.split()[0] for line in log.read_text().splitlines()] == order
+        for texfile in ("doc/doc.tex", "other/other.tex"):
+            assert f"Built: {texfile} (pdf)" in result.stdout
+            published = two_docs / "public" / "docs" / texfile.replace(".tex", ".pdf")
+            assert published.read_text().startswith("pdf\n")
+
+    def test_failed_job_fails_the_build(self, two_docs):
+        """A failing document shows its log and fails the build once the
+        other jobs are done."""
+        failing = (
+            'compilepdf() { if [[ $1 == other.tex ]]; then '
+            'echo "! Undefined control sequence."; return 1; fi; echo pdf > "$2"; }'
+        )
+
+        result = run_build(two_docs, "--no-pretty", "--jobs", "2", stubs=failing)
+
+        assert result.returncode == 1
+        assert "Built: doc/doc.tex (pdf)" in result.stdout
+        assert "Failed: other/other.tex (pdf)" in result.stderr
+        assert "! Undefined control sequence." in result.stderr
+        assert "1 LaTeX job(s) failed" in result.stderr
+
+
+class TestAuxCache:
+    """Tests for compilepdf's auxiliary directories in the build cache."""
+
+    @pytest.fixture
+    def latexmk(self, full_site):
+        """A latexmk that logs its output directory and whether it found
+        that directory's .aux file from an earlier run."""
+        log = full_site.parent / "latexmk.log"
+        write_script(full_site.parent / "bin" / "latexmk", f"""\
+            for arg
+            do
+                case $arg in -outdir=*) outdir=${{arg#*=}} ;; esac
+            done
+            name=$(basename "${{!#}}" .tex)
+            [[ -e $outdir/$name.aux ]] && run=warm || run=cold
+            echo "$outdir $run" >> {log}
+            touch "$outdir/$name.aux"
+            printf 'pdf %s\\n' "$(cat "${{!#}}")" > "$outdir/$name.pdf"
+        """)
+        return log
+
+    def test_recompile_reuses_aux_dir(self, full_site, latexmk):
+        """An edited document compiles again in the directory its last
+        compile left, so latexmk starts from those .aux files."""
+        first = run_build(full_site, "--no-pretty", real=("compilepdf",))
+        assert first.returncode == 0, first.stderr
+        with open(full_site / "latex" / "doc" / "doc.tex", "a") as tex:
+            tex.write("% edited\n")
+
+        second = run_build(full_site, "--no-pretty", real=("compilepdf",))
+
+        assert second.returncode == 0, second.stderr
+        (cold_dir, cold), (warm_dir, warm) = (
+            line.split() for line in latexmk.read_text().splitlines()
+        )
+        assert (cold, warm) == ("cold", "warm")
+        assert cold_dir == warm_dir
+        assert Path(cold_dir).parent == full_site.parent / "cache" / "aux"
+        published = full_site / "public" / "docs" / "doc" / "doc.pdf"
+        assert published.read_text().startswith("pdf \\documentclass{article}\n% edited")
+
+    def test_documents_get_their_own_aux_dir(self, full_site, latexmk):
+        """Documents sharing a file name don't share .aux files."""
+        add_document(full_site, "other/doc.tex")
+
+        result = run_build(full_site, "--no-pretty", real=("compilepdf",))
+
+        assert result.returncode == 0, result.stderr
+        runs = [line.split() for line in latexmk.read_text().splitlines()]
+        assert [run for _, run in runs] == ["cold", "cold"]
+        assert len({outdir for outdir, _ in runs}) == 2
+
+
+class TestLatexmlServer:
+    """Tests for build --latexml-server."""
+
+    @pytest.fixture
+    def latexmlc(self, full_site):
+        """An HTML document and a latexmlc that logs whether it converted
+        through a server or directly, and whose servers answer unless
+        LATEXMLC_SERVER_FAILS is set."""
+        (full_site / "latex" / "latex.manifest").write_text("doc/doc.tex html\n")
+        log = full_site.parent / "latexmlc.log"
+        write_script(full_site.parent / "bin" / "latexmlc", f"""\
+            via=direct
+            for arg
+            do
+                case $arg in
+                    --dest=*) dest=${{arg#*=}} ;;
+                    --port=*) via=server ;;
+                esac
+            done
+            echo "$via" >> {log}
+            [[ $via == direct || -z ${{LATEXMLC_SERVER_FAILS:-}} ]] || exit 1
+            echo '<!DOCTYPE html><html><head><title>doc</title></head><body></body></html>' > "$dest"
+        """)
+        return log
+
+    @pytest.fixture
+    def server(self):
+        """A port something is listening on, standing in for latexmls."""
+        with socket.socket() as listener:
+            listener.bind(("127.0.0.1", 0))
+            listener.listen()
+            yield str(listener.getsockname()[1])
+
+    def test_converts_through_the_server(self, full_site, latexmlc, server):
+        result = run_build(full_site, "--no-pretty", "--latexml-server",
+                           real=("converthtml",), env={"LATEXML_SERVER_PORT": server})
+
+        assert result.returncode == 0, result.stderr
+        assert "Built: doc/doc.tex (html)" in result.stdout
+        assert latexmlc.read_text().splitlines() == ["server"]
+
+    def test_failed_server_falls_back_to_latexmlc(self, full_site, latexmlc, server):
+        """A conversion the server fails is retried with a one-shot
+        latexmlc, and the build goes on."""
+        result = run_build(full_site, "--no-pretty", "--latexml-server",
+                           real=("converthtml",),
+                           env={"LATEXML_SERVER_PORT": server,
+                                "LATEXMLC_SERVER_FAILS": "1"})
+
+        assert result.returncode == 0, result.stderr
+        assert (f"LaTeXML server on port {server} failed; converting doc.tex directly"
+                in result.stdout)
+        assert "Built: doc/doc.tex (html)" in result.stdout
+        assert latexmlc.read_text().splitlines() == ["server", "direct"]
+        assert (full_site / "public" / "docs" / "doc" / "doc.html").exists()
+
+    def test_converts_directly_without_latexmls(self, full_site, latexmlc):
+        """With no server running and latexmls not installed, documents
+        are converted directly."""
+        if shutil.which("latexmls"):
+            pytest.skip("latexmls is installed")
+        with socket.socket() as probe:
+            probe.bind(("127.0.0.1", 0))
+            free = str(probe.getsockname()[1])
+
+        result = run_build(full_site, "--no-pretty", "--latexml-server",
+                           real=("converthtml",),
+                           env={"LATEXML_SERVER_PORT": free})
+
+        assert result.returncode == 0, result.stderr
+        assert "Warning: no LaTeXML server started; converting directly" in result.stderr
+        assert latexmlc.read_text().splitlines() == ["direct"]
+
+
+class TestArtifactCache:
+    """Tests for the artifact cache shared across builds."""
+
+    def test_lost_artifact_comes_from_the_cache(self, full_site):
+        """An artifact missing from public/ (a reset, a fresh clone) is
+        restored from the cache instead of compiled again."""
+        log = full_site.parent / "compiles.log"
+        logged = f'compilepdf() {{ echo "$1" >> {log}; echo pdf > "$2"; }}'
+        first = run_build(full_site, "--no-pretty", stubs=logged)
+        assert first.returncode == 0, first.stderr
+        published = full_site / "public" / "docs" / "doc" / "doc.pdf"
+        built = published.read_bytes()
+        published.unlink()
+
+        second = run_build(full_site, "--no-pretty", stubs=logged)
+
+        assert second.returncode == 0, second.stderr
+        assert "Cached: doc/doc.tex (pdf)" in second.stdout
+        assert log.read_text().splitlines() == ["doc.tex"]
+        assert published.read_bytes() == built
+
+    def test_published_artifact_seeds_the_cache(self, full_site):
+        """A current published artifact fills a cleared cache, so a later
+        loss of public/ still needs no compile."""
+        first = run_build(full_site, "--no-pretty")
+        assert first.returncode == 0, first.stderr
+        artifacts = full_site.parent / "cache" / "artifacts"
+        shutil.rmtree(artifacts)
+
+        second = run_build(full_site, "--no-pretty")
+
+        assert second.returncode == 0, second.stderr
+        assert "Skipping: doc/doc.tex (pdf unchanged)" in second.stdout
+        published = full_site / "public" / "docs" / "doc" / "doc.pdf"
+        assert [path.read_bytes() for path in artifacts.iterdir()] == [
+            published.read_bytes()
+        ]
+
+
+class TestBuildState:
+    """Tests for the build-state index across full builds."""
+
+    def test_second_build_takes_index_hit(self, full_site):
+        """The index records the published HTML, after fingerprint.py has
+        rewritten its stylesheet links, so an unchanged document is found
+        current without reading its stamp back."""
+        (full_site / "latex" / "latex.manifest").write_text("doc/doc.tex html\n")
+        stamps = full_site.parent / "stamps.log"
+        log_stamps = (
+            'gethtmlhash() { echo "$1" >> ' + str(stamps) + '; gethtmlmeta "$1" texhash; }'
+        )
+
+        first = run_build(full_site, "--no-pretty", stubs=log_stamps)
+        assert first.returncode == 0, first.stderr
+        published = (full_site / "public" / "docs" / "doc" / "doc.html").read_text()
+        assert "/css/latexml/site.css" not in published
+        stamps.unlink()
+
+        second = run_build(full_site, "--no-pretty", stubs=log_stamps)
+        assert second.returncode == 0, second.stderr
+        assert "Skipping: doc/doc.tex (html unchanged)" in second.stdout
+        assert not stamps.exists(), stamps.read_text()
+
+    @pytest.fixture
+    def stamps(self, full_site):
+        """Log each PDF whose stamp the build reads back."""
+        log = full_site.parent / "stamps.log"
+        logged = (
+            'getpdfhash() { echo "$1" >> ' + str(log) + '; '
+            'sed -n "s/^texhash //p" "$1" 2>/dev/null; }'
+        )
+        first = run_build(full_site, "--no-pretty", stubs=logged)
+        assert first.returncode == 0, first.stderr
+        return log, logged
+
+    def test_index_hit_reads_no_stamp(self, full_site, stamps):
+        """An unchanged PDF the index vouches for is skipped without
+        running exiftool on it."""
+        log, logged = stamps
+        log.unlink(missing_ok=True)
+
+        second = run_build(full_site, "--no-pretty", stubs=logged)
+
+        assert second.returncode == 0, second.stderr
+        assert "Skipping: doc/doc.tex (pdf unchanged)" in second.stdout
+        assert not log.exists(), log.read_text()
+
+    @pytest.mark.parametrize("change", ["lose index", "touch artifact"])
+    def test_index_miss_falls_back_to_stamp(self, full_site, stamps, change):
+        """Without a matching index entry the stamp decides, and the
+        artifact is recorded again for the next build."""
+        log, logged = stamps
+        log.unlink(missing_ok=True)
+        index = full_site.parent / "cache" / "build-state.json"
+        published = full_site / "public" / "docs" / "doc" / "doc.pdf"
+        if change == "lose index":
+            index.unlink()
+        else:
+            with published.open("a") as f:
+                f.write("re-saved by a viewer\n")
+
+        second = run_build(full_site, "--no-pretty", stubs=logged)
+
+        assert second.returncode == 0, second.stderr
+        assert "Skipping: doc/doc.tex (pdf unchanged)" in second.stdout
+        assert log.read_text().splitlines() == ["public/docs/doc/doc.pdf"]
+        entry = json.loads(index.read_text())["docs/doc/doc.pdf"]
+        assert entry["size"] == published.stat().st_size
+
+
+class TestProfileReport:
+    """Tests for build --profile-report."""
+
+    @pytest.fixture
+    def history(self, site):
+        path = site.parent / "cache" / "profile" / "history.jsonl"
+        path.parent.mkdir(parents=True)
+        path.write_text("".join(
+            json.dumps({"time": f"2026-01-0{day}T00:00:00", "label": "",
+                        "total": 10.0 + day, "stages": {"hugo": 5.0}, "jobs": {}}) + "\n"
+            for day in (1, 2, 3)
+        ))
+        return path
+
+    def test_count(self, site, history):
+        result = run_build(site, "--profile-report", "2")
+
+        assert result.returncode == 0, result.stderr
+        assert "Last 2 profiled build(s)" in result.stdout
+
+    def test_option_after_is_not_a_count(self, site, history):
+        result = run_build(site, "--profile-report", "--jobs", "4")
+
+        assert result.returncode == 0, result.stderr
+        assert "Last 3 profiled build(s)" in result.stdout
+
+    @pytest.mark.parametrize("count", ["0", "ten"])
+    def test_rejects_counts_below_one(self, site, history, count):
+        result = run_build(site, "--profile-report", count)
+
+        assert result.returncode == 1
+        assert "takes a positive number of builds" in result.stderr
+        assert "profiled build" not in result.stdout
@@ -12,26 +12,19 @@ from conftest import is_static_file, parse_html
 class TestPageDescriptions:
     """Tests for page description requirements."""
 
-    def test_all_content_pages_have_descriptions(self, public_dir):
+    def test_all_content_pages_have_descriptions(self, page_batch, public_dir, corpus):
         """Verify that all content pages have descriptions in meta tags."""
-        # Get all HTML files except category/tag index pages and static files
-        html_files = []
-        for html_file in public_dir.rglob("*.html"):
+        missing_descriptions = []
+
+        for html_file in page_batch:
             # Skip Hugo-generated taxonomy pages
             if "categories" in html_file.parts or "tags" in html_file.parts:
                 continue
             # Skip static files (interactive demos/tools)
             if is_static_file(html_file, public_dir):
                 continue
-            html_files.append(html_file)
-
-        missing_descriptions = []
 
-        for html_file in html_files:
-            soup = parse_html(html_file)
-            description = soup.find("meta", {"name": "description"})
-
-            if not description or not description.get("content"):
+            if not corpus.head(html_file).meta.get("description"):
                 missing_descriptions.append(html_file.relative_to(public_dir))
 
         assert not missing_descriptions, (
@@ -44,16 +37,15 @@ class TestPageDescriptions:
 class TestPageTitles:
     """Tests for page title requirements."""
 
-    def test_all_pages_have_unique_titles(self, html_files):
+    def test_all_pages_have_unique_titles(self, html_files, corpus):
         """Verify that all pages have unique titles."""
         titles_to_pages = {}
 
         for html_file in html_files:
-            soup = parse_html(html_file)
-            title_tag = soup.find("title")
+            title = corpus.head(html_file).title
 
-            if title_tag and title_tag.string:
-                title = title_tag.string.strip()
+            if title:
+                title = title.strip()
                 if title not in titles_to_pages:
                     titles_to_pages[title] = []
                 titles_to_pages[title].append(
@@ -72,23 +64,22 @@ class TestPageTitles:
             )
         )
 
-    def test_titles_are_descriptive(self, html_files, public_dir):
+    def test_titles_are_descriptive(self, page_batch, public_dir, corpus):
         """Verify that page titles are not too short or generic."""
         MIN_TITLE_LENGTH = 10
         GENERIC_TITLES = ["Untitled", "New Page", "Page", "Home"]
 
         short_or_generic_titles = []
 
-        for html_file in html_files:
+        for html_file in page_batch:
             # Skip static files (interactive demos/tools)
             if is_static_file(html_file, public_dir):
                 continue
 
-            soup = parse_html(html_file)
-            title_tag = soup.find("title")
+            title = corpus.head(html_file).title
 
-            if title_tag and title_tag.string:
-                title = title_tag.string.strip()
+            if title:
+                title = title.strip()
 
                 if len(title) < MIN_TITLE_LENGTH:
                     short_or_generic_titles.append(
@@ -109,12 +100,12 @@ class TestPageTitles:
 class TestHeadingHierarchy:
     """Tests for heading hierarchy and structure."""
 
-    def test_all_pages_have_h1(self, html_files, public_dir):
+    def test_all_pages_have_h1(self, page_batch, public_dir):
         """Verify that all pages have exactly one H1 heading."""
         pages_without_h1 = []
         pages_with_multiple_h1 = []
 
-        for html_file in html_files:
+        for html_file in page_batch:
             # Generated/static documents are faithful renderings of their
             # sources (e.g. the CV has no document title), not authored
             # site content.
@@ -144,17 +135,16 @@ class TestHeadingHierarchy:
 
         assert not errors, "\n\n".join(errors)
 
-    def test_heading_hierarchy_is_logical(self, html_files, public_dir):
+    def test_heading_hierarchy_is_logical(self, page_batch, public_dir, corpus):
         """Verify that heading levels don't skip (e.g., H1 to H3 without H2)."""
         pages_with_skipped_headings = []
 
-        for html_file in html_files:
+        for html_file in page_batch:
             # Generated/static documents are exempt: LaTeXML marks abstract
             # titles as H6 by design, which skips levels.
             if is_static_file(html_file, public_dir):
                 continue
-            soup = parse_html(html_file)
-            headings = soup.find_all(["h1", "h2", "h3", "h4", "h5", "h6"])
+            headings = corpus.page(html_file).headings
 
             if not headings:
                 continue
@@ -211,13 +201,13 @@ class TestNotFoundPage:
 class TestContentQuality:
     """Tests for basic content quality."""
 
-    def test_no_lorem_ipsum_in_content(self, html_files):
+    def test_no_lorem_ipsum_in_content(self, page_batch):
         """Verify that no pages contain placeholder Lorem Ipsum text."""
         LOREM_INDICATORS = ["lorem ipsum", "dolor sit amet", "consectetur adipiscing"]
 
         pages_with_lorem = []
 
-        for html_file in html_files:
+        for html_file in page_batch:
             soup = parse_html(html_file)
             body_text = soup.get_text().lower()
 
@@ -229,13 +219,13 @@ class TestContentQuality:
             f"{chr(10).join(str(p) for p in pages_with_lorem)}"
         )
 
-    def test_pages_have_sufficient_content(self, html_files, public_dir):
+    def test_pages_have_sufficient_content(self, page_batch, public_dir):
         """Verify that pages have a reasonable amount of content."""
         MIN_CONTENT_LENGTH = 100  # Minimum characters in body text
 
         pages_with_little_content = []
 
-        for html_file in html_files:
+        for html_file in page_batch:
             # Skip static files (interactive demos/tools)
             if is_static_file(html_file, public_dir):
                 continue
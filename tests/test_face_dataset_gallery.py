@@ -1,9 +1,22 @@
 """Tests for the standalone face dataset gallery."""
 
+import functools
+import hashlib
+import http.server
 import json
+import shutil
+import struct
+import subprocess
+import sys
+import threading
+import urllib.error
+import urllib.request
+import zlib
 from collections import Counter
 from pathlib import Path
 
+import pytest
+
 
 REPO_ROOT = Path(__file__).parent.parent
 GALLERY_HTML = REPO_ROOT / "static" / "face-dataset" / "index.html"
@@ -37,3 +50,326 @@ def test_gallery_builds_native_lazy_collapsible_groups():
     assert "category.summary" in source
     assert "category.method" in source
     assert "items.slice(0, 3)" in source
+
+
+def test_gallery_offers_responsive_derivatives_with_png_fallback():
+    """Cards use the built manifest's srcsets and keep the PNG as src."""
+    source = GALLERY_HTML.read_text(encoding="utf-8")
+
+    assert "document.createElement('picture')" in source
+    assert "source.dataset.srcset = srcset" in source
+    assert "source.srcset = source.dataset.srcset" in source
+    assert "pictureElement(image, item.srcset" in source
+    assert "image.dataset.src = imageUrl(item, revision)" in source
+
+
+@pytest.mark.performance
+def test_built_manifest_derivatives_exist(public_dir: Path):
+    """Every derivative the built manifest lists was published."""
+    manifest_file = public_dir / "face-dataset" / "manifest.json"
+    if not manifest_file.exists():
+        pytest.fail("Public directory not found. Run './build' first.")
+    manifest = json.loads(manifest_file.read_text(encoding="utf-8"))
+    missing = []
+    for atlas in manifest.get("atlases", {}).values():
+        if not (manifest_file.parent / atlas["image"]).is_file():
+            missing.append(atlas["image"])
+    for item in manifest["items"]:
+        paths = []
+        for srcset in item.get("srcset", {}).values():
+            paths += [entry.split()[0] for entry in srcset.split(", ")]
+        missing += [p for p in paths if not (manifest_file.parent / p).is_file()]
+    assert not missing, f"Derivatives missing from the built gallery: {missing}"
+
+
+def png(color: bytes) -> bytes:
+    """A 2x2 RGB PNG of one color."""
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        body = kind + data
+        return struct.pack(">I", len(data)) + body + struct.pack(">I", zlib.crc32(body))
+
+    rows = b"".join(b"\0" + color * 2 for _ in range(2))
+    return (b"\x89PNG\r\n\x1a\n"
+            + chunk(b"IHDR", struct.pack(">IIBBBBB", 2, 2, 8, 2, 0, 0, 0))
+            + chunk(b"IDAT", zlib.compress(rows))
+            + chunk(b"IEND", b""))
+
+
+class ETagHandler(http.server.SimpleHTTPRequestHandler):
+    """Static hosting stand-in: a content ETag on every file, and 304
+    for a matching If-None-Match."""
+
+    def send_head(self):
+        path = Path(self.translate_path(self.path))
+        if path.is_file():
+            etag = '"' + hashlib.sha256(path.read_bytes()).hexdigest()[:16] + '"'
+            if self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.end_headers()
+                return None
+            self.etag = etag
+        return super().send_head()
+
+    def end_headers(self):
+        if getattr(self, "etag", None):
+            self.send_header("ETag", self.etag)
+            self.etag = None
+        super().end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+class TestGeneratedManifest:
+    """gallery.py publishes per-image hashes, a revision the page can
+    poll with conditional requests, and one preview atlas per category."""
+
+    @pytest.fixture
+    def site(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("BUILD_CACHE_DIR", str(tmp_path / "cache"))
+        root = tmp_path / "face-dataset"
+        (root / "images").mkdir(parents=True)
+        for name, color in [("a", b"\xff\0\0"), ("b", b"\0\xff\0")]:
+            (root / "images" / f"{name}.png").write_bytes(png(color))
+        manifest = {"items": [
+            {"id": name, "status": "complete", "image": f"images/{name}.png",
+             "category": "pair"}
+            for name in "ab"
+        ]}
+        (root / "manifest.json").write_text(json.dumps(manifest), encoding="utf-8")
+        return root
+
+    def build(self, site: Path) -> tuple[str, dict]:
+        source = json.loads((site / "manifest.json").read_text(encoding="utf-8"))
+        for item in source["items"]:
+            for key in ("hash", "width", "height", "srcset"):
+                item.pop(key, None)
+        (site / "manifest.json").write_text(json.dumps(source), encoding="utf-8")
+        script = REPO_ROOT / "utilities" / "gallery.py"
+        subprocess.run([sys.executable, script, "--jobs", "1", site],
+                       check=True, capture_output=True)
+        revision = json.loads((site / "revision.json").read_text(encoding="utf-8"))
+        manifest = (site / "manifest.json").read_bytes()
+        assert revision["revision"] == hashlib.sha256(manifest).hexdigest()[:16]
+        return revision["revision"], {
+            item["id"]: item["hash"] for item in json.loads(manifest)["items"]
+        }
+
+    @pytest.fixture
+    def server(self, site):
+        handler = functools.partial(ETagHandler, directory=str(site))
+        httpd = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+        thread.start()
+        yield f"http://127.0.0.1:{httpd.server_port}"
+        httpd.shutdown()
+        httpd.server_close()
+
+    def get(self, url: str, etag: str | None = None):
+        request = urllib.request.Request(url)
+        if etag:
+            request.add_header("If-None-Match", etag)
+        try:
+            with urllib.request.urlopen(request) as response:
+                return response.status, response.headers.get("ETag"), response.read()
+        except urllib.error.HTTPError as error:
+            return error.code, error.headers.get("ETag"), b""
+
+    def test_image_hashes_follow_content(self, site):
+        revision, hashes = self.build(site)
+        assert hashes["a"] == hashlib.sha256(png(b"\xff\0\0")).hexdigest()[:16]
+
+        assert self.build(site) == (revision, hashes)
+
+        (site / "images" / "b.png").write_bytes(png(b"\0\0\xff"))
+        changed, new_hashes = self.build(site)
+        assert changed != revision
+        assert new_hashes["a"] == hashes["a"]
+        assert new_hashes["b"] != hashes["b"]
+
+    def test_revision_polls_are_conditional(self, site, server):
+        revision, _ = self.build(site)
+        status, etag, body = self.get(f"{server}/revision.json")
+        assert status == 200 and etag
+        assert json.loads(body)["revision"] == revision
+
+        assert self.get(f"{server}/revision.json", etag)[0] == 304
+
+        (site / "images" / "a.png").write_bytes(png(b"\0\0\xff"))
+        changed, _ = self.build(site)
+        status, _, body = self.get(f"{server}/revision.json", etag)
+        assert status == 200
+        assert json.loads(body)["revision"] == changed
+        status, _, body = self.get(f"{server}/manifest.json?v={changed}")
+        assert status == 200
+        assert hashlib.sha256(body).hexdigest()[:16] == changed
+
+    def test_category_previews_share_one_atlas(self, site):
+        Image = pytest.importorskip("PIL.Image")
+        self.build(site)
+        manifest = json.loads((site / "manifest.json").read_text(encoding="utf-8"))
+        atlas = manifest["atlases"]["pair"]
+
+        assert atlas["tiles"] == {"a": [0, 0, 240, 180], "b": [240, 0, 240, 180]}
+        with Image.open(site / atlas["image"]) as image:
+            assert image.size == (atlas["width"], atlas["height"])
+            for x, color in [(120, (255, 0, 0)), (360, (0, 255, 0))]:
+                pixel = image.convert("RGB").getpixel((x, 90))
+                assert all(abs(p - c) < 16 for p, c in zip(pixel, color))
+
+    def test_builds_without_webp(self, site):
+        """A Pillow without WebP (or AVIF) still publishes the gallery:
+        cards keep the PNG alone and atlases fall back to JPEG."""
+        Image = pytest.importorskip("PIL.Image")
+        script = (
+            "import sys\n"
+            f"sys.path.insert(0, {str(REPO_ROOT / 'utilities')!r})\n"
+            "from PIL import features\n"
+            "check = features.check\n"
+            "features.check = lambda name: name not in ('webp', 'avif') and check(name)\n"
+            "import gallery\n"
+            f"sys.argv = ['gallery.py', '--jobs', '1', {str(site)!r}]\n"
+            "sys.exit(gallery.main())\n"
+        )
+        result = subprocess.run([sys.executable, "-c", script],
+                                capture_output=True, text=True)
+        assert result.returncode == 0, result.stderr
+        manifest = json.loads((site / "manifest.json").read_text(encoding="utf-8"))
+
+        assert all(item["srcset"] == {} for item in manifest["items"])
+        atlas = manifest["atlases"]["pair"]["image"]
+        assert atlas.endswith(".jpg")
+        with Image.open(site / atlas) as image:
+            assert image.format == "JPEG"
+
+    def test_gallery_polls_revision_before_manifest(self):
+        source = GALLERY_HTML.read_text(encoding="utf-8")
+
+        assert "fetch('revision.json', { cache: 'no-cache' })" in source
+        assert "manifest.json?v=${encodeURIComponent(published)}" in source
+        assert "Date.now()" not in source
+        assert "'no-store'" not in source
+        assert "item.hash || revision" in source
+
+    def test_summaries_render_from_atlas(self):
+        source = GALLERY_HTML.read_text(encoding="utf-8")
+
+        assert "atlasTile(atlas, atlas.tiles[item.id])" in source
+        assert "buildCategories(data.items, revision, data.atlases)" in source
+
+
+# A DOM and IntersectionObserver just large enough for the page's
+# windowing code; the test reports intersections itself.
+WINDOWING_HARNESS = """
+let root;
+class Element {
+  constructor(tag) {
+    Object.assign(this, { tag, children: [], parent: null, dataset: {}, style: {},
+                          attributes: {}, className: '' });
+  }
+  get classList() { return { contains: name => this.className.split(' ').includes(name) }; }
+  get isConnected() { let e = this; while (e.parent) e = e.parent; return e === root; }
+  append(...nodes) { for (const node of nodes) { node.parent = this; this.children.push(node); } }
+  replaceWith(node) {
+    this.parent.children[this.parent.children.indexOf(this)] = node;
+    node.parent = this.parent;
+    this.parent = null;
+  }
+  setAttribute(name, value) { this.attributes[name] = value; }
+  querySelector() { return null; }
+}
+const observers = [];
+class IntersectionObserver {
+  constructor(callback, options) {
+    Object.assign(this, { callback, options, targets: new Set() });
+    observers.push(this);
+  }
+  observe(target) { this.targets.add(target); }
+  unobserve(target) { this.targets.delete(target); }
+  disconnect() { this.targets.clear(); }
+  report(visible, height = 300) {
+    this.callback([...this.targets].map(target => ({
+      target, isIntersecting: visible(target), boundingClientRect: { height },
+    })));
+  }
+}
+const window = {};
+const document = { createElement: tag => new Element(tag) };
+function buildCard(item) {
+  const card = new Element('article');
+  card.className = 'card';
+  return card;
+}
+"""
+
+WINDOWING_SCENARIO = """
+(async () => {
+  root = new Element('main');
+  const cards = new Element('div');
+  const end = new Element('div');
+  root.append(cards, end);
+  const items = Array.from({ length: 300 }, (_, i) => ({ id: i }));
+  renderCards(cards, end, items, 'revision');
+  const [chunks, window] = observers.sort(
+    (a, b) => a.options.rootMargin.localeCompare(b.options.rootMargin));
+  const state = () => cards.children.map(child => [
+    child.className, Number(child.dataset.index), child.style.height || null]);
+  const steps = { first: state() };
+
+  // scroll to the bottom: chunks are built while the end is near
+  chunks.report(() => true);
+  while (cards.children.length < items.length) {
+    await new Promise(resolve => setTimeout(resolve, 5));
+  }
+  window.report(card => Number(card.dataset.index) >= 280);
+  steps.bottom = state();
+  // back to the top
+  window.report(card => Number(card.dataset.index) < 10);
+  steps.top = state();
+  // the category is closed: its cards measure 0 and stay
+  window.report(() => false, 0);
+  steps.closed = state();
+  console.log(JSON.stringify(steps));
+})();
+"""
+
+
+def test_open_categories_window_their_cards(tmp_path):
+    """Opening a category builds its cards in chunks near the viewport;
+    cards scrolled far away are replaced by placeholders of their height
+    and built again when they come back."""
+    if shutil.which("node") is None:
+        pytest.skip("Node.js not available")
+    source = GALLERY_HTML.read_text(encoding="utf-8")
+    start = source.index("    // An open category builds its cards in chunks")
+    windowing = source[start:source.index("    function buildCategory(")]
+    script = tmp_path / "windowing.js"
+    script.write_text(WINDOWING_HARNESS + windowing + WINDOWING_SCENARIO)
+
+    result = subprocess.run(["node", script], capture_output=True, text=True, timeout=30)
+    assert result.returncode == 0, result.stderr
+    steps = json.loads(result.stdout)
+
+    def cards(step):
+        return [index for kind, index, _ in steps[step] if kind == "card"]
+
+    assert cards("first") == list(range(12))
+    for step in ("bottom", "top", "closed"):
+        assert [index for _, index, _ in steps[step]] == list(range(300))
+    assert cards("bottom") == list(range(280, 300))
+    assert all(
+        height == "300px"
+        for kind, _, height in steps["bottom"] if kind == "card-placeholder"
+    )
+    assert cards("top") == list(range(10))
+    assert cards("closed") == cards("top")
+
+
+def test_card_images_decode_a_few_at_a_time():
+    """Card images decode a few at a time, in the order cards are built."""
+    source = GALLERY_HTML.read_text(encoding="utf-8")
+
+    assert "requestIdleCallback(" in source
+    assert "decoding < DECODE_BUDGET" in source
+    assert "items.map(item => buildCard(item, revision))" not in source
@@ -9,35 +9,26 @@ import pytest
 class TestHTMLStructure:
     """Tests for basic HTML structure requirements."""
 
-    def test_all_pages_have_doctype(self, html_files):
+    def test_all_pages_have_doctype(self, page_batch, corpus):
         """Verify that all HTML pages have a DOCTYPE declaration."""
-        from bs4 import BeautifulSoup
-
         missing_doctype = []
 
-        for html_file in html_files:
-            with open(html_file, "r", encoding="utf-8") as f:
-                content = f.read()
-                soup = BeautifulSoup(content, "lxml")
-
-                # Check if the file starts with DOCTYPE
-                if not content.strip().upper().startswith("<!DOCTYPE"):
-                    missing_doctype.append(html_file.relative_to(html_file.parent.parent))
+        for html_file in page_batch:
+            # Only whitespace may precede the DOCTYPE
+            if not corpus.head(html_file).doctype:
+                missing_doctype.append(html_file.relative_to(html_file.parent.parent))
 
         assert not missing_doctype, (
             f"The following pages are missing DOCTYPE:\n"
             f"{chr(10).join(str(p) for p in missing_doctype)}"
         )
 
-    def test_all_pages_have_html_tag(self, html_files):
+    def test_all_pages_have_html_tag(self, page_batch, corpus):
         """Verify that all HTML pages have an <html> tag."""
-        from bs4 import BeautifulSoup
-
         missing_html_tag = []
 
-        for html_file in html_files:
-            soup = BeautifulSoup(html_file.read_text(encoding="utf-8"), "lxml")
-            if not soup.html:
+        for html_file in page_batch:
+            if not corpus.head(html_file).has_html:
                 missing_html_tag.append(html_file.relative_to(html_file.parent.parent))
 
         assert not missing_html_tag, (
@@ -45,15 +36,12 @@ class TestHTMLStructure:
             f"{chr(10).join(str(p) for p in missing_html_tag)}"
         )
 
-    def test_all_pages_have_head_tag(self, html_files):
+    def test_all_pages_have_head_tag(self, page_batch, corpus):
         """Verify that all HTML pages have a <head> tag."""
-        from bs4 import BeautifulSoup
-
         missing_head_tag = []
 
-        for html_file in html_files:
-            soup = BeautifulSoup(html_file.read_text(encoding="utf-8"), "lxml")
-            if not soup.head:
+        for html_file in page_batch:
+            if not corpus.head(html_file).has_head:
                 missing_head_tag.append(html_file.relative_to(html_file.parent.parent))
 
         assert not missing_head_tag, (
@@ -61,14 +49,12 @@ class TestHTMLStructure:
             f"{chr(10).join(str(p) for p in missing_head_tag)}"
         )
 
-    def test_all_pages_have_body_tag(self, html_files):
+    def test_all_pages_have_body_tag(self, page_batch, corpus):
         """Verify that all HTML pages have a <body> tag."""
-        from bs4 import BeautifulSoup
-
         missing_body_tag = []
 
-        for html_file in html_files:
-            soup = BeautifulSoup(html_file.read_text(encoding="utf-8"), "lxml")
+        for html_file in page_batch:
+            soup = corpus.page(html_file).soup
             if not soup.body:
                 missing_body_tag.append(html_file.relative_to(html_file.parent.parent))
 
@@ -77,15 +63,12 @@ class TestHTMLStructure:
             f"{chr(10).join(str(p) for p in missing_body_tag)}"
         )
 
-    def test_all_pages_have_title_tag(self, html_files):
+    def test_all_pages_have_title_tag(self, page_batch, corpus):
         """Verify that all HTML pages have a <title> tag."""
-        from bs4 import BeautifulSoup
-
         missing_title_tag = []
 
-        for html_file in html_files:
-            soup = BeautifulSoup(html_file.read_text(encoding="utf-8"), "lxml")
-            if not soup.title or not soup.title.string:
+        for html_file in page_batch:
+            if not corpus.head(html_file).title:
                 missing_title_tag.append(html_file.relative_to(html_file.parent.parent))
 
         assert not missing_title_tag, (
@@ -93,15 +76,13 @@ class TestHTMLStructure:
             f"{chr(10).join(str(p) for p in missing_title_tag)}"
         )
 
-    def test_all_pages_have_lang_attribute(self, html_files):
+    def test_all_pages_have_lang_attribute(self, page_batch, corpus):
         """Verify that all HTML pages have a lang attribute on the <html> tag."""
-        from bs4 import BeautifulSoup
-
         missing_lang_attr = []
 
-        for html_file in html_files:
-            soup = BeautifulSoup(html_file.read_text(encoding="utf-8"), "lxml")
-            if soup.html and not soup.html.get("lang"):
+        for html_file in page_batch:
+            head = corpus.head(html_file)
+            if head.has_html and not head.lang:
                 missing_lang_attr.append(html_file.relative_to(html_file.parent.parent))
 
         assert not missing_lang_attr, (
@@ -109,22 +90,72 @@ class TestHTMLStructure:
             f"{chr(10).join(str(p) for p in missing_lang_attr)}"
         )
 
-    def test_all_pages_have_charset_declaration(self, html_files):
+    def test_all_pages_have_charset_declaration(self, page_batch, corpus):
         """Verify that all HTML pages have a charset declaration."""
-        from bs4 import BeautifulSoup
-
         missing_charset = []
 
-        for html_file in html_files:
-            soup = BeautifulSoup(html_file.read_text(encoding="utf-8"), "lxml")
-            charset_meta = soup.find("meta", {"charset": True}) or soup.find(
-                "meta", {"http-equiv": "Content-Type"}
-            )
-
-            if not charset_meta:
+        for html_file in page_batch:
+            if corpus.head(html_file).charset is None:
                 missing_charset.append(html_file.relative_to(html_file.parent.parent))
 
         assert not missing_charset, (
             f"The following pages are missing charset declaration:\n"
             f"{chr(10).join(str(p) for p in missing_charset)}"
         )
+
+
+@pytest.mark.html5
+class TestHeadParser:
+    """Tests for the head-only parse the checks above rely on."""
+
+    def test_head_is_read_without_the_body(self, tmp_path, corpus):
+        """Verify the head record is complete and the body is never read."""
+        page = tmp_path / "page.html"
+        head = (
+            '<!DOCTYPE html>\n<html lang="en"><head>\n'
+            '<meta charset="utf-8">\n'
+            '<meta name="description" content="First">\n'
+            '<meta name="description" content="Second">\n'
+            '<meta property="og:type" content="article">\n'
+            '<link rel="preload canonical" href="https://example.com/page/">\n'
+            "<script>document.title = '</head>';</script>\n"
+            "<title>A &amp; B</title>\n"
+            "</head>\n"
+        )
+        # Bytes that are not UTF-8, well past the first read.
+        page.write_bytes(head.encode() + b"<body>" + b"x" * 100_000 + b"\xff</body>")
+
+        record = corpus.head(page)
+
+        assert record.doctype == "DOCTYPE html"
+        assert record.has_html and record.has_head
+        assert record.lang == "en"
+        assert record.title == "A & B"
+        assert record.charset == "utf-8"
+        assert record.meta == {"description": "First", "og:type": "article"}
+        assert record.canonical == "https://example.com/page/"
+
+    def test_omitted_html_and_head_tags_are_implied(self, tmp_path, corpus):
+        """Verify a page may omit the optional <html> and <head> tags."""
+        page = tmp_path / "page.html"
+        page.write_text(
+            '<!DOCTYPE html>\n<meta charset="utf-8">\n<title>Short</title>\n'
+            "<p>Body</p>\n"
+        )
+
+        record = corpus.head(page)
+
+        assert record.has_html and record.has_head
+        assert record.lang is None
+        assert record.title == "Short"
+        assert record.charset == "utf-8"
+
+    def test_body_content_does_not_imply_a_head(self, tmp_path, corpus):
+        """Verify a page starting with its body has no head."""
+        page = tmp_path / "page.html"
+        page.write_text("<!DOCTYPE html>\n<p>Body</p>\n<title>Late</title>\n")
+
+        record = corpus.head(page)
+
+        assert record.has_html and not record.has_head
+        assert record.title is None
@@ -4,6 +4,8 @@ htmltest is configured for internal links and HTML structure only
 (CheckExternal: false in .htmltest.yml), so it is fast, offline, and
 runs in the default suite. External links are checked separately by
 lychee on a schedule (.github/workflows/external-links.yml).
+test_internal_links.py checks internal links and anchors in-process
+first, from the pages the suite has already parsed.
 """
 
 import subprocess
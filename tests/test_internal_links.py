@@ -0,0 +1,69 @@
+"""Check internal links, anchors and page assets in-process.
+
+conftest.LinkGraph indexes every same-site href, src and srcset entry
+and every id from the pages the suite has already parsed. These checks
+cost one walk over that corpus instead of another read of public/, so
+they scale with the site. They cover htmltest's CheckInternalLinks and
+CheckInternalHash with the same IgnoreDirs, as a fast first tier;
+test_htmltest.py remains the full validation.
+"""
+
+from pathlib import Path
+
+import pytest
+import yaml
+
+from conftest import is_static_file
+
+HTMLTEST_CONFIG = Path(__file__).parent.parent / ".htmltest.yml"
+
+
+def ignored_dirs() -> tuple[str, ...]:
+    """htmltest's IgnoreDirs, as path prefixes."""
+    config = yaml.safe_load(HTMLTEST_CONFIG.read_text(encoding="utf-8"))
+    return tuple(f"{d.strip('/')}/" for d in config.get("IgnoreDirs") or [])
+
+
+@pytest.mark.html5
+class TestInternalLinks:
+    """Tests for same-site references between pages and files."""
+
+    def test_internal_links_resolve(self, link_graph):
+        """Verify every internal href, src and srcset entry names a file."""
+        ignore = ignored_dirs()
+        broken = [
+            link for link in link_graph.broken_links()
+            if not link.page.startswith(ignore)
+        ]
+
+        assert not broken, (
+            f"The following pages link to files that don't exist:\n"
+            f"{chr(10).join(f'{l.page}: {l.url}' for l in broken)}"
+        )
+
+    def test_hash_links_have_targets(self, link_graph):
+        """Verify every #fragment names an id on the page it points to."""
+        ignore = ignored_dirs()
+        missing = [
+            link for link in link_graph.missing_hash_targets()
+            if not link.page.startswith(ignore)
+        ]
+
+        assert not missing, (
+            f"The following pages link to anchors that don't exist:\n"
+            f"{chr(10).join(f'{l.page}: {l.url}' for l in missing)}"
+        )
+
+    def test_no_orphaned_page_assets(self, link_graph, public_dir):
+        """Verify every file published with a page is referenced somewhere."""
+        ignore = ignored_dirs()
+        orphans = [
+            path for path in link_graph.orphaned_assets()
+            if not path.startswith(ignore)
+            and not is_static_file(public_dir / path, public_dir)
+        ]
+
+        assert not orphans, (
+            f"The following page resources are published but never referenced:\n"
+            f"{chr(10).join(orphans)}"
+        )
@@ -3,12 +3,17 @@
 The build reads latex/latex.manifest ("<doc.tex> [formats]", formats pdf
 and/or html, default pdf) and publishes each requested artifact under
 public/docs/. HTML documents carry the SHA-384 hash of their .tex source
-in a <meta name="texhash"> tag, link the shared LaTeXML stylesheets, and
-are listed in the sitemap so crawlers can find them even though site
-links intentionally point at the PDF versions.
+and every local file it reads in a <meta name="texhash"> tag, link the
+shared LaTeXML stylesheets, and are listed in the sitemap so crawlers
+can find them even though site links intentionally point at the PDF
+versions.
 """
 
 import hashlib
+import re
+import shutil
+import subprocess
+import sys
 import xml.etree.ElementTree as ET
 from pathlib import Path
 
@@ -17,6 +22,11 @@ import pytest
 from conftest import parse_html
 
 REPO_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(REPO_DIR / "utilities"))
+from latexdeps import document_graph, document_hash  # noqa: E402
+from latexml_postprocess import rewrite_bs4, rewrite_lxml  # noqa: E402
+from latexml_styles import shared_names  # noqa: E402
+
 MANIFEST = REPO_DIR / "latex" / "latex.manifest"
 KNOWN_FORMATS = {"pdf", "html"}
 
@@ -34,10 +44,6 @@ def manifest_entries() -> list[tuple[str, set[str]]]:
     return entries
 
 
-def sha384_of(path: Path) -> str:
-    return hashlib.sha384(path.read_bytes()).hexdigest()
-
-
 def html_documents() -> list[str]:
     return [doc for doc, formats in manifest_entries() if "html" in formats]
 
@@ -59,6 +65,148 @@ class TestManifest:
                 f"latex/{doc}.tex not found"
             )
 
+    def test_texhash_covers_local_inputs(self):
+        """The texhash covers files a document reads, not just its root
+        source, so editing an \\input file, a .bib database, or a LaTeXML
+        binding rebuilds the document."""
+        expected = {
+            "cv/cv-steve-hay": {"structure.tex", "mdwlist.sty.ltxml"},
+            "experience-prosopagnosia/experience-prosopagnosia": {
+                "experience-prosopagnosia.bib"
+            },
+        }
+        for doc, inputs in expected.items():
+            files = document_graph(REPO_DIR / "latex" / f"{doc}.tex")["files"]
+            assert inputs <= set(files), (
+                f"{doc}: texhash misses {inputs - set(files)}"
+            )
+
+
+LATEXML_SAMPLE = """<!DOCTYPE html><html lang="en">
+<head><meta http-equiv="content-type" content="text/html; charset=UTF-8">
+<title>Sample</title></head>
+<body><div class="ltx_page_main"><p class="ltx_p" style="font-size:173%;">A</p>
+<span style="width:2em; ">B</span><hr style="width:100%"></div>
+<footer class="ltx_page_footer">Generated by LaTeXML</footer></body></html>
+"""
+
+
+# Parser and serializer corner cases the lxml engine has to reproduce
+# exactly as BeautifulSoup does.
+ENGINE_SAMPLE = """\ufeff<!-- generator -->
+<!DOCTYPE html><html lang="en"><head>
+<meta http-equiv="content-type" content="text/html; charset=UTF-8">
+<meta charset="latin1"><title>A &amp; B</title></head>
+<body class=" ltx_page  x"><pre>  \n </pre><textarea> </textarea><p>   </p>
+<p title='say "hi"' data-x="it's" data-y="both ' and &quot;">q&lt;&gt;</p>
+<script>if (a < b && c) {}</script><br><img src="x.png" alt=""><!---->
+<a rel=" nofollow  ext " href="?a=1&amp;b=2">l</a><td headers="h1  h2">c</td>
+<p style="FONT-size:  173%">A</p><p style=" ; ">e</p><hr style="width:100%">
+<svg viewBox="0 0 1 1"><path d="M0"/></svg><input checked>
+<footer class="x ltx_page_footer"><span style="color:red">gone</span></footer>
+</body></html>
+
+"""
+
+
+@pytest.mark.content
+class TestPostprocess:
+    """latexml_postprocess.py must produce exactly the same bytes in
+    batch mode and with either engine: the CSP hash covers the <style>
+    element byte for byte."""
+
+    def test_batch_matches_single(self, tmp_path):
+        script = REPO_DIR / "utilities" / "latexml_postprocess.py"
+        single = tmp_path / "single.html"
+        single.write_text(LATEXML_SAMPLE, encoding="utf-8")
+        batch = [tmp_path / f"batch{i}.html" for i in range(3)]
+        for path in batch:
+            shutil.copy(single, path)
+
+        subprocess.run(
+            [sys.executable, script, single, "abc123", "7"], check=True
+        )
+        pairs = [arg for path in batch for arg in (path, "abc123")]
+        subprocess.run(
+            [sys.executable, script, "--pipeline", "7", "--jobs", "2", *pairs],
+            check=True,
+        )
+
+        expected = single.read_bytes()
+        assert b"ltxs-font-size-173" in expected
+        for path in batch:
+            assert path.read_bytes() == expected, f"{path.name} differs"
+
+    @pytest.mark.parametrize("sample", [LATEXML_SAMPLE, ENGINE_SAMPLE])
+    def test_engines_match(self, sample):
+        expected = rewrite_bs4(sample, "abc123", "7")
+        assert rewrite_lxml(sample, "abc123", "7") == expected
+
+
+@pytest.mark.content
+class TestSharedStyles:
+    """latexml_styles.py moves every document's converted styles into one
+    fingerprinted sheet whose class names don't depend on which
+    documents are built together."""
+
+    def run(self, *args):
+        script = REPO_DIR / "utilities" / "latexml_styles.py"
+        subprocess.run(
+            [sys.executable, script, *args], check=True, capture_output=True
+        )
+
+    def test_documents_link_one_sheet(self, tmp_path):
+        docs = []
+        for i, size in enumerate(["173%", "120%"]):
+            doc = tmp_path / f"doc{i}.html"
+            doc.write_text(
+                rewrite_bs4(LATEXML_SAMPLE.replace("173%", size), "abc123", "7"),
+                encoding="utf-8",
+            )
+            docs.append(doc)
+        out = tmp_path / "css"
+        self.run("--out", out, *docs)
+
+        (sheet,) = out.iterdir()
+        css = sheet.read_text(encoding="utf-8")
+        assert ".ltxs-font-size-173 { font-size:173%; }" in css
+        assert ".ltxs-font-size-120 { font-size:120%; }" in css
+        assert css.count(".ltxs-width-2em ") == 1
+        for doc in docs:
+            soup = parse_html(doc)
+            assert soup.find("style") is None
+            hrefs = [link["href"] for link in soup.find_all("link", rel="stylesheet")]
+            assert f"/css/latexml/{sheet.name}" in hrefs
+            csp = soup.find("meta", {"http-equiv": "Content-Security-Policy"})
+            assert "style-src 'self';" in csp["content"]
+            assert soup.find("meta", {"name": "latexml-pipeline"})["content"] == (
+                "7+shared"
+            )
+
+        # Rerunning on the rewritten documents, reading their rules back
+        # from the sheet, changes nothing.
+        before = [doc.read_bytes() for doc in docs]
+        self.run("--out", tmp_path / "again", "--sheets", out, *docs)
+        assert [doc.read_bytes() for doc in docs] == before
+        assert (tmp_path / "again" / sheet.name).read_bytes() == sheet.read_bytes()
+
+    def test_class_names_are_stable(self):
+        """A value's class doesn't depend on the other values: slug
+        collisions are settled by each value's spelling, not by which
+        values are built together or how they sort."""
+        values = {"width:2em", "width: 2em", "font-size:173%"}
+        names = shared_names(values)
+        assert names["font-size:173%"] == "ltxs-font-size-173"
+        assert names["width:2em"] == "ltxs-width-2em"
+        assert names["width: 2em"].startswith("ltxs-width-2em--")
+        # Colliding values that sort before every value above don't
+        # rename any of them.
+        colliding = {" width:2em", "WIDTH:2em", "font-size: 173%", "color:red"}
+        assert all(value < "font-size:173%" for value in colliding - {"color:red"})
+        more = shared_names(values | colliding)
+        assert {value: more[value] for value in values} == names
+        assert len(set(more.values())) == len(more)
+
 
 @pytest.mark.content
 class TestPublishedArtifacts:
@@ -90,13 +238,15 @@ class TestHtmlDocuments:
     """Tests for LaTeXML-generated HTML documents."""
 
     def test_texhash_matches_source(self, public_dir):
-        """The embedded texhash matches the current .tex source, so the
-        published HTML was generated from the committed source."""
+        """The embedded texhash matches the current .tex source and its
+        inputs, so the published HTML was generated from the committed
+        sources."""
         for doc in html_documents():
             soup = parse_html(public_dir / "docs" / f"{doc}.html")
             meta = soup.find("meta", {"name": "texhash"})
             assert meta, f"{doc}.html: missing texhash meta tag"
-            assert meta["content"] == sha384_of(REPO_DIR / "latex" / f"{doc}.tex"), (
+            source = REPO_DIR / "latex" / f"{doc}.tex"
+            assert meta["content"] == document_hash(source), (
                 f"{doc}.html: texhash does not match latex/{doc}.tex; "
                 "rebuild with ./build"
             )
@@ -110,9 +260,11 @@ class TestHtmlDocuments:
             assert icons, f"{doc}.html: missing favicon links"
             stylesheets = soup.find_all("link", rel="stylesheet")
             hrefs = [link["href"] for link in stylesheets]
-            assert "/css/latexml/LaTeXML.css" in hrefs, (
-                f"{doc}.html: missing shared LaTeXML stylesheet"
-            )
+            # the build fingerprints it: /css/latexml/LaTeXML.<hash>.css
+            assert any(
+                re.fullmatch(r"/css/latexml/LaTeXML(\.[0-9a-f]{16})?\.css", href)
+                for href in hrefs
+            ), f"{doc}.html: missing shared LaTeXML stylesheet"
             for href in hrefs + [icon["href"] for icon in icons]:
                 assert (public_dir / href.lstrip("/")).is_file(), (
                     f"{doc}.html: linked resource {href} not in built site"
@@ -3,28 +3,24 @@
 from pathlib import Path
 
 import pytest
-from bs4 import BeautifulSoup
 
-from conftest import is_static_file, parse_html
+from conftest import is_static_file
 
 
 @pytest.mark.meta
 class TestCanonicalURLs:
     """Tests for canonical URL meta tags."""
 
-    def test_all_pages_have_canonical_url(self, html_files, public_dir):
+    def test_all_pages_have_canonical_url(self, page_batch, public_dir, corpus):
         """Verify that all HTML pages have a canonical URL."""
         missing_canonical = []
 
-        for html_file in html_files:
+        for html_file in page_batch:
             # Skip static files (interactive demos/tools)
             if is_static_file(html_file, public_dir):
                 continue
 
-            soup = parse_html(html_file)
-            canonical = soup.find("link", {"rel": "canonical"})
-
-            if not canonical or not canonical.get("href"):
+            if not corpus.head(html_file).canonical:
                 missing_canonical.append(html_file.relative_to(html_file.parent.parent))
 
         assert not missing_canonical, (
@@ -32,16 +28,14 @@ class TestCanonicalURLs:
             f"{chr(10).join(str(p) for p in missing_canonical)}"
         )
 
-    def test_canonical_urls_are_absolute(self, html_files):
+    def test_canonical_urls_are_absolute(self, page_batch, corpus):
         """Verify that canonical URLs are absolute (not relative)."""
         invalid_canonical = []
 
-        for html_file in html_files:
-            soup = parse_html(html_file)
-            canonical = soup.find("link", {"rel": "canonical"})
+        for html_file in page_batch:
+            href = corpus.head(html_file).canonical
 
-            if canonical and canonical.get("href"):
-                href = canonical["href"]
+            if href:
                 if not href.startswith("http://") and not href.startswith("https://"):
                     invalid_canonical.append(
                         (html_file.relative_to(html_file.parent.parent), href)
@@ -57,7 +51,7 @@ class TestCanonicalURLs:
 class TestViewport:
     """Tests for the responsive viewport meta tag."""
 
-    def test_all_pages_have_complete_viewport(self, html_files, public_dir):
+    def test_all_pages_have_complete_viewport(self, page_batch, public_dir, corpus):
         """Verify pages declare width=device-width and initial-scale=1.
 
         Without initial-scale=1 some mobile browsers render the page
@@ -65,14 +59,12 @@ class TestViewport:
         """
         bad_viewport = []
 
-        for html_file in html_files:
+        for html_file in page_batch:
             # Skip static files (interactive demos/tools)
             if is_static_file(html_file, public_dir):
                 continue
 
-            soup = parse_html(html_file)
-            viewport = soup.find("meta", {"name": "viewport"})
-            content = viewport.get("content", "") if viewport else ""
+            content = corpus.head(html_file).meta.get("viewport", "")
 
             if "width=device-width" not in content or "initial-scale=1" not in content:
                 bad_viewport.append(
@@ -91,22 +83,17 @@ class TestOpenGraphTags:
 
     REQUIRED_OG_TAGS = ["og:title", "og:description", "og:type", "og:url"]
 
-    def test_all_pages_have_required_og_tags(self, html_files, public_dir):
+    def test_all_pages_have_required_og_tags(self, page_batch, public_dir, corpus):
         """Verify that all pages have required Open Graph tags."""
         pages_missing_tags = {}
 
-        for html_file in html_files:
+        for html_file in page_batch:
             # Skip static files (interactive demos/tools)
             if is_static_file(html_file, public_dir):
                 continue
 
-            soup = parse_html(html_file)
-            missing_tags = []
-
-            for tag in self.REQUIRED_OG_TAGS:
-                og_tag = soup.find("meta", {"property": tag})
-                if not og_tag or not og_tag.get("content"):
-                    missing_tags.append(tag)
+            meta = corpus.head(html_file).meta
+            missing_tags = [tag for tag in self.REQUIRED_OG_TAGS if not meta.get(tag)]
 
             if missing_tags:
                 pages_missing_tags[
@@ -118,17 +105,15 @@ class TestOpenGraphTags:
             f"{chr(10).join(f'{p}: {tags}' for p, tags in pages_missing_tags.items())}"
         )
 
-    def test_og_type_is_valid(self, html_files):
+    def test_og_type_is_valid(self, page_batch, corpus):
         """Verify that og:type values are valid."""
         valid_types = ["website", "article", "profile", "book", "video.movie", "video.episode"]
         invalid_types = []
 
-        for html_file in html_files:
-            soup = parse_html(html_file)
-            og_type = soup.find("meta", {"property": "og:type"})
+        for html_file in page_batch:
+            content = corpus.head(html_file).meta.get("og:type")
 
-            if og_type and og_type.get("content"):
-                content = og_type["content"]
+            if content:
                 if content not in valid_types:
                     invalid_types.append(
                         (html_file.relative_to(html_file.parent.parent), content)
@@ -146,22 +131,17 @@ class TestTwitterCardTags:
 
     REQUIRED_TWITTER_TAGS = ["twitter:card", "twitter:title", "twitter:description"]
 
-    def test_all_pages_have_required_twitter_tags(self, html_files, public_dir):
+    def test_all_pages_have_required_twitter_tags(self, page_batch, public_dir, corpus):
         """Verify that all pages have required Twitter Card tags."""
         pages_missing_tags = {}
 
-        for html_file in html_files:
+        for html_file in page_batch:
             # Skip static files (interactive demos/tools)
             if is_static_file(html_file, public_dir):
                 continue
 
-            soup = parse_html(html_file)
-            missing_tags = []
-
-            for tag in self.REQUIRED_TWITTER_TAGS:
-                twitter_tag = soup.find("meta", {"name": tag})
-                if not twitter_tag or not twitter_tag.get("content"):
-                    missing_tags.append(tag)
+            meta = corpus.head(html_file).meta
+            missing_tags = [tag for tag in self.REQUIRED_TWITTER_TAGS if not meta.get(tag)]
 
             if missing_tags:
                 pages_missing_tags[
@@ -173,17 +153,15 @@ class TestTwitterCardTags:
             f"{chr(10).join(f'{p}: {tags}' for p, tags in pages_missing_tags.items())}"
         )
 
-    def test_twitter_card_type_is_valid(self, html_files):
+    def test_twitter_card_type_is_valid(self, page_batch, corpus):
         """Verify that twitter:card values are valid."""
         valid_cards = ["summary", "summary_large_image", "app", "player"]
         invalid_cards = []
 
-        for html_file in html_files:
-            soup = parse_html(html_file)
-            twitter_card = soup.find("meta", {"name": "twitter:card"})
+        for html_file in page_batch:
+            content = corpus.head(html_file).meta.get("twitter:card")
 
-            if twitter_card and twitter_card.get("content"):
-                content = twitter_card["content"]
+            if content:
                 if content not in valid_cards:
                     invalid_cards.append(
                         (html_file.relative_to(html_file.parent.parent), content)
@@ -199,19 +177,16 @@ class TestTwitterCardTags:
 class TestDescriptionTags:
     """Tests for page description meta tags."""
 
-    def test_all_pages_have_description(self, html_files, public_dir):
+    def test_all_pages_have_description(self, page_batch, public_dir, corpus):
         """Verify that all pages have a meta description tag."""
         missing_description = []
 
-        for html_file in html_files:
+        for html_file in page_batch:
             # Skip static files (interactive demos/tools)
             if is_static_file(html_file, public_dir):
                 continue
 
-            soup = parse_html(html_file)
-            description = soup.find("meta", {"name": "description"})
-
-            if not description or not description.get("content"):
+            if not corpus.head(html_file).meta.get("description"):
                 missing_description.append(
                     html_file.relative_to(html_file.parent.parent)
                 )
@@ -221,17 +196,16 @@ class TestDescriptionTags:
             f"{chr(10).join(str(p) for p in missing_description)}"
         )
 
-    def test_descriptions_are_not_too_short(self, html_files):
+    def test_descriptions_are_not_too_short(self, page_batch, corpus):
         """Verify that meta descriptions are at least 50 characters."""
         short_descriptions = []
         min_length = 50
 
-        for html_file in html_files:
-            soup = parse_html(html_file)
-            description = soup.find("meta", {"name": "description"})
+        for html_file in page_batch:
+            description = corpus.head(html_file).meta.get("description")
 
-            if description and description.get("content"):
-                content = description["content"].strip()
+            if description:
+                content = description.strip()
                 if len(content) < min_length:
                     short_descriptions.append(
                         (html_file.relative_to(html_file.parent.parent), len(content))
@@ -242,17 +216,16 @@ class TestDescriptionTags:
             f"{chr(10).join(f'{p}: {length} chars' for p, length in short_descriptions)}"
         )
 
-    def test_descriptions_are_not_too_long(self, html_files):
+    def test_descriptions_are_not_too_long(self, page_batch, corpus):
         """Verify that meta descriptions are not longer than 160 characters."""
         long_descriptions = []
         max_length = 160
 
-        for html_file in html_files:
-            soup = parse_html(html_file)
-            description = soup.find("meta", {"name": "description"})
+        for html_file in page_batch:
+            description = corpus.head(html_file).meta.get("description")
 
-            if description and description.get("content"):
-                content = description["content"].strip()
+            if description:
+                content = description.strip()
                 if len(content) > max_length:
                     long_descriptions.append(
                         (html_file.relative_to(html_file.parent.parent), len(content))
@@ -268,10 +241,10 @@ class TestDescriptionTags:
 class TestContentSecurityPolicy:
     """Tests for production Content Security Policy metadata."""
 
-    def test_production_csp_does_not_allow_impeccable_live(self, public_dir):
+    def test_production_csp_does_not_allow_impeccable_live(self, public_dir, corpus):
         """Keep the localhost live-mode allowance out of production output."""
-        soup = parse_html(public_dir / "index.html")
-        csp = soup.find("meta", {"http-equiv": "Content-Security-Policy"})
+        csp = corpus.head(public_dir / "index.html").http_equiv.get(
+            "Content-Security-Policy"
+        )
 
-        assert csp
-        assert csp["content"] == "default-src 'self'; script-src 'self';"
+        assert csp == "default-src 'self'; script-src 'self';"
@@ -0,0 +1,86 @@
+"""Tests for the lossless PNG recompression in utilities/pngopt.py."""
+
+import os
+import struct
+import subprocess
+import sys
+import zlib
+from pathlib import Path
+
+import pytest
+
+REPO_DIR = Path(__file__).parent.parent
+
+
+def rgba_png(width: int, height: int, extra: bytes = b"") -> bytes:
+    """An opaque RGBA PNG of a few colors with a text chunk, stored at
+    zlib level 0: everything pngopt.py should remove. `extra` is added
+    as chunks ahead of the image data."""
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        body = kind + data
+        return struct.pack(">I", len(data)) + body + struct.pack(">I", zlib.crc32(body))
+
+    colors = [b"\x10\x20\x30\xff", b"\xf0\xe0\xd0\xff", b"\x80\x80\x80\xff"]
+    rows = b"".join(
+        b"\0" + b"".join(colors[(x // 4 + y // 4) % 3] for x in range(width))
+        for y in range(height)
+    )
+    return (b"\x89PNG\r\n\x1a\n"
+            + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0))
+            + chunk(b"tEXt", b"Software\0synthetic")
+            + extra
+            + chunk(b"IDAT", zlib.compress(rows, 0))
+            + chunk(b"IEND", b""))
+
+
+def test_recompression_is_lossless_and_cached(tmp_path):
+    Image = pytest.importorskip("PIL.Image")
+    images = tmp_path / "images"
+    images.mkdir()
+    original = rgba_png(64, 48)
+    (images / "a.png").write_bytes(original)
+    (images / "b.png").write_bytes(original)
+    env = {**os.environ, "BUILD_CACHE_DIR": str(tmp_path / "cache")}
+    script = REPO_DIR / "utilities" / "pngopt.py"
+
+    def run() -> str:
+        return subprocess.run(
+            [sys.executable, script, "--jobs", "1", images],
+            check=True, capture_output=True, text=True, env=env,
+        ).stdout
+
+    output = run()
+    optimized = (images / "a.png").read_bytes()
+    assert len(optimized) < len(original)
+    assert (images / "b.png").read_bytes() == optimized
+    assert b"tEXt" not in optimized
+    (tmp_path / "original.png").write_bytes(original)
+    with Image.open(images / "a.png") as after, \
+            Image.open(tmp_path / "original.png") as before:
+        assert after.mode in ("P", "RGB")
+        assert after.convert("RGBA").tobytes() == before.convert("RGBA").tobytes()
+    assert "(1 optimized" in output
+
+    (images / "a.png").write_bytes(original)
+    assert "(0 optimized" in run()
+    assert (images / "a.png").read_bytes() == optimized
+
+
+def test_chromaticities_are_kept(tmp_path):
+    """A cHRM chunk changes how some decoders render the image, so a file
+    carrying one is only recompressed in ways that keep it."""
+    pytest.importorskip("PIL.Image")
+    # the sRGB white point and primaries, scaled by 100000
+    values = (31270, 32900, 64000, 33000, 30000, 60000, 15000, 6000)
+    data = struct.pack(">8I", *values)
+    body = b"cHRM" + data
+    chrm = struct.pack(">I", len(data)) + body + struct.pack(">I", zlib.crc32(body))
+    images = tmp_path / "images"
+    images.mkdir()
+    (images / "a.png").write_bytes(rgba_png(64, 48, chrm))
+    env = {**os.environ, "BUILD_CACHE_DIR": str(tmp_path / "cache")}
+    subprocess.run(
+        [sys.executable, REPO_DIR / "utilities" / "pngopt.py", "--jobs", "1", images],
+        check=True, capture_output=True, env=env,
+    )
+    assert chrm in (images / "a.png").read_bytes()
@@ -0,0 +1,33 @@
+"""Tests for precompressed siblings written by ./build --precompress."""
+
+import gzip
+from pathlib import Path
+
+import pytest
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+@pytest.mark.performance
+def test_precompressed_siblings_match_their_originals(public_dir: Path):
+    """A host serving file.gz or file.br in place of file must send the
+    same bytes, so a sibling left over from an earlier build is a bug."""
+    if not public_dir.exists():
+        pytest.fail("Public directory not found. Run './build' first.")
+    stale = []
+    for sibling in sorted(public_dir.rglob("*.gz")) + sorted(public_dir.rglob("*.br")):
+        if ".git" in sibling.relative_to(public_dir).parts:
+            continue
+        original = sibling.with_suffix("")
+        if sibling.suffix == ".br":
+            if brotli is None:
+                continue
+            data = brotli.decompress(sibling.read_bytes())
+        else:
+            data = gzip.decompress(sibling.read_bytes())
+        if not original.is_file() or data != original.read_bytes():
+            stale.append(str(sibling.relative_to(public_dir)))
+    assert not stale, f"Precompressed siblings out of date: {stale}"
@@ -0,0 +1,135 @@
+"""Tests for utilities/prettify.py, run against a scratch site with a
+stand-in prettier on PATH."""
+
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+REPO_DIR = Path(__file__).parent.parent
+SCRIPT = REPO_DIR / "utilities" / "prettify.py"
+
+# Upper-cases each file it is asked to write, which like prettier is
+# idempotent, and logs the files of every --write run.
+FAKE_PRETTIER = f"""#!{sys.executable}
+import json, os, sys
+args = sys.argv[1:]
+if args == ["--version"]:
+    print("3.0.0")
+elif args == ["--support-info"]:
+    print(json.dumps({{"languages": [
+        {{"extensions": [".html"]}},
+        {{"extensions": [".css"], "filenames": ["styles"]}},
+    ]}}))
+else:
+    files = args[args.index("--") + 1:]
+    with open(os.environ["PRETTIER_LOG"], "a") as log:
+        log.write(json.dumps(files) + "\\n")
+    for name in files:
+        with open(name) as f:
+            text = f.read()
+        with open(name, "w") as f:
+            f.write(text.upper())
+"""
+
+PAGES = {
+    "site/index.html": "<p>home</p>\n",
+    "site/about/index.html": "<p>about</p>\n",
+    "site/css/main.css": "p { color: red }\n",
+    "site/css/styles": "body {}\n",
+    "site/img/photo.jpg": "not for prettier\n",
+}
+
+
+@pytest.fixture
+def site(tmp_path):
+    """A scratch site, its prettier config, and the stand-in prettier."""
+    for rel, text in PAGES.items():
+        (tmp_path / rel).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / rel).write_text(text)
+    (tmp_path / ".prettierrc").write_text("{}\n")
+    (tmp_path / ".prettierignore").write_text("site/docs/\n")
+    fake = tmp_path / "bin" / "prettier"
+    fake.parent.mkdir()
+    fake.write_text(FAKE_PRETTIER)
+    fake.chmod(0o755)
+    return tmp_path
+
+
+def prettify(site: Path, *args: str) -> list[list[str]]:
+    """Run prettify.py over site/ and return the files of each prettier run."""
+    log = site / "prettier.log"
+    log.unlink(missing_ok=True)
+    env = {
+        **os.environ,
+        "BUILD_CACHE_DIR": str(site / "cache"),
+        "PATH": f"{site / 'bin'}{os.pathsep}{os.environ['PATH']}",
+        "PRETTIER_LOG": str(log),
+    }
+    subprocess.run(
+        [sys.executable, SCRIPT, *args, "site"],
+        cwd=site, env=env, check=True, capture_output=True, text=True,
+    )
+    if not log.exists():
+        return []
+    return [json.loads(line) for line in log.read_text().splitlines()]
+
+
+def formatted(site: Path) -> list[str]:
+    return sorted(
+        rel for rel, text in PAGES.items()
+        if (site / rel).read_text() == text.upper() != text
+    )
+
+
+class TestPrettify:
+    """Tests for formatting only what changed since the last build."""
+
+    def test_first_run_shards_every_file(self, site):
+        """Verify files prettier supports are split across the jobs."""
+        runs = prettify(site, "--jobs", "2")
+
+        assert len(runs) == 2
+        assert sorted(sum(runs, [])) == [
+            "site/about/index.html", "site/css/main.css",
+            "site/css/styles", "site/index.html",
+        ]
+        assert formatted(site) == sorted(sum(runs, []))
+
+    def test_unchanged_files_are_left_alone(self, site):
+        """Verify a second run over formatted files runs no prettier."""
+        prettify(site)
+
+        assert prettify(site) == []
+        assert len(formatted(site)) == 4
+
+    def test_regenerated_files_are_restored(self, site):
+        """Verify a file regenerated with its old raw input is restored
+        from the store rather than formatted again."""
+        prettify(site)
+        (site / "site/index.html").write_text(PAGES["site/index.html"])
+
+        assert prettify(site) == []
+        assert "site/index.html" in formatted(site)
+
+    def test_changed_file_alone_is_formatted(self, site):
+        """Verify a file with new content is the only one formatted."""
+        prettify(site)
+        (site / "site/index.html").write_text("<p>new home</p>\n")
+
+        assert prettify(site) == [["site/index.html"]]
+        assert (site / "site/index.html").read_text() == "<P>NEW HOME</P>\n"
+
+    @pytest.mark.parametrize("config", [".prettierrc", ".prettierignore"])
+    def test_config_change_formats_everything(self, site, config):
+        """Verify a changed prettier config or ignore file discards the index."""
+        prettify(site)
+        for rel, text in PAGES.items():
+            (site / rel).write_text(text)
+        with (site / config).open("a") as f:
+            f.write("\n")
+
+        assert len(sum(prettify(site), [])) == 4
@@ -6,11 +6,11 @@ from conftest import is_static_file, parse_html
 
 
 @pytest.mark.performance
-def test_content_images_have_responsive_sources(html_files, public_dir):
+def test_content_images_have_responsive_sources(page_batch, public_dir):
     """Every authored content image offers build-time generated WebP sizes."""
     images_without_sources = []
 
-    for html_file in html_files:
+    for html_file in page_batch:
         if is_static_file(html_file, public_dir):
             continue
 
@@ -29,11 +29,11 @@ def test_content_images_have_responsive_sources(html_files, public_dir):
 
 
 @pytest.mark.performance
-def test_content_images_retain_non_webp_fallback(html_files, public_dir):
+def test_content_images_retain_non_webp_fallback(page_batch, public_dir):
     """Responsive WebP sources keep a broadly compatible browser fallback."""
     missing_fallbacks = []
 
-    for html_file in html_files:
+    for html_file in page_batch:
         if is_static_file(html_file, public_dir):
             continue
 
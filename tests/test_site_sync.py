@@ -0,0 +1,91 @@
+"""Tests for utilities/sitesync.py, run against a scratch site and a
+git checkout standing in for public/."""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+REPO_DIR = Path(__file__).parent.parent
+SCRIPT = REPO_DIR / "utilities" / "sitesync.py"
+
+
+def write(root: Path, files: dict[str, str]) -> None:
+    for rel, text in files.items():
+        path = root / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text)
+
+
+@pytest.fixture
+def pair(tmp_path):
+    """A built site and a publish checkout synced from an earlier build."""
+    site, public = tmp_path / "site", tmp_path / "public"
+    subprocess.run(["git", "init", "-q", str(public)], check=True)
+    write(public, {
+        ".gitignore": "*.log\nlocal/\n",
+        "index.html": "home",
+        "about/index.html": "about, old",
+        "old/index.html": "removed page",
+        "docs/cv.pdf": "published pdf",
+        "deploy.log": "written by the host",
+        "local/notes.txt": "kept out of git",
+    })
+    write(site, {
+        "index.html": "home",
+        "about/index.html": "about, new",
+        "new/index.html": "added page",
+    })
+    return site, public
+
+
+def sync(site: Path, public: Path, *args: str) -> str:
+    env = {**os.environ, "BUILD_CACHE_DIR": str(site.parent / "cache")}
+    return subprocess.run(
+        [sys.executable, SCRIPT, *args, site, public],
+        check=True, capture_output=True, text=True, env=env,
+    ).stdout
+
+
+class TestSiteSync:
+    """Tests for bringing public/ in line with the built site."""
+
+    def test_writes_only_changed_files(self, pair):
+        """Verify only files whose bytes differ are written."""
+        site, public = pair
+        unchanged = public / "index.html"
+        os.utime(unchanged, ns=(1, 1))
+
+        output = sync(site, public, "--keep", "docs/cv.pdf")
+
+        assert "2 written" in output and "1 unchanged" in output
+        assert unchanged.stat().st_mtime_ns == 1
+        assert (public / "about" / "index.html").read_text() == "about, new"
+        assert (public / "new" / "index.html").read_text() == "added page"
+
+    def test_deletes_vanished_files(self, pair):
+        """Verify files gone from the site are deleted, but not --keep paths."""
+        site, public = pair
+        sync(site, public, "--keep", "docs/cv.pdf")
+
+        assert not (public / "old").exists()
+        assert (public / "docs" / "cv.pdf").read_text() == "published pdf"
+
+    def test_deletes_unkept_artifacts(self, pair):
+        """Verify published artifacts not kept are deleted like any file."""
+        site, public = pair
+        sync(site, public)
+
+        assert not (public / "docs").exists()
+
+    def test_leaves_ignored_files(self, pair):
+        """Verify files public/'s .gitignore covers are never deleted."""
+        site, public = pair
+        sync(site, public)
+
+        assert (public / "deploy.log").read_text() == "written by the host"
+        assert (public / "local" / "notes.txt").read_text() == "kept out of git"
+        assert (public / ".gitignore").exists()
+        assert (public / ".git").is_dir()
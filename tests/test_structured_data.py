@@ -1,41 +1,20 @@
 """Tests for JSON-LD structured data validation."""
 
-import json
 from pathlib import Path
 
 import pytest
-from bs4 import BeautifulSoup
-
-from conftest import parse_html
-
-
-def extract_json_ld(soup: BeautifulSoup) -> list[dict]:
-    """Extract all JSON-LD structured data from a page."""
-    json_ld_scripts = soup.find_all("script", {"type": "application/ld+json"})
-    json_ld_data = []
-
-    for script in json_ld_scripts:
-        try:
-            data = json.loads(script.string)
-            json_ld_data.append(data)
-        except json.JSONDecodeError as e:
-            # We'll catch invalid JSON in a separate test
-            json_ld_data.append({"_error": str(e), "_content": script.string})
-
-    return json_ld_data
 
 
 @pytest.mark.structured_data
 class TestJSONLDPresence:
     """Tests for JSON-LD structured data presence."""
 
-    def test_homepage_has_website_schema(self, public_dir):
+    def test_homepage_has_website_schema(self, public_dir, corpus):
         """Verify that the homepage has WebSite schema."""
         index_file = public_dir / "index.html"
         assert index_file.exists(), "Homepage (index.html) not found"
 
-        soup = parse_html(index_file)
-        json_ld_data = extract_json_ld(soup)
+        json_ld_data = corpus.page(index_file).json_ld
 
         website_schemas = [
             data for data in json_ld_data if data.get("@type") == "WebSite"
@@ -44,7 +23,7 @@ class TestJSONLDPresence:
         assert website_schemas, "Homepage is missing WebSite schema"
         assert len(website_schemas) == 1, "Homepage should have exactly one WebSite schema"
 
-    def test_blog_posts_have_article_schema(self, public_dir):
+    def test_blog_posts_have_article_schema(self, public_dir, corpus):
         """Verify that blog posts have Article schema."""
         # Look for blog posts in writing/ directory
         writing_dir = public_dir / "writing"
@@ -64,8 +43,7 @@ class TestJSONLDPresence:
         missing_article_schema = []
 
         for post in blog_posts:
-            soup = parse_html(post)
-            json_ld_data = extract_json_ld(soup)
+            json_ld_data = corpus.page(post).json_ld
 
             article_schemas = [
                 data for data in json_ld_data if data.get("@type") == "Article"
@@ -84,20 +62,15 @@ class TestJSONLDPresence:
 class TestJSONLDValidity:
     """Tests for JSON-LD structured data validity."""
 
-    def test_all_json_ld_is_valid_json(self, html_files):
+    def test_all_json_ld_is_valid_json(self, page_batch, corpus):
         """Verify that all JSON-LD blocks contain valid JSON."""
         invalid_json = []
 
-        for html_file in html_files:
-            soup = parse_html(html_file)
-            json_ld_scripts = soup.find_all("script", {"type": "application/ld+json"})
-
-            for script in json_ld_scripts:
-                try:
-                    json.loads(script.string)
-                except json.JSONDecodeError as e:
+        for html_file in page_batch:
+            for data in corpus.page(html_file).json_ld:
+                if "_error" in data:
                     invalid_json.append(
-                        (html_file.relative_to(html_file.parent.parent), str(e))
+                        (html_file.relative_to(html_file.parent.parent), data["_error"])
                     )
 
         assert not invalid_json, (
@@ -105,13 +78,12 @@ class TestJSONLDValidity:
             f"{chr(10).join(f'{p}: {err}' for p, err in invalid_json)}"
         )
 
-    def test_all_json_ld_has_context(self, html_files):
+    def test_all_json_ld_has_context(self, page_batch, corpus):
         """Verify that all JSON-LD blocks have @context."""
         missing_context = []
 
-        for html_file in html_files:
-            soup = parse_html(html_file)
-            json_ld_data = extract_json_ld(soup)
+        for html_file in page_batch:
+            json_ld_data = corpus.page(html_file).json_ld
 
             for data in json_ld_data:
                 if "_error" in data:
@@ -126,13 +98,12 @@ class TestJSONLDValidity:
             f"{chr(10).join(str(p) for p in missing_context)}"
         )
 
-    def test_all_json_ld_has_type(self, html_files):
+    def test_all_json_ld_has_type(self, page_batch, corpus):
         """Verify that all JSON-LD blocks have @type."""
         missing_type = []
 
-        for html_file in html_files:
-            soup = parse_html(html_file)
-            json_ld_data = extract_json_ld(soup)
+        for html_file in page_batch:
+            json_ld_data = corpus.page(html_file).json_ld
 
             for data in json_ld_data:
                 if "_error" in data:
@@ -154,14 +125,13 @@ class TestWebSiteSchema:
 
     REQUIRED_WEBSITE_FIELDS = ["name", "url"]
 
-    def test_website_schema_has_required_fields(self, public_dir):
+    def test_website_schema_has_required_fields(self, public_dir, corpus):
         """Verify that WebSite schema has required fields."""
         index_file = public_dir / "index.html"
         if not index_file.exists():
             pytest.skip("Homepage not found")
 
-        soup = parse_html(index_file)
-        json_ld_data = extract_json_ld(soup)
+        json_ld_data = corpus.page(index_file).json_ld
 
         website_schemas = [
             data for data in json_ld_data if data.get("@type") == "WebSite"
@@ -187,7 +157,7 @@ class TestArticleSchema:
     REQUIRED_ARTICLE_FIELDS = ["headline", "author"]
     RECOMMENDED_ARTICLE_FIELDS = ["datePublished", "description"]
 
-    def test_article_schema_has_required_fields(self, public_dir):
+    def test_article_schema_has_required_fields(self, public_dir, corpus):
         """Verify that Article schemas have required fields."""
         writing_dir = public_dir / "writing"
         if not writing_dir.exists():
@@ -203,8 +173,7 @@ class TestArticleSchema:
         missing_fields_by_post = {}
 
         for post in blog_posts:
-            soup = parse_html(post)
-            json_ld_data = extract_json_ld(soup)
+            json_ld_data = corpus.page(post).json_ld
 
             article_schemas = [
                 data for data in json_ld_data if data.get("@type") == "Article"
@@ -227,7 +196,7 @@ class TestArticleSchema:
             f"{chr(10).join(f'{p}: {fields}' for p, fields in missing_fields_by_post.items())}"
         )
 
-    def test_article_schema_has_recommended_fields(self, public_dir):
+    def test_article_schema_has_recommended_fields(self, public_dir, corpus):
         """Verify that Article schemas have recommended fields (warning only)."""
         writing_dir = public_dir / "writing"
         if not writing_dir.exists():
@@ -243,8 +212,7 @@ class TestArticleSchema:
         missing_fields_by_post = {}
 
         for post in blog_posts:
-            soup = parse_html(post)
-            json_ld_data = extract_json_ld(soup)
+            json_ld_data = corpus.page(post).json_ld
 
             article_schemas = [
                 data for data in json_ld_data if data.get("@type") == "Article"
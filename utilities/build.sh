@@ -14,6 +14,13 @@ pushd "${hugo_repo_dir:?}" || return
 
     # Process command line arguments
     pretty_enabled=true
+    profile_enabled=false
+    watch_enabled=false
+    serve_enabled=true
+    latexml_servers=false
+    shared_styles=false
+    precompress_enabled=false
+    max_jobs=$(nproc 2>/dev/null || echo 1)
     while [[ $# -gt 0 ]]
     do
         case $1 in
@@ -21,157 +28,656 @@ pushd "${hugo_repo_dir:?}" || return
                 pretty_enabled=false
                 shift
             ;;
+            --profile)
+                profile_enabled=true
+                shift
+            ;;
+            --watch)
+                watch_enabled=true
+                shift
+            ;;
+            --no-serve)
+                serve_enabled=false
+                shift
+            ;;
+            --latexml-server)
+                latexml_servers=true
+                shift
+            ;;
+            --shared-styles)
+                shared_styles=true
+                shift
+            ;;
+            --precompress)
+                precompress_enabled=true
+                shift
+            ;;
+            --profile-report)
+                # show trends across the last N (default 10) profiled
+                # builds; a following option is not a count
+                report_count=()
+                if [[ ${2-} =~ ^[1-9][0-9]*$ ]]
+                then
+                    report_count=("$2")
+                elif [[ -n ${2-} && ${2-} != -* ]]
+                then
+                    >&2 echo "Error: --profile-report takes a positive number of builds, not '$2'"
+                    exit 1
+                fi
+                python3 utilities/buildprofile.py report \
+                    "$(buildcachedir)/profile/history.jsonl" "${report_count[@]}"
+                exit
+            ;;
+            -j|--jobs)
+                if [[ "${2:-}" =~ ^[1-9][0-9]*$ ]]
+                then
+                    max_jobs=$2
+                    shift 2
+                else
+                    >&2 echo "Error: --jobs requires a positive integer"
+                    exit 1
+                fi
+            ;;
             *)
                 shift
             ;;
         esac
     done
+    build_tmp=$(mktemp -d)
+    trap 'rm -rf "$build_tmp"' EXIT
 
 
 
-    # initialize generated website directory "public"
-    if [[ ! -d public ]]
+    # --profile times each stage and LaTeX job. "stage NAME" starts a
+    # stage and ends the previous one; "stage" alone ends the last. The
+    # spans are collected in $profile_events and turned into a Chrome
+    # trace and a history record by utilities/buildprofile.py.
+    profile_events=
+    if [[ $profile_enabled == true ]]
     then
-        echo "Cloning repository..."
-        git clone "$publish_repo" public
-    else
-        echo "Resetting and pulling repository..."
-        git -C public reset --hard HEAD >/dev/null
-        git -C public pull >/dev/null
-    fi
-
-    if [[ -d public/.git ]] # website directory is a git repository
-    then
-        # - .gitignore is not created by Hugo
-        # - pdf files need special treatment because they change hash each build
-        echo "Cleaning and preparing repository..."
-        git -C public rm -rf --cached . >/dev/null
-        git -C public clean -fd >/dev/null
-        git -C public checkout main .gitignore 2>/dev/null
-
-        # read from the manifest; restore only the formats still requested
-        # so a format dropped from the manifest disappears from the site
-        while read -r tex_file formats
-        do
-            [[ -z "$tex_file" || "$tex_file" == \#* ]] && continue
-            for format in ${formats:-pdf}
-            do
-                # tolerate artifacts not yet published (new docs or formats)
-                git -C public checkout main \
-                    "docs/${tex_file%.tex}.${format}" 2>/dev/null || true
-            done
-        done < latex/latex.manifest
-    else
-        rm -rf public/*
+        profile_events="$build_tmp/profile.tsv"
+        : > "$profile_events"
     fi
+    stage_name=
+    stage_start=
+    stage()
+    {
+        [[ -n "$profile_events" ]] || return 0
+        local now=$EPOCHREALTIME
+        if [[ -n "$stage_name" ]]
+        then
+            printf '%s\t%s\t%s\tmain\n' "$stage_name" "$stage_start" "$now" \
+                >> "$profile_events"
+        fi
+        stage_name=${1:-}
+        stage_start=$now
+    }
 
 
 
-    # Build LaTeX documents
-    echo "Building LaTeX documents..."
+    # LaTeX artifact builds, shared by the full build and --watch.
     base_dir=$(pwd)
-    mkdir -p latex
-    cd "${base_dir}/latex" || exit 1
+    job_dir="$build_tmp/jobs"
+    mkdir -p "$job_dir"
 
-    # read from the manifest and build what has changed, per format
-    while read -r texfile formats
-    do
-        [[ -z "$texfile" || "$texfile" == \#* ]] && continue
-        current_hash=$(getlatexhash "$texfile")
+    # Produced artifacts are recorded in the build-state index, which
+    # answers "is the published artifact current?" for the next build
+    # without reading stamps back out of each file. The index must hold
+    # the digest of the published file, which the site pipeline still
+    # changes (fingerprint.py rewrites stylesheet links in HTML), so
+    # artifacts are only noted in $build_tmp/produced here and recorded
+    # from public/ by recordpublished after the sync. --watch leaves
+    # public/ alone and records nothing.
+    build_state="$(buildcachedir)/build-state.json"
+    recordartifact()
+    {
+        local artifact=$1 wanted_hash=$2 toolchain=${3:-} job_start=${4:-}
+        [[ $watch_enabled == false ]] || return 0
+        if [[ -n "$job_start" ]]
+        then
+            printf '%s\t%s\t%s\t%s\t%s\n' "$artifact" "$wanted_hash" \
+                "$job_start" "$EPOCHREALTIME" "$toolchain" >> "$build_tmp/produced"
+        else
+            printf '%s\t%s\n' "$artifact" "$wanted_hash" >> "$build_tmp/produced"
+        fi
+    }
+    recordpublished()
+    {
+        local artifact wanted_hash job_start job_end toolchain
+        local -a timing
+        [[ -s "$build_tmp/produced" ]] || return 0
+        while IFS=$'\t' read -r artifact wanted_hash job_start job_end toolchain
+        do
+            [[ -f "public/$artifact" ]] || continue
+            timing=()
+            [[ -z "$job_start" ]] \
+                || timing=(--toolchain "$toolchain" --started "$job_start" \
+                    --finished "$job_end")
+            python3 utilities/buildstate.py record "$build_state" \
+                "$artifact" "$wanted_hash" "public/$artifact" "${timing[@]}"
+        done < "$build_tmp/produced"
+    }
+
+    # Caches and records a finished artifact.
+    finishartifact()
+    {
+        local texfile=$1 format=$2 wanted_hash=$3 output=$4 job_start=$5
+        cacheput artifacts "${wanted_hash}.${format}" "$output"
+        recordartifact "docs/${texfile%.tex}.$format" "$wanted_hash" \
+            "$(gettoolchain "$format")" "$job_start"
+    }
+
+    # Builds one (document, format) artifact into latex/output/. Each job
+    # runs in its own subshell; PDFs compile in the document's persistent
+    # auxiliary directory (compilepdf in utilities/latex.sh), so jobs for
+    # documents sharing a source directory never see each other's files.
+    # HTML jobs only convert: converted documents are listed in
+    # $job_dir/converted and post-processed together once the pool is done.
+    buildjob()
+    (
+        texfile=$1
+        format=$2
+        wanted_hash=$3
+        job_start=$EPOCHREALTIME
         texdir=${texfile%/*}
         filename=${texfile##*/}
         outdir="${base_dir}/latex/output/$texdir"
+        output="$outdir/${filename%.tex}.$format"
+        mkdir -p "$outdir"
+        cd "${base_dir}/latex/$texdir" || exit 1
 
-        for format in ${formats:-pdf}
-        do
-            # HTML artifacts also carry the post-processing pipeline
-            # version, so pipeline changes regenerate them even when
-            # the .tex source is unchanged.
-            case $format in
-                pdf)
-                    previous_hash=$(getpdfhash "${base_dir}/public/docs/${texfile%.tex}.pdf")
-                    wanted_hash=$current_hash
-                ;;
-                html)
-                    html_artifact="${base_dir}/public/docs/${texfile%.tex}.html"
-                    previous_hash="$(gethtmlhash "$html_artifact")+$(gethtmlpipeline "$html_artifact")"
-                    # shellcheck disable=SC2154 # assigned in utilities/latex.sh
-                    wanted_hash="${current_hash}+${latexml_pipeline_version}"
-                ;;
-                *)
-                    >&2 echo "Unknown format '$format' for $texfile in latex.manifest"
+        case $format in
+            pdf)
+                latex_log="$job_dir/$BASHPID.latexmk.log"
+                if ! compilepdf "$filename" "$output" >"$latex_log" 2>&1
+                then
+                    >&2 echo "Error compiling $texfile"
+                    >&2 cat "$latex_log"
                     exit 1
-                ;;
-            esac
+                fi
+                markpdf "$filename" "$output"
+                finishartifact "$texfile" "$format" "$wanted_hash" "$output" \
+                    "$job_start"
+            ;;
+            html)
+                converthtml "$filename" "$output" || exit 1
+                printf '%s\t%s\t%s\t%s\n' "$output" "$wanted_hash" "$texfile" \
+                    "$job_start" >> "$job_dir/converted"
+            ;;
+        esac
+        if [[ -n "$profile_events" ]]
+        then
+            printf '%s\t%s\t%s\t%s\n' "$texfile ($format)" "$job_start" \
+                "$EPOCHREALTIME" "$BASHPID" >> "$profile_events"
+        fi
+    )
+
+    # buildlatex [doc.tex...]: bring the artifacts of the given manifest
+    # documents (default: all) up to date. Artifacts whose published copy
+    # in public/ is current are left there; the rest are taken from the
+    # artifact cache or built, into latex/output/. In --watch mode public/
+    # is not consulted and every artifact lands in latex/output/.
+    buildlatex()
+    {
+        local texfile formats format current_hash wanted_hash entry artifact
+        local published previous_hash key job log
+        local -a artifacts=() lookups=() queue=()
+        local -A wanted=() indexed=() job_names=() job_logs=()
+        for texfile in "$@"
+        do
+            wanted[$texfile]=1
+        done
+
+        # Work out the input hash each requested artifact should carry.
+        # HTML artifacts also carry the post-processing pipeline version,
+        # so pipeline changes regenerate them even when the sources are
+        # unchanged.
+        while read -r texfile formats
+        do
+            [[ -z "$texfile" || "$texfile" == \#* ]] && continue
+            (( $# == 0 )) || [[ -n "${wanted[$texfile]:-}" ]] || continue
+            current_hash=$(getlatexhash "latex/$texfile")
+
+            for format in ${formats:-pdf}
+            do
+                case $format in
+                    pdf)
+                        wanted_hash=$current_hash
+                    ;;
+                    html)
+                        # shellcheck disable=SC2154 # assigned in utilities/latex.sh
+                        wanted_hash="${current_hash}+${latexml_pipeline_version}"
+                        # documents linking the shared sheet are a
+                        # different artifact from self-contained ones
+                        [[ $shared_styles == false ]] \
+                            || wanted_hash+="+shared"
+                    ;;
+                    *)
+                        >&2 echo "Unknown format '$format' for $texfile in latex.manifest"
+                        return 1
+                    ;;
+                esac
+                artifacts+=("$texfile $format $wanted_hash")
+                lookups+=("docs/${texfile%.tex}.$format" "$wanted_hash")
+            done
+        done < latex/latex.manifest
+
+        # One index lookup finds the published artifacts already built
+        # from those inputs; only the others need their stamps read.
+        if [[ $watch_enabled == false ]]
+        then
+            while read -r artifact
+            do
+                indexed[$artifact]=1
+            done < <(python3 utilities/buildstate.py current \
+                "$build_state" public "${lookups[@]}")
+        fi
+
+        # queue what has changed
+        for entry in "${artifacts[@]}"
+        do
+            read -r texfile format wanted_hash <<< "$entry"
+            artifact="docs/${texfile%.tex}.$format"
+            published="public/$artifact"
+            previous_hash=
+            if [[ -n "${indexed[$artifact]:-}" ]]
+            then
+                previous_hash=$wanted_hash
+            elif [[ $watch_enabled == false ]]
+            then
+                case $format in
+                    pdf)
+                        previous_hash=$(getpdfhash "$published")
+                    ;;
+                    html)
+                        previous_hash="$(gethtmlhash "$published")+$(gethtmlpipeline "$published")"
+                    ;;
+                esac
+            fi
+
+            # Artifacts are cached under the same key their stamp
+            # carries. The published artifact wins over the cache, since
+            # recompiled PDFs differ byte-for-byte (timestamps) and would
+            # churn the hosting repo; it seeds the cache instead, so a
+            # later reset or branch switch doesn't recompile.
+            key="${wanted_hash}.${format}"
+            if [[ $wanted_hash == "$previous_hash" && $format == html ]]
+            then
+                # Published HTML links fingerprinted stylesheets (and
+                # with --shared-styles the shared sheet); it goes back
+                # through Hugo so those links are brought up to date
+                # with the rest of the site, and is recorded again since
+                # they may change. It doesn't seed the cache, which
+                # keeps the form latexml_postprocess.py wrote.
+                echo "Skipping: $texfile ($format unchanged)"
+                mkdir -p "latex/output/${texfile%/*}"
+                cp "$published" "latex/output/${texfile%.tex}.$format"
+                recordartifact "$artifact" "$wanted_hash"
+                continue
+            fi
             if [[ $wanted_hash == "$previous_hash" ]]
             then
                 echo "Skipping: $texfile ($format unchanged)"
+                keep_published+=(--keep "$artifact")
+                cachehas artifacts "$key" || cacheput artifacts "$key" "$published"
+                [[ -n "${indexed[$artifact]:-}" ]] \
+                    || recordartifact "$artifact" "$wanted_hash"
                 continue
             fi
+            mkdir -p "latex/output/${texfile%/*}"
+            if cacheget artifacts "$key" "latex/output/${texfile%.tex}.$format"
+            then
+                echo "Cached: $texfile ($format)"
+                recordartifact "$artifact" "$wanted_hash"
+                continue
+            fi
+            queue+=("$texfile $format $wanted_hash")
+        done
 
-            echo "Building: $texfile ($format)"
-            mkdir -p "$outdir"
-            prev_dir=$PWD
-            cd "$texdir" || continue
-
-            case $format in
-                pdf)
-                    # Compile PDF, save output to temp log for error reporting
-                    latex_log=$(mktemp)
-                    if ! latexmk -quiet -pdf "$filename" >"$latex_log" 2>&1; then
-                        >&2 echo "Error compiling $texfile"
-                        >&2 cat "$latex_log"
-                        rm -f "$latex_log"
-                        cd "$prev_dir" || exit 1
-                        exit 1
+        stage latex
+        # Run the queued jobs in a pool of $max_jobs workers. Documents
+        # are independent, so LaTeX time is bounded by the slowest job
+        # rather than the sum of all of them. Output is captured per job
+        # and shown as each one finishes, so concurrent logs never
+        # interleave.
+        local started=0 running=0 failed=0
+        # With --latexml-server, HTML jobs go round-robin to up to
+        # $max_jobs persistent LaTeXML servers instead of each starting
+        # latexmlc from scratch.
+        local servers=0 html_jobs html_started=0
+        html_jobs=$(printf '%s\n' "${queue[@]}" | grep -c ' html ' || true)
+        if $latexml_servers && (( html_jobs > 0 ))
+        then
+            while (( servers < max_jobs && servers < html_jobs )) &&
+                startlatexmlserver $((latexml_server_base + servers))
+            do
+                servers=$((servers + 1))
+            done
+            (( servers > 0 )) ||
+                >&2 echo "Warning: no LaTeXML server started; converting directly"
+        fi
+        # Waits only on the pool's own jobs: in --watch mode the shell
+        # also has hugo server in the background, and reaping it here
+        # would lose track of a job. A job that exits while another is
+        # being reaped may already be gone from the job table, where
+        # wait -n looks, so exited jobs are collected with plain wait.
+        reapjob()
+        {
+            local pid status
+            while true
+            do
+                for pid in "${!job_names[@]}"
+                do
+                    if ! kill -0 "$pid" 2>/dev/null
+                    then
+                        wait "$pid" && status=0 || status=$?
+                        break 2
                     fi
-                    rm -f "$latex_log"
+                done
+                pid=
+                wait -n -p pid "${!job_names[@]}" 2>/dev/null && status=0 || status=$?
+                [[ -z $pid ]] || break
+            done
+            if (( status == 0 ))
+            then
+                echo "Built: ${job_names[$pid]}"
+                cat "${job_logs[$pid]}"
+            else
+                >&2 echo "Failed: ${job_names[$pid]}"
+                >&2 cat "${job_logs[$pid]}"
+                failed=$((failed + 1))
+            fi
+            unset "job_names[$pid]" "job_logs[$pid]"
+            running=$((running - 1))
+        }
+        for job in "${queue[@]}"
+        do
+            (( running < max_jobs )) || reapjob
+            read -r texfile format wanted_hash <<< "$job"
+            echo "Building: $texfile ($format)"
+            started=$((started + 1))
+            log="$job_dir/$started.log"
+            latexml_server=
+            if [[ $format == html ]] && (( servers > 0 ))
+            then
+                latexml_server=$((latexml_server_base + html_started % servers))
+                html_started=$((html_started + 1))
+            fi
+            buildjob "$texfile" "$format" "$wanted_hash" >"$log" 2>&1 &
+            job_names[$!]="$texfile ($format)"
+            job_logs[$!]=$log
+            running=$((running + 1))
+        done
+        while (( running > 0 ))
+        do
+            reapjob
+        done
 
-                    latexmk -c >/dev/null 2>&1
-                    rm -f "${filename%.tex}".{dvi,bbl} ./*.fls
+        # Post-process all converted HTML in one interpreter. A document
+        # that carries its texhash stamp afterwards was finished.
+        if [[ -s "$job_dir/converted" ]]
+        then
+            stage latex-postprocess
+            local -a pairs=()
+            local output job_start
+            while IFS=$'\t' read -r output wanted_hash _ _
+            do
+                pairs+=("$output" "${wanted_hash%%+*}")
+            done < "$job_dir/converted"
+            python3 utilities/latexml_postprocess.py \
+                --pipeline "$latexml_pipeline_version" --jobs "$max_jobs" \
+                "${pairs[@]}" || true
+            while IFS=$'\t' read -r output wanted_hash texfile job_start
+            do
+                if [[ "$(gethtmlhash "$output")" == "${wanted_hash%%+*}" ]]
+                then
+                    finishartifact "$texfile" html "$wanted_hash" "$output" "$job_start"
+                else
+                    >&2 echo "Failed: $texfile (html post-processing)"
+                    rm -f "$output"
+                    failed=$((failed + 1))
+                fi
+            done < "$job_dir/converted"
+            rm -f "$job_dir/converted"
+        fi
+        cacheevict artifacts
+        if (( failed > 0 ))
+        then
+            >&2 echo "$failed LaTeX job(s) failed"
+            return 1
+        fi
+    }
 
-                    markpdf "$filename"
-                    mv "${filename%.tex}.pdf" "$outdir/"
-                ;;
-                html)
-                    if ! renderhtml "$filename" "$outdir/${filename%.tex}.html"
+    # Built artifacts are used by Hugo (via the latex/output → static/docs
+    # mount in hugo.toml) but are not checked into git, as they are
+    # regenerated from .tex sources on each build.
+    cleanoutputs()
+    {
+        local texfile
+        while read -r texfile _
+        do
+            [[ -z "$texfile" || "$texfile" == \#* ]] && continue
+            rm -f "latex/output/${texfile%.tex}".{pdf,html}
+        done < latex/latex.manifest
+    }
+
+
+
+    # --watch: rebuild the artifacts of documents whose inputs change and
+    # leave them in latex/output/, where 'hugo server' (started here
+    # unless --no-serve) serves them. Hugo's own watcher covers content/,
+    # layouts/, assets/ and static/. public/ is not touched.
+    if [[ $watch_enabled == true ]]
+    then
+        if ! command -v inotifywait >/dev/null 2>&1
+        then
+            >&2 echo "Error: inotifywait not found. Run inside the nix environment:"
+            >&2 echo "    nix develop --command ./build --watch"
+            exit 1
+        fi
+        # shellcheck disable=SC2064 # expand $build_tmp now
+        # (errexit applies in the trap too: kill fails once hugo has exited)
+        trap "kill \$(jobs -p) 2>/dev/null || true; cleanoutputs; rm -rf '$build_tmp'" EXIT
+        latex_root="$(pwd -P)/latex"
+
+        # Maps each input file (absolute path) to the documents reading
+        # it, from the dependency graphs getlatexhash keeps.
+        declare -A dependents
+        mapdependents()
+        {
+            local texfile dep
+            dependents=()
+            while read -r texfile _
+            do
+                [[ -z "$texfile" || "$texfile" == \#* ]] && continue
+                while read -r dep
+                do
+                    dependents[$dep]+="$texfile "
+                done < <(python3 utilities/latexdeps.py \
+                    --cache "$(buildcachedir)/deps" deps "latex/$texfile")
+            done < latex/latex.manifest
+        }
+
+        echo "Building LaTeX documents..."
+        buildlatex || true
+        mapdependents
+        if [[ $serve_enabled == true ]]
+        then
+            hugo server -D &
+        fi
+        echo "Watching LaTeX sources; press Ctrl-C to stop."
+
+        while read -r changed
+        do
+            # editors save in bursts (temporary file, rename, chmod)
+            changes=("$changed")
+            while read -r -t 0.3 changed
+            do
+                changes+=("$changed")
+            done
+
+            declare -A affected=()
+            for changed in "${changes[@]}"
+            do
+                if [[ $changed == "$latex_root/latex.manifest" ]]
+                then
+                    affected=([all]=1)
+                    break
+                fi
+                if [[ -n "${dependents[$changed]:-}" ]]
+                then
+                    for texfile in ${dependents[$changed]}
+                    do
+                        affected[$texfile]=1
+                    done
+                    continue
+                fi
+                # A new file may be an input that didn't exist before;
+                # recheck documents beside it (unchanged ones come back
+                # from the artifact cache without compiling).
+                for dep in "${!dependents[@]}"
+                do
+                    if [[ ${dep%/*} == "${changed%/*}" ]]
                     then
-                        cd "$prev_dir" || exit 1
-                        exit 1
+                        for texfile in ${dependents[$dep]}
+                        do
+                            affected[$texfile]=1
+                        done
                     fi
-                ;;
-            esac
-            cd "$prev_dir" || continue
-        done
-    done < latex.manifest
-    cd "${base_dir}" || exit 1
+                done
+            done
+            (( ${#affected[@]} > 0 )) || continue
 
+            echo "Changed: ${changes[*]#"$latex_root/"}"
+            if [[ -n "${affected[all]:-}" ]]
+            then
+                buildlatex || true
+            else
+                buildlatex "${!affected[@]}" || true
+            fi
+            mapdependents
+        done < <(inotifywait -m -q -r -e close_write,moved_to,create,delete \
+            --exclude "^$latex_root/output/" --format '%w%f' "$latex_root")
+        exit
+    fi
 
 
-    # Build website
+
+    # initialize generated website directory "public"
+    stage public
+    if [[ ! -d public ]]
+    then
+        echo "Cloning repository..."
+        git clone "$publish_repo" public
+    else
+        echo "Resetting and pulling repository..."
+        git -C public reset --hard HEAD >/dev/null
+        git -C public pull >/dev/null
+    fi
+
+    # public/ is not emptied: Hugo renders into a staging directory and
+    # sitesync.py then writes only what changed. Published artifacts
+    # that are still current are not rebuilt into the site; they are
+    # listed in $keep_published so the sync leaves them in place.
+    keep_published=()
+
+
+
+    # Build LaTeX documents
+    stage latex-plan
+    echo "Building LaTeX documents..."
+    buildlatex || exit 1
+
+
+
+    # Build website into a staging directory that persists between builds
+    # (keyed by checkout); it holds copies of the prettier configuration
+    # so .prettierignore patterns such as public/docs/ still match there.
+    stage hugo
     echo "Building website..."
-    hugo || exit 1
+    site_dir="$(buildcachedir)/site/$(printf '%s' "$base_dir" | sha256sum | cut -c1-16)"
+    mkdir -p "$site_dir"
+    cp .prettierrc .prettierignore "$site_dir/"
+    hugo --destination="$site_dir/public" --cleanDestinationDir || exit 1
+    if [[ $shared_styles == true ]]
+    then
+        # Move every HTML document's converted inline styles into one
+        # fingerprinted, cacheable sheet under /css/latexml/.
+        stage latex-styles
+        html_docs=()
+        while read -r texfile formats
+        do
+            [[ -z "$texfile" || "$texfile" == \#* ]] && continue
+            [[ " $formats " == *" html "* ]] \
+                && html_docs+=("$site_dir/public/docs/${texfile%.tex}.html")
+        done < latex/latex.manifest
+        if (( ${#html_docs[@]} > 0 ))
+        then
+            python3 utilities/latexml_styles.py --sheets public/css/latexml \
+                --out "$site_dir/public/css/latexml" "${html_docs[@]}" || exit 1
+        fi
+    fi
     if [[ $pretty_enabled == true ]]
     then
+        stage prettier
         echo "Formatting content..."
-        prettier public --write --ignore-path=.prettierignore || exit 1
+        (cd "$site_dir" && python3 "$base_dir/utilities/prettify.py" \
+            --jobs "$max_jobs" public) || exit 1
+    fi
+
+    # Lossless recompression of the generated PNGs under static/
+    # (pngopt.py), before the gallery hashes and derives from them
+    png_dirs=()
+    for png_dir in face-dataset/images cns/set1-writeup
+    do
+        [[ -d $site_dir/public/$png_dir ]] && png_dirs+=("$site_dir/public/$png_dir")
+    done
+    if (( ${#png_dirs[@]} > 0 ))
+    then
+        stage pngopt
+        echo "Optimizing PNGs..."
+        python3 utilities/pngopt.py --jobs "$max_jobs" "${png_dirs[@]}" || exit 1
+    fi
+
+    # WebP/AVIF card sizes and category preview atlases for the
+    # face-dataset gallery, listed in its built manifest with per-image
+    # hashes, and the revision.json the page polls (gallery.py)
+    if [[ -f $site_dir/public/face-dataset/manifest.json ]]
+    then
+        stage gallery
+        python3 utilities/gallery.py --jobs "$max_jobs" \
+            "$site_dir/public/face-dataset" || exit 1
     fi
 
+    # Content-hashed URLs for the assets under static/ (fingerprint.py)
+    stage fingerprint
+    python3 utilities/fingerprint.py "$site_dir/public" || exit 1
+    if [[ $precompress_enabled == true ]]
+    then
+        # .br and .gz siblings of the final text assets, for hosts that
+        # serve precompressed files (GitHub Pages ignores them).
+        stage precompress
+        echo "Precompressing text assets..."
+        python3 utilities/precompress.py --jobs "$max_jobs" "$site_dir/public" \
+            || exit 1
+    fi
+
+    # Copy what changed into public/
+    stage sync
+    python3 utilities/sitesync.py "${keep_published[@]}" "$site_dir/public" public \
+        || exit 1
+    recordpublished
+
 
 
     # Clean any built artifacts from the working directory.
-    # These files are used by Hugo (via the latex/output → static/docs mount
-    # in hugo.toml) but are not checked into git, as they are regenerated
-    # from .tex sources on each build.
-    while read -r texfile _
-    do
-        [[ -z "$texfile" || "$texfile" == \#* ]] && continue
-        rm -f "latex/output/${texfile%.tex}".{pdf,html}
-    done < latex/latex.manifest
+    stage cleanup
+    cleanoutputs
 
 
 
     # Stage changes; show status
+    stage git-stage
     echo '+-----------------------+'
     echo '| Hugo                  |'
     echo '+-----------------------+'
@@ -184,6 +690,15 @@ pushd "${hugo_repo_dir:?}" || return
         echo '+-----------------------+'
         git -C public status
     fi
+    stage
+
+    if [[ -n "$profile_events" ]]
+    then
+        python3 utilities/buildprofile.py trace "$profile_events" \
+            "$(buildcachedir)/profile/trace.json" \
+            "$(buildcachedir)/profile/history.jsonl" \
+            "$(git rev-parse --short HEAD 2>/dev/null || true)"
+    fi
 
 popd || return
 )
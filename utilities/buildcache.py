@@ -0,0 +1,98 @@
+"""Python side of the persistent build cache (see utilities/cache.sh).
+
+Stores are directories under the cache root holding entries named by a
+key that identifies their content completely. Entries are replaced
+atomically and evicted least-recently-used by mtime, exactly as the
+shell helpers do, so both sides can share a store.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+
+
+def cache_root() -> Path:
+    if "BUILD_CACHE_DIR" in os.environ:
+        return Path(os.environ["BUILD_CACHE_DIR"])
+    xdg = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(xdg) / "website-hugo"
+
+
+def sha256_file(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def write_atomic(path: Path, data: bytes) -> None:
+    """Replace path with data so readers never see a partial file."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".put.")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def load_json(path: Path, default):
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return default
+
+
+def save_json(path: Path, data) -> None:
+    write_atomic(path, json.dumps(data, indent=1, sort_keys=True).encode("utf-8"))
+
+
+class Store:
+    """A content-addressed store of files."""
+
+    def __init__(self, name: str, root: Path | None = None):
+        self.dir = (root or cache_root()) / name
+
+    def path(self, key: str) -> Path:
+        return self.dir / key
+
+    def get(self, key: str) -> bytes | None:
+        path = self.path(key)
+        try:
+            data = path.read_bytes()
+        except OSError:
+            return None
+        os.utime(path)
+        return data
+
+    def has(self, key: str) -> bool:
+        try:
+            os.utime(self.path(key))
+        except OSError:
+            return False
+        return True
+
+    def put(self, key: str, data: bytes) -> None:
+        write_atomic(self.path(key), data)
+
+    def evict(self, max_mb: int | None = None) -> None:
+        """Delete least recently used entries until the store fits."""
+        if max_mb is None:
+            max_mb = int(os.environ.get("BUILD_CACHE_MAX_MB", "512"))
+        limit = max_mb * 1024 * 1024
+        try:
+            entries = [
+                (e.stat().st_mtime, e.stat().st_size, e) for e in self.dir.iterdir()
+            ]
+        except OSError:
+            return
+        total = 0
+        for _, size, entry in sorted(entries, key=lambda e: e[0], reverse=True):
+            total += size
+            if total > limit and entry.is_file():
+                entry.unlink(missing_ok=True)
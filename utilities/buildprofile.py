@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""Turn build --profile timings into a trace, a summary, and a history.
+
+Usage: buildprofile.py trace <events> <trace.json> <history.jsonl> [label]
+       buildprofile.py report <history.jsonl> [count]
+
+The build appends one tab-separated line per timed span to <events>:
+
+    <name> <start> <end> <lane>
+
+with $EPOCHREALTIME timestamps. Lane "main" holds the sequential build
+stages; LaTeX jobs run concurrently, one lane per job process.
+
+`trace` writes the spans as Chrome trace-event JSON (open it in
+chrome://tracing or https://ui.perfetto.dev), prints a one-line summary,
+and appends the run's stage and job durations to <history.jsonl>.
+
+`report` compares the latest of the last <count> runs (default 10)
+against the median of the ones before it, per stage and per job, and
+flags regressions.
+"""
+
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# A stage regressed when it is this much slower than its median, and by
+# enough wall time to matter.
+REGRESSION_RATIO = 1.2
+REGRESSION_SECONDS = 0.1
+
+
+def read_events(path: Path) -> list[tuple[str, float, float, str]]:
+    events = []
+    for line in path.read_text(encoding="utf-8").splitlines():
+        name, start, end, lane = line.split("\t")
+        events.append((name, float(start), float(end), lane))
+    return events
+
+
+def trace(events_file: Path, trace_file: Path, history: Path, label: str) -> None:
+    events = read_events(events_file)
+    if not events:
+        return
+    origin = min(start for _, start, _, _ in events)
+    lanes = {"main": 0}
+    trace_events = []
+    for name, start, end, lane in events:
+        tid = lanes.setdefault(lane, len(lanes))
+        trace_events.append(
+            {
+                "name": name,
+                "cat": "stage" if lane == "main" else "latex",
+                "ph": "X",
+                "ts": round((start - origin) * 1e6),
+                "dur": round((end - start) * 1e6),
+                "pid": 1,
+                "tid": tid,
+            }
+        )
+    for lane, tid in lanes.items():
+        trace_events.append(
+            {
+                "name": "thread_name",
+                "ph": "M",
+                "pid": 1,
+                "tid": tid,
+                "args": {"name": "build" if lane == "main" else f"job {lane}"},
+            }
+        )
+    trace_file.parent.mkdir(parents=True, exist_ok=True)
+    trace_file.write_text(
+        json.dumps({"traceEvents": trace_events, "displayTimeUnit": "ms"}),
+        encoding="utf-8",
+    )
+
+    stages = {n: round(e - s, 3) for n, s, e, lane in events if lane == "main"}
+    jobs = {n: round(e - s, 3) for n, s, e, lane in events if lane != "main"}
+    total = round(max(end for _, _, end, _ in events) - origin, 3)
+    record = {
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "label": label,
+        "total": total,
+        "stages": stages,
+        "jobs": jobs,
+    }
+    history.parent.mkdir(parents=True, exist_ok=True)
+    with open(history, "a", encoding="utf-8") as f:
+        f.write(json.dumps(record) + "\n")
+
+    parts = ", ".join(f"{name} {seconds:.2f}s" for name, seconds in stages.items())
+    print(f"Profile: {total:.2f}s total ({parts}); trace: {trace_file}")
+
+
+def report(history: Path, count: int) -> int:
+    try:
+        lines = history.read_text(encoding="utf-8").splitlines()
+    except OSError:
+        print(f"No profile history at {history}; run build --profile first.")
+        return 1
+    runs = [json.loads(line) for line in lines if line.strip()][-count:]
+    if not runs:
+        print("Profile history is empty.")
+        return 1
+    latest, previous = runs[-1], runs[:-1]
+
+    print(f"Last {len(runs)} profiled build(s); latest {latest['time']}"
+          f" {latest.get('label', '')}".rstrip())
+    print(f"{'':28} {'latest':>9} {'median':>9} {'change':>8}")
+    rows = [("total", latest["total"], [run["total"] for run in previous])]
+    for kind in ("stages", "jobs"):
+        for name, seconds in latest[kind].items():
+            past = [run[kind][name] for run in previous if name in run[kind]]
+            rows.append((name, seconds, past))
+
+    regressions = 0
+    for name, seconds, past in rows:
+        if not past:
+            print(f"{name:28.28} {seconds:8.2f}s {'-':>9} {'new':>8}")
+            continue
+        median = statistics.median(past)
+        change = f"{(seconds / median - 1) * 100:+.0f}%" if median else "-"
+        flag = ""
+        if (
+            seconds > median * REGRESSION_RATIO
+            and seconds - median > REGRESSION_SECONDS
+        ):
+            flag = "  regression"
+            regressions += 1
+        print(f"{name:28.28} {seconds:8.2f}s {median:8.2f}s {change:>8}{flag}")
+
+    trend = " ".join(f"{run['total']:.1f}" for run in runs)
+    print(f"Total over time (s): {trend}")
+    if regressions:
+        print(f"{regressions} regression(s) against the median of earlier builds")
+    return 0
+
+
+def main() -> int:
+    args = sys.argv[1:]
+    if args[:1] == ["trace"] and len(args) in (4, 5):
+        trace(Path(args[1]), Path(args[2]), Path(args[3]), "".join(args[4:]))
+        return 0
+    if (args[:1] == ["report"] and len(args) in (2, 3)
+            and (len(args) == 2 or args[2].isdigit() and int(args[2]) > 0)):
+        return report(Path(args[1]), int(args[2]) if len(args) == 3 else 10)
+    print("\n".join(__doc__.splitlines()[2:4]), file=sys.stderr)
+    return 2
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""Build-state index: what the build last produced for each artifact.
+
+Usage: buildstate.py current <index> <root> <artifact> <input> [...]
+       buildstate.py record <index> <artifact> <input> <file>
+                            [--toolchain TEXT] [--started EPOCH]
+                            [--finished EPOCH]
+
+The index is one JSON file mapping an artifact path (relative to the
+site root, e.g. docs/cv/cv-steve-hay.pdf) to the input hash it was built
+from, the toolchain that built it, the SHA-384 digest and size of the
+output, and how long the build took.
+
+`current` prints, one per line, the artifacts whose recorded input hash
+matches the given one and whose file under <root> still has the
+recorded size and digest. That one lookup replaces reading the stamp
+embedded in every artifact (exiftool for PDFs, a scan of the whole file
+for HTML); the stamps remain the portable source of truth the build
+falls back to when the index has no answer.
+
+`record` stores an artifact's entry; the build's duration runs from
+--started to --finished (default: now). Fields not given are kept from
+the previous entry when it describes the same output. Updates are locked
+and atomic, so concurrent build jobs can record safely.
+"""
+
+import argparse
+import fcntl
+import hashlib
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+
+def digest_file(path: Path) -> str:
+    h = hashlib.sha384()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def load(index: Path) -> dict:
+    try:
+        return json.loads(index.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+
+@contextmanager
+def locked(index: Path):
+    index.parent.mkdir(parents=True, exist_ok=True)
+    with open(index.with_suffix(".lock"), "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        yield
+
+
+def save(index: Path, state: dict) -> None:
+    tmp = index.with_suffix(f".{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(state, indent=1, sort_keys=True), encoding="utf-8")
+    os.replace(tmp, index)
+
+
+def current(index: Path, root: Path, pairs: list[str]) -> None:
+    state = load(index)
+    for artifact, wanted in zip(pairs[::2], pairs[1::2]):
+        entry = state.get(artifact)
+        if not entry or entry.get("input") != wanted:
+            continue
+        path = root / artifact
+        try:
+            if path.stat().st_size != entry["size"]:
+                continue
+        except OSError:
+            continue
+        if digest_file(path) == entry["digest"]:
+            print(artifact)
+
+
+def record(args: argparse.Namespace) -> None:
+    path = Path(args.file)
+    entry = {
+        "input": args.input,
+        "digest": digest_file(path),
+        "size": path.stat().st_size,
+    }
+    with locked(args.index):
+        state = load(args.index)
+        previous = state.get(args.artifact, {})
+        if previous.get("digest") == entry["digest"]:
+            entry = previous | entry
+        if args.toolchain is not None:
+            entry["toolchain"] = args.toolchain
+        if args.started is not None:
+            finished = time.time() if args.finished is None else args.finished
+            entry["duration"] = round(finished - args.started, 3)
+        state[args.artifact] = entry
+        save(args.index, state)
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = ap.add_subparsers(dest="command", required=True)
+    cur = sub.add_parser("current", help="list artifacts known to be current")
+    cur.add_argument("index", type=Path)
+    cur.add_argument("root", type=Path)
+    cur.add_argument("pairs", nargs="*", metavar="artifact input")
+    rec = sub.add_parser("record", help="record a produced artifact")
+    rec.add_argument("index", type=Path)
+    rec.add_argument("artifact")
+    rec.add_argument("input")
+    rec.add_argument("file")
+    rec.add_argument("--toolchain")
+    rec.add_argument("--started", type=float)
+    rec.add_argument("--finished", type=float)
+    args = ap.parse_args()
+
+    if args.command == "current":
+        if len(args.pairs) % 2:
+            ap.error("current takes <artifact> <input> pairs")
+        current(args.index, args.root, args.pairs)
+    else:
+        record(args)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,70 @@
+# shellcheck shell=bash
+#
+# Persistent, content-addressed build cache shared across builds.
+#
+# The cache lives outside the repository so a fresh clone, a reset
+# public/, or a branch switch can still reuse it. Entries are grouped in
+# named stores (subdirectories); an entry's key must identify its
+# content completely, so entries are never invalidated, only evicted.
+# Eviction is least-recently-used by mtime, which cacheget refreshes.
+#
+# BUILD_CACHE_DIR overrides the location; BUILD_CACHE_MAX_MB bounds
+# each store (default 512).
+
+buildcachedir()
+{
+    echo "${BUILD_CACHE_DIR:-${XDG_CACHE_HOME:-$HOME/.cache}/website-hugo}"
+}
+
+# cacheget <store> <key> <dest>: copy an entry to dest; fails on a miss.
+cacheget()
+{
+    local entry
+    entry="$(buildcachedir)/$1/$2"
+    [[ -f "$entry" ]] || return 1
+    cp "$entry" "$3" || return 1
+    touch "$entry"
+}
+
+# cacheput <store> <key> <src>: add or replace an entry. Written to a
+# temporary name first so concurrent readers never see a partial file.
+cacheput()
+{
+    local dir tmp
+    dir="$(buildcachedir)/$1"
+    mkdir -p "$dir" || return 1
+    tmp=$(mktemp -p "$dir" .put.XXXXXX) || return 1
+    if ! cp "$3" "$tmp" || ! mv -f "$tmp" "$dir/$2"
+    then
+        rm -f "$tmp"
+        return 1
+    fi
+}
+
+# cachehas <store> <key>: test for an entry, marking it recently used.
+cachehas()
+{
+    local entry
+    entry="$(buildcachedir)/$1/$2"
+    [[ -f "$entry" ]] && touch "$entry"
+}
+
+# cacheevict <store> [max-mb]: delete least recently used entries until
+# the store fits in max-mb megabytes.
+cacheevict()
+{
+    local dir limit total=0 size path
+    dir="$(buildcachedir)/$1"
+    limit=$(( ${2:-${BUILD_CACHE_MAX_MB:-512}} * 1024 * 1024 ))
+    [[ -d "$dir" ]] || return 0
+
+    # newest first: keep entries while they fit, delete the rest
+    while read -r _ size path
+    do
+        total=$((total + size))
+        if (( total > limit ))
+        then
+            rm -f "$path"
+        fi
+    done < <(find "$dir" -type f -printf '%T@ %s %p\n' | sort -rn)
+}
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""Give a built site's static assets content-addressed, immutable URLs.
+
+Usage: fingerprint.py [--map FILE] <dir>
+
+Only assets/css/main.css goes through Hugo's fingerprint pipe; the
+scripts, fonts, LaTeXML stylesheets and demo assets under static/ are
+served from fixed paths, so browsers have to revalidate them. This gives
+each asset matching ASSETS a copy named <name>.<hash>.<ext> (the first
+16 hex digits of its SHA-256) and rewrites every reference to it:
+
+- src and href attributes in every HTML page, relative or absolute,
+- url() in stylesheets,
+- new Worker("...") in scripts.
+
+Assets are hashed after the assets they reference have been rewritten
+(fonts before the stylesheets using them), so a changed font gives its
+stylesheet, and every page, a new URL too. A tag whose reference
+changes keeps a correct SRI integrity attribute: it is recomputed from
+the final bytes with the algorithm it already used. The CSPs need no
+change, since fingerprinted assets stay same-origin.
+
+A file that already carries a fingerprint (Hugo's main.min.<sha256>.css,
+the shared ltxs.<hash>.css) is renamed to this scheme if rewriting its
+references changed it. References to an earlier fingerprint of an asset
+(in published LaTeXML documents restaged from public/) are rewritten to
+the current one. Unfingerprinted originals are left in place, so links
+from outside the site keep working.
+
+The asset map, {"/js/theme-init.js": "/js/theme-init.<hash>.js", ...},
+is written to --map (default: asset-map.json in <dir>); a host can mark
+every target Cache-Control: immutable.
+"""
+
+import argparse
+import base64
+import hashlib
+import json
+import os
+import posixpath
+import re
+import sys
+from pathlib import Path
+
+ASSETS = [
+    "css/*.css",
+    "css/latexml/*.css",
+    "fonts/*.woff2",
+    "js/*.js",
+    "plasma/*.css",
+    "plasma/*.js",
+]
+FINGERPRINT = re.compile(r"\.([0-9a-f]{16}|[0-9a-f]{64})$")
+TAG = re.compile(r"<[a-zA-Z][^>]*>")
+TAG_URL = re.compile(r"""(\s(?:src|href)\s*=\s*)(["'])(.*?)\2""", re.S)
+INTEGRITY = re.compile(r"""(\sintegrity\s*=\s*)(["'])(sha256|sha384|sha512)-[^"']*\2""")
+CSS_URL = re.compile(r"""(url\(\s*)(["']?)([^"')\s]+)\2(\s*\))""")
+WORKER_URL = re.compile(r"""(new\s+Worker\(\s*)(["'])([^"']+)\2""")
+EXTERNAL = re.compile(r"^(?:[a-z][a-z0-9+.-]*:|//|#)", re.I)
+
+
+def base_name(name: str) -> str:
+    """File name without a fingerprint: main.min.<sha>.css -> main.min.css."""
+    stem, ext = os.path.splitext(name)
+    return FINGERPRINT.sub("", stem) + ext
+
+
+def fingerprinted(name: str, data: bytes) -> str:
+    stem, ext = os.path.splitext(base_name(name))
+    return f"{stem}.{hashlib.sha256(data).hexdigest()[:16]}{ext}"
+
+
+def integrity(algorithm: str, data: bytes) -> str:
+    digest = hashlib.new(algorithm, data).digest()
+    return f"{algorithm}-{base64.b64encode(digest).decode()}"
+
+
+class Site:
+    """The assets of a built site and the URLs they are served at."""
+
+    def __init__(self, root: Path):
+        self.root = root
+        # site path of an asset ("js/theme-init.js") -> its file
+        self.files: dict[str, Path] = {}
+        # (directory, name without fingerprint) -> site path of the asset
+        self.by_base: dict[tuple[str, str], str] = {}
+        for pattern in ASSETS:
+            for path in sorted(root.glob(pattern)):
+                if not path.is_file():
+                    continue
+                site_path = path.relative_to(root).as_posix()
+                key = (posixpath.dirname(site_path), base_name(path.name))
+                if key in self.by_base:
+                    # an unfingerprinted original beats a fingerprinted copy
+                    if FINGERPRINT.search(os.path.splitext(path.name)[0]):
+                        continue
+                    del self.files[self.by_base[key]]
+                self.files[site_path] = path
+                self.by_base[key] = site_path
+        # site path of an asset -> its fingerprinted site path, once hashed
+        self.renamed: dict[str, str] = {}
+
+    def resolve(self, url: str, base: str) -> str | None:
+        """Site path of the asset a URL refers to, from a file at base."""
+        if EXTERNAL.match(url):
+            return None
+        path = url.split("#", 1)[0].split("?", 1)[0]
+        if not path:
+            return None
+        if path.startswith("/"):
+            site_path = posixpath.normpath(path.lstrip("/"))
+        else:
+            site_path = posixpath.normpath(posixpath.join(posixpath.dirname(base), path))
+        key = (posixpath.dirname(site_path), base_name(posixpath.basename(site_path)))
+        return self.by_base.get(key)
+
+    def rewrite_url(self, url: str, base: str) -> str:
+        asset = self.resolve(url, base)
+        if asset is None or asset not in self.renamed:
+            return url
+        path, suffix = re.match(r"([^?#]*)(.*)", url, re.S).groups()
+        head, slash, _ = path.rpartition("/")
+        return head + slash + posixpath.basename(self.renamed[asset]) + suffix
+
+    def references(self, site_path: str, text: str) -> set[str]:
+        """Assets referenced from an asset's text."""
+        pattern = CSS_URL if site_path.endswith(".css") else WORKER_URL
+        found = set()
+        for match in pattern.finditer(text):
+            asset = self.resolve(match.group(3), site_path)
+            if asset is not None and asset != site_path:
+                found.add(asset)
+        return found
+
+    def rewrite_asset(self, site_path: str, text: str) -> str:
+        pattern = CSS_URL if site_path.endswith(".css") else WORKER_URL
+        return pattern.sub(
+            lambda m: m.group(0).replace(
+                m.group(3), self.rewrite_url(m.group(3), site_path), 1
+            ),
+            text,
+        )
+
+    def rewrite_html(self, site_path: str, text: str) -> str:
+        def tag(match: re.Match) -> str:
+            original = match.group(0)
+            rewritten = TAG_URL.sub(
+                lambda m: m.group(1) + m.group(2)
+                + self.rewrite_url(m.group(3), site_path) + m.group(2),
+                original,
+            )
+            if rewritten == original:
+                return original
+            for url_match in TAG_URL.finditer(rewritten):
+                asset = self.resolve(url_match.group(3), site_path)
+                if asset is None:
+                    continue
+                data = (self.root / self.renamed[asset]).read_bytes()
+                rewritten = INTEGRITY.sub(
+                    lambda m: m.group(1) + m.group(2)
+                    + integrity(m.group(3), data) + m.group(2),
+                    rewritten,
+                )
+            return rewritten
+
+        return TAG.sub(tag, text)
+
+    def fingerprint(self) -> None:
+        """Hash every asset, leaves first, writing the fingerprinted copies."""
+        texts: dict[str, str | None] = {}
+        graph: dict[str, set[str]] = {}
+        for site_path, path in self.files.items():
+            data = path.read_bytes()
+            text = None
+            if path.suffix in (".css", ".js"):
+                text = data.decode("utf-8")
+            texts[site_path] = text
+            graph[site_path] = self.references(site_path, text) if text else set()
+
+        state: dict[str, str] = {}
+
+        def visit(site_path: str, chain: list[str]) -> None:
+            if state.get(site_path) == "done":
+                return
+            if state.get(site_path) == "visiting":
+                raise ValueError("reference cycle: " + " -> ".join(chain + [site_path]))
+            state[site_path] = "visiting"
+            for dep in sorted(graph[site_path]):
+                visit(dep, chain + [site_path])
+            path = self.files[site_path]
+            if texts[site_path] is None:
+                data = path.read_bytes()
+            else:
+                data = self.rewrite_asset(site_path, texts[site_path]).encode("utf-8")
+            target = path.with_name(fingerprinted(path.name, data))
+            if target != path:
+                if not target.exists() or target.read_bytes() != data:
+                    target.write_bytes(data)
+                if FINGERPRINT.search(os.path.splitext(path.name)[0]):
+                    path.unlink()
+            self.renamed[site_path] = target.relative_to(self.root).as_posix()
+            state[site_path] = "done"
+
+        for site_path in sorted(self.files):
+            visit(site_path, [])
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("root", type=Path)
+    ap.add_argument("--map", type=Path)
+    args = ap.parse_args()
+
+    site = Site(args.root)
+    try:
+        site.fingerprint()
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 1
+
+    pages = 0
+    for path in sorted(args.root.rglob("*.html")):
+        if ".git" in path.relative_to(args.root).parts:
+            continue
+        text = path.read_text(encoding="utf-8")
+        rewritten = site.rewrite_html(path.relative_to(args.root).as_posix(), text)
+        if rewritten != text:
+            path.write_text(rewritten, encoding="utf-8")
+            pages += 1
+
+    asset_map = {
+        "/" + posixpath.join(posixpath.dirname(path), base_name(posixpath.basename(path))):
+            "/" + target
+        for path, target in site.renamed.items()
+    }
+    map_file = args.map or args.root / "asset-map.json"
+    map_file.write_text(json.dumps(asset_map, indent=1, sort_keys=True) + "\n",
+                        encoding="utf-8")
+    print(f"Fingerprinted {len(site.renamed)} asset(s); rewrote {pages} page(s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
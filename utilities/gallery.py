@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+"""Generate the face-dataset gallery's image derivatives and revision file.
+
+Usage: gallery.py [--jobs N] <site>/face-dataset
+
+The gallery's manifest.json lists 1024x1024 (and larger) PNGs, which the
+page would otherwise download at full size for every card and category
+preview. Under derived/ beside the manifest this writes
+
+- card images of each complete item at each of CARD_WIDTHS up to the
+  source's own width, as WebP and AVIF, each when Pillow was built with
+  support for it, and
+- one atlas per category: its first three items (the ones the collapsed
+  summary shows) cropped to TILE_SIZE and placed side by side, so a
+  summary costs one small request instead of three PNGs. Atlases are
+  WebP, or JPEG when Pillow can't write WebP.
+
+The manifest in the built site is then replaced by a generated one that
+gives each item its intrinsic width and height and a srcset per image
+type (the PNG stays as the fallback src), and each category, under
+"atlases", its atlas and the [x, y, width, height] of every item's tile
+in it. The source manifest under static/ is not touched, so `hugo
+server` serves the plain gallery.
+
+Every complete item also gets a "hash", the first 16 hex digits of its
+source image's SHA-256, which the page puts in the PNG's URL
+(image.png?v=<hash>), so an image's URL changes only with its content.
+Beside the manifest, revision.json records a hash of the generated
+manifest; the page polls that file with conditional requests and
+refetches the manifest (as manifest.json?v=<revision>) only when it
+changes. Both are written without Pillow too; only the derivatives need
+it.
+
+Derivative names carry a hash of the source image and the encoder
+settings, so they can be cached as immutable. Encoded files are kept in
+a content-addressed store in the build cache and the source dimensions
+in an index keyed by the source SHA-256, so only new or changed images
+are decoded and encoded, spread over a process pool (--jobs).
+"""
+
+import argparse
+import hashlib
+import io
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from buildcache import Store, cache_root, load_json, save_json, sha256_file
+
+try:
+    from PIL import Image, ImageOps, features
+except ImportError:
+    Image = None
+
+CARD_WIDTHS = (480, 768, 1024, 1600)
+# A summary preview tile, 4:3 like .category-preview; twice its width at
+# the widest summary layout.
+TILE_SIZE = (240, 180)
+ATLAS_TILES = 3
+# preferred first; every Pillow writes JPEG
+ATLAS_ENCODINGS = (
+    ("webp", "WEBP", {"quality": 75, "method": 6}),
+    ("jpg", "JPEG", {"quality": 80, "optimize": True, "progressive": True}),
+)
+ATLAS_BACKGROUND = (0xF1, 0xF3, 0xF2)
+# type -> (extension, Pillow format, save options)
+ENCODINGS = {
+    "image/avif": ("avif", "AVIF", {"quality": 55, "speed": 6}),
+    "image/webp": ("webp", "WEBP", {"quality": 80, "method": 6}),
+}
+DERIVED_DIR = "derived"
+REVISION_FILE = "revision.json"
+
+
+def encodings() -> dict[str, tuple[str, str, dict]]:
+    """The encodings this Pillow can write."""
+    return {
+        mime: encoding
+        for mime, encoding in ENCODINGS.items()
+        if features.check(encoding[0])
+    }
+
+
+def atlas_encoding() -> tuple[str, str, dict]:
+    """The atlas encoding this Pillow can write."""
+    return next(
+        encoding for encoding in ATLAS_ENCODINGS
+        if encoding[1] == "JPEG" or features.check(encoding[0])
+    )
+
+
+def widths(width: int) -> list[int]:
+    """Card widths for a source image, never upscaled."""
+    return [w for w in CARD_WIDTHS if w < width] + [min(width, CARD_WIDTHS[-1])]
+
+
+def variant_name(variant: str, width: int, extension: str) -> str:
+    """File name of a derivative, also its key in the store."""
+    return f"{variant}-{width}.{extension}"
+
+
+def derive(job: tuple[Path, str, dict]) -> tuple[int, int, dict[str, bytes]]:
+    """Encode one source image at every width; returns its size and the
+    encoded files by name."""
+    path, variant, available = job
+    with Image.open(path) as source:
+        source.load()
+        size = source.size
+        image = source.convert("RGBA" if "A" in source.getbands() else "RGB")
+    outputs = {}
+    for width in widths(size[0]):
+        height = round(size[1] * width / size[0])
+        resized = image if width == size[0] else image.resize(
+            (width, height), Image.Resampling.LANCZOS
+        )
+        for extension, fmt, options in available.values():
+            buffer = io.BytesIO()
+            resized.save(buffer, fmt, **options)
+            outputs[variant_name(variant, width, extension)] = buffer.getvalue()
+    return size[0], size[1], outputs
+
+
+def compose(paths: list[Path | None]) -> bytes:
+    """One row of TILE_SIZE tiles, each source cropped to fill its tile
+    (None leaves a blank tile)."""
+    tile_width, tile_height = TILE_SIZE
+    atlas = Image.new("RGB", (tile_width * len(paths), tile_height), ATLAS_BACKGROUND)
+    for i, path in enumerate(paths):
+        if path is None:
+            continue
+        with Image.open(path) as source:
+            tile = ImageOps.fit(source.convert("RGBA"), TILE_SIZE,
+                                Image.Resampling.LANCZOS)
+        atlas.paste(tile, (i * tile_width, 0), tile)
+    buffer = io.BytesIO()
+    _, fmt, options = atlas_encoding()
+    atlas.save(buffer, fmt, **options)
+    return buffer.getvalue()
+
+
+def derivatives(root: Path, manifest: dict, hashed: list[tuple[dict, str]],
+                jobs_wanted: int) -> None:
+    """Publish the derivatives of each (item, source SHA-256) and the
+    category atlases, and list them in the manifest."""
+    available = encodings()
+    atlas_extension = atlas_encoding()[0]
+    config = hashlib.sha256(repr((
+        CARD_WIDTHS, TILE_SIZE, ATLAS_TILES, atlas_encoding(), ATLAS_BACKGROUND,
+        sorted(available.items()),
+    )).encode()).hexdigest()
+    index_file = cache_root() / "gallery" / "index.json"
+    store = Store("gallery/store")
+    known = load_json(index_file, {}).get("sources", {})
+
+    # Work out each item's derivatives; decode only sources whose size
+    # isn't known or whose derivatives aren't all in the store.
+    items = []
+    jobs = {}
+    sources: dict[str, list[int]] = {}
+    for item, digest in hashed:
+        source = root / item["image"]
+        variant = hashlib.sha256((digest + config).encode()).hexdigest()[:16]
+        items.append((item, digest, variant))
+        size = known.get(digest)
+        if size is not None:
+            sources[digest] = size
+            names = [
+                variant_name(variant, w, extension)
+                for w in widths(size[0])
+                for extension, _, _ in available.values()
+            ]
+            if all(store.has(name) for name in names):
+                continue
+        jobs[digest] = (source, variant, available)
+
+    # The summary previews of a category are its first items, complete
+    # or not; an atlas is named by its tiles' sources.
+    digests = {id(item): digest for item, digest in hashed}
+    by_category: dict[str, list[dict]] = {}
+    for item in manifest["items"]:
+        if item.get("category"):
+            by_category.setdefault(item["category"], []).append(item)
+    atlases = {}
+    atlas_jobs = {}
+    for category, members in by_category.items():
+        shown = members[:ATLAS_TILES]
+        tiles = [digests.get(id(item)) for item in shown]
+        if not any(tiles):
+            continue
+        key = hashlib.sha256((repr(tiles) + config).encode()).hexdigest()[:16]
+        name = f"atlas-{key}.{atlas_extension}"
+        atlases[category] = (name, shown, tiles)
+        if not store.has(name):
+            atlas_jobs[name] = [
+                root / item["image"] if digest else None
+                for item, digest in zip(shown, tiles)
+            ]
+
+    workers = min(max(1, jobs_wanted), len(jobs) + len(atlas_jobs)) or 1
+    if workers == 1:
+        results = [derive(job) for job in jobs.values()]
+        composed = [compose(job) for job in atlas_jobs.values()]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending = pool.map(compose, atlas_jobs.values())
+            results = list(pool.map(derive, jobs.values()))
+            composed = list(pending)
+    for digest, (width, height, outputs) in zip(jobs, results):
+        sources[digest] = [width, height]
+        for name, data in outputs.items():
+            store.put(name, data)
+    for name, data in zip(atlas_jobs, composed):
+        store.put(name, data)
+
+    derived = root / DERIVED_DIR
+    derived.mkdir(exist_ok=True)
+
+    def publish(name: str) -> str:
+        data = store.get(name)
+        (derived / name).write_bytes(data)
+        return f"{DERIVED_DIR}/{name}"
+
+    source_bytes = 0
+    derived_bytes = dict.fromkeys(available, 0)
+    for item, digest, variant in items:
+        width, height = sources[digest]
+        item["width"], item["height"] = width, height
+        item["srcset"] = {
+            mime: ", ".join(
+                f"{publish(variant_name(variant, w, extension))} {w}w"
+                for w in widths(width)
+            )
+            for mime, (extension, _, _) in available.items()
+        }
+        source_bytes += (root / item["image"]).stat().st_size
+        for mime, (extension, _, _) in available.items():
+            largest = derived / variant_name(variant, widths(width)[-1], extension)
+            derived_bytes[mime] += largest.stat().st_size
+
+    tile_width, tile_height = TILE_SIZE
+    manifest["atlases"] = {}
+    atlas_bytes = preview_bytes = 0
+    for category, (name, shown, tiles) in atlases.items():
+        manifest["atlases"][category] = {
+            "image": publish(name),
+            "width": tile_width * len(shown),
+            "height": tile_height,
+            "tiles": {
+                item["id"]: [i * tile_width, 0, tile_width, tile_height]
+                for i, (item, digest) in enumerate(zip(shown, tiles))
+                if digest
+            },
+        }
+        atlas_bytes += (derived / name).stat().st_size
+        preview_bytes += sum(
+            (root / item["image"]).stat().st_size
+            for item, digest in zip(shown, tiles) if digest
+        )
+
+    save_json(index_file, {"sources": sources})
+    store.evict()
+    largest = "".join(
+        f", largest {mime.removeprefix('image/').upper()} {size} bytes"
+        for mime, size in derived_bytes.items()
+    )
+    print(
+        f"Gallery: {len(items)} image(s), {len(jobs)} encoded; full-size PNG "
+        f"{source_bytes} bytes{largest}"
+    )
+    print(
+        f"Gallery previews: {len(atlases)} atlas(es), {len(atlas_jobs)} composed; "
+        f"{atlas_bytes} bytes instead of {preview_bytes} bytes of PNG"
+    )
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("root", type=Path)
+    ap.add_argument("--jobs", type=int, default=os.cpu_count() or 1)
+    args = ap.parse_args()
+
+    manifest_file = args.root / "manifest.json"
+    manifest = json.loads(manifest_file.read_text(encoding="utf-8"))
+    hashed = []
+    for item in manifest["items"]:
+        source = args.root / item.get("image", "")
+        if item.get("status") == "complete" and source.is_file():
+            digest = sha256_file(source)
+            item["hash"] = digest[:16]
+            hashed.append((item, digest))
+
+    if Image is None:
+        print("Pillow not found; gallery images are served without derivatives",
+              file=sys.stderr)
+    else:
+        derivatives(args.root, manifest, hashed, args.jobs)
+
+    text = json.dumps(manifest, indent=2) + "\n"
+    manifest_file.write_text(text, encoding="utf-8")
+    revision = hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+    (args.root / REVISION_FILE).write_text(
+        json.dumps({"revision": revision}) + "\n", encoding="utf-8"
+    )
+    print(f"Gallery revision {revision}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
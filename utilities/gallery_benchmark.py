@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""Measure how the face-dataset gallery renders a large category.
+
+Usage: gallery_benchmark.py [--items N] [--category ID] [--repeat N]
+                            [--html FILE] [--viewport NAME]
+
+Serves the gallery page (static/face-dataset/index.html, or --html to
+measure another version of it, e.g. one saved from `git show`) with a
+synthetic manifest of --items items (default 2000): one in every other
+category and the rest in --category (default male-multiview), using a
+few generated 1024x1024 PNGs. It opens that category in headless
+Chromium and reports, as the median of --repeat runs (default 3) in
+fresh pages:
+
+- time to first card, from the click on the summary to the first card
+  in the DOM, and to the frame after it;
+- long tasks (main-thread tasks of 50 ms or more) while the category
+  opens and while scrolling to its last card: count, total and longest;
+- cards in the DOM a second after opening, and once scrolled to the end.
+
+Playwright must be available, as for screenshot.py:
+
+    uv run --with playwright python utilities/gallery_benchmark.py
+
+Set CHROME_PATH to a chromium binary when Playwright's own isn't
+installed.
+"""
+from __future__ import annotations
+
+import argparse
+import functools
+import hashlib
+import http.server
+import json
+import os
+import random
+import re
+import statistics
+import struct
+import sys
+import tempfile
+import threading
+import zlib
+from pathlib import Path
+
+from playwright.sync_api import sync_playwright
+
+from screenshot import VIEWPORTS
+
+GALLERY_HTML = Path(__file__).resolve().parent.parent / "static" / "face-dataset" / "index.html"
+IMAGE_SIZE = 1024
+IMAGE_COUNT = 8
+SETTLE_MS = 1000
+
+LONG_TASKS = """
+window.__longTasks = [];
+new PerformanceObserver(list => {
+  for (const entry of list.getEntries()) {
+    window.__longTasks.push([entry.startTime, entry.duration]);
+  }
+}).observe({ type: 'longtask', buffered: true });
+"""
+
+OPEN = """
+async index => {
+  const details = document.querySelectorAll('details.category')[index];
+  const grid = details.querySelector('.category-grid');
+  const firstCard = new Promise(resolve => {
+    const observer = new MutationObserver(() => {
+      if (grid.querySelector('.card')) {
+        observer.disconnect();
+        resolve(performance.now());
+      }
+    });
+    observer.observe(grid, { childList: true });
+  });
+  const start = performance.now();
+  details.querySelector('summary').click();
+  const card = await firstCard;
+  const frame = await new Promise(resolve =>
+    requestAnimationFrame(() => setTimeout(() => resolve(performance.now()), 0)));
+  return { start, card: card - start, frame: frame - start };
+}
+"""
+
+SCROLL = """
+async ([index, expected]) => {
+  const details = document.querySelectorAll('details.category')[index];
+  const nextFrame = () => new Promise(resolve =>
+    requestAnimationFrame(() => requestAnimationFrame(resolve)));
+  const start = performance.now();
+  for (let step = 0; step < 100000; step++) {
+    window.scrollBy(0, innerHeight);
+    await nextFrame();
+    const atEnd = innerHeight + scrollY >= document.documentElement.scrollHeight - 1;
+    if (atEnd && details.querySelectorAll('.card').length >= expected) break;
+  }
+  return { start, duration: performance.now() - start };
+}
+"""
+
+
+def png(width: int, height: int, rng: random.Random) -> bytes:
+    """A noisy RGB PNG, about as costly to decode as a photograph."""
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        body = kind + data
+        return struct.pack(">I", len(data)) + body + struct.pack(">I", zlib.crc32(body))
+
+    rows = b"".join(b"\0" + rng.randbytes(width * 3) for _ in range(height))
+    return (b"\x89PNG\r\n\x1a\n"
+            + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+            + chunk(b"IDAT", zlib.compress(rows, 1))
+            + chunk(b"IEND", b""))
+
+
+def categories(html: str) -> list[str]:
+    """Category ids in the order the page renders them."""
+    block = re.search(r"const categories = \[(.*?)\];", html, re.S)
+    if block is None:
+        raise ValueError("no categories list in the gallery page")
+    return re.findall(r"id: '([\w-]+)'", block.group(1))
+
+
+def write_site(root: Path, html: str, items: int, category: str) -> int:
+    """Write the page, images and manifest; returns the size of the
+    measured category."""
+    rng = random.Random(0)
+    (root / "images").mkdir()
+    for i in range(IMAGE_COUNT):
+        (root / "images" / f"{i}.png").write_bytes(png(IMAGE_SIZE, IMAGE_SIZE, rng))
+    others = [c for c in categories(html) if c != category]
+    members = [category] * (items - len(others)) + others
+    manifest = {
+        "title": "Synthetic gallery",
+        "stage": f"{items} synthetic items",
+        "updated_at": "2026-01-01T00:00:00Z",
+        "items": [
+            {
+                "id": f"synthetic-{i:04d}",
+                "label": f"Synthetic item {i}",
+                "sex": "male" if i % 2 else "female",
+                "status": "complete",
+                "image": f"images/{i % IMAGE_COUNT}.png",
+                "hash": f"{i % IMAGE_COUNT:016x}",
+                "width": IMAGE_SIZE,
+                "height": IMAGE_SIZE,
+                "resolution": f"{IMAGE_SIZE} × {IMAGE_SIZE}",
+                "note": "Generated for gallery_benchmark.py",
+                "category": member,
+            }
+            for i, member in enumerate(members)
+        ],
+    }
+    text = json.dumps(manifest, indent=2) + "\n"
+    (root / "manifest.json").write_text(text, encoding="utf-8")
+    revision = hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+    (root / "revision.json").write_text(json.dumps({"revision": revision}) + "\n",
+                                        encoding="utf-8")
+    (root / "index.html").write_text(html, encoding="utf-8")
+    return len(members) - len(others)
+
+
+class QuietHandler(http.server.SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+def measure(browser, url: str, viewport: dict, index: int, expected: int) -> dict:
+    context = browser.new_context(viewport=viewport, device_scale_factor=1)
+    try:
+        page = context.new_page()
+        page.add_init_script(LONG_TASKS)
+        page.goto(url, wait_until="networkidle", timeout=30000)
+        page.wait_for_selector("details.category")
+        opened = page.evaluate(OPEN, index)
+        page.wait_for_timeout(SETTLE_MS)
+        cards_opened = page.evaluate(
+            "index => document.querySelectorAll('details.category')[index]"
+            ".querySelectorAll('.card').length",
+            index,
+        )
+        scrolled = page.evaluate(SCROLL, [index, expected])
+        page.wait_for_timeout(SETTLE_MS)
+        cards_scrolled = page.evaluate(
+            "index => document.querySelectorAll('details.category')[index]"
+            ".querySelectorAll('.card').length",
+            index,
+        )
+        tasks = page.evaluate("window.__longTasks")
+    finally:
+        context.close()
+
+    def window(begin: float, end: float) -> list[float]:
+        return [duration for start, duration in tasks if begin <= start < end]
+
+    opening = window(opened["start"], scrolled["start"])
+    scrolling = window(scrolled["start"], float("inf"))
+    return {
+        "first card (ms)": opened["card"],
+        "first frame (ms)": opened["frame"],
+        "long tasks opening": len(opening),
+        "long task total opening (ms)": sum(opening),
+        "longest task opening (ms)": max(opening, default=0),
+        "long tasks scrolling": len(scrolling),
+        "long task total scrolling (ms)": sum(scrolling),
+        "longest task scrolling (ms)": max(scrolling, default=0),
+        "scroll to end (ms)": scrolled["duration"],
+        "cards after opening": cards_opened,
+        "cards after scrolling": cards_scrolled,
+    }
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--items", type=int, default=2000)
+    ap.add_argument("--category", default="male-multiview")
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--html", type=Path, default=GALLERY_HTML)
+    ap.add_argument("--viewport", choices=list(VIEWPORTS), default="desktop")
+    args = ap.parse_args()
+
+    html = args.html.read_text(encoding="utf-8")
+    order = categories(html)
+    if args.category not in order:
+        print(f"unknown category {args.category}; one of {', '.join(order)}",
+              file=sys.stderr)
+        return 1
+
+    with tempfile.TemporaryDirectory(prefix="gallery-benchmark-") as tmp:
+        root = Path(tmp)
+        expected = write_site(root, html, args.items, args.category)
+        handler = functools.partial(QuietHandler, directory=str(root))
+        httpd = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        threading.Thread(target=httpd.serve_forever, daemon=True).start()
+        url = f"http://127.0.0.1:{httpd.server_port}/index.html"
+        runs = []
+        try:
+            with sync_playwright() as p:
+                kwargs = {"headless": True}
+                if os.environ.get("CHROME_PATH"):
+                    kwargs["executable_path"] = os.environ["CHROME_PATH"]
+                browser = p.chromium.launch(**kwargs)
+                try:
+                    for _ in range(args.repeat):
+                        runs.append(measure(browser, url, VIEWPORTS[args.viewport],
+                                            order.index(args.category), expected))
+                finally:
+                    browser.close()
+        finally:
+            httpd.shutdown()
+            httpd.server_close()
+
+    print(f"{args.html.name}: {args.category} with {expected} of {args.items} items, "
+          f"{args.viewport}, median of {len(runs)} run(s)")
+    for metric in runs[0]:
+        value = statistics.median(run[metric] for run in runs)
+        print(f"  {metric:<32} {value:>10.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -2,11 +2,18 @@
 #
 # Helpers shared by build and render for producing LaTeX document artifacts.
 #
-# Every artifact is stamped with the SHA-384 hash of its .tex source so the
-# build can detect whether the source changed since the artifact was last
-# generated: PDFs carry it in XMP metadata, HTML in a <meta> tag.
+# Every artifact is stamped with the SHA-384 hash of its .tex source and
+# every local file it reads (see utilities/latexdeps.py) so the build can
+# detect whether any input changed since the artifact was last generated:
+# PDFs carry it in XMP metadata, HTML in a <meta> tag.
 
-getlatexhash() { openssl dgst -sha384 -r "$1" | cut -d ' ' -f 1; }
+# The dependency graph is kept in the build cache, so unchanged documents
+# are answered from file stats alone.
+getlatexhash()
+{
+    python3 "${hugo_repo_dir:?}/utilities/latexdeps.py" \
+        --cache "$(buildcachedir)/deps" hash "$1"
+}
 
 # Bump when HTML post-processing changes (head fix-ups, style conversion,
 # CSP) so published documents regenerate despite unchanged .tex sources.
@@ -14,17 +21,51 @@ latexml_pipeline_version=1
 
 getpdfhash()   { exiftool -XMP-pdfx:texhash -b "$1"; }
 
-# Tolerates prettier's reformatting (attributes split across lines).
-gethtmlhash()
+# Reads <meta name="$2" content="...">. Tolerates prettier's reformatting
+# (attributes split across lines) and either attribute order, since
+# BeautifulSoup writes content before name.
+gethtmlmeta()
 {
-    tr -d '\n' < "$1" 2>/dev/null \
-        | sed -n 's/.*name="texhash"[[:space:]]*content="\([0-9a-f]*\)".*/\1/p'
+    tr -d '\n' 2>/dev/null < "$1" \
+        | grep -o "<meta[^>]*name=\"$2\"[^>]*>" \
+        | sed -n 's/.*content="\([^"]*\)".*/\1/p'
 }
 
-gethtmlpipeline()
+gethtmlhash()     { gethtmlmeta "$1" texhash; }
+gethtmlpipeline() { gethtmlmeta "$1" latexml-pipeline; }
+
+# Versions of the tools that produce an artifact format, recorded in the
+# build-state index (utilities/buildstate.py) next to each artifact.
+gettoolchain()
 {
-    tr -d '\n' < "$1" 2>/dev/null \
-        | sed -n 's/.*name="latexml-pipeline"[[:space:]]*content="\([0-9]*\)".*/\1/p'
+    case $1 in
+        pdf)
+            latexmk -v 2>/dev/null | grep -m 1 -i 'version'
+            pdftex --version 2>/dev/null | head -n 1
+        ;;
+        html)
+            # latexmlc reports its version on stderr
+            latexmlc --VERSION 2>&1 | head -n 1
+        ;;
+    esac | paste -sd ';' -
+}
+
+# Compiles a .tex file in the current directory to PDF, copying it to
+# $2. Auxiliary files (.aux, .bbl, .bcf, .toc, ...) live in a directory
+# in the build cache keyed by the document's path, and survive between
+# runs: latexmk then reruns only the passes whose inputs changed, and a
+# small edit usually converges in a single pdflatex pass. The PDF stays
+# there too, so latexmk can tell the previous run was complete.
+compilepdf()
+{
+    local tex_file="$1"
+    local pdf_file="$2"
+    local aux_dir
+    aux_dir="$(buildcachedir)/aux/$(printf '%s' "$(pwd -P)/$tex_file" \
+        | sha256sum | cut -c 1-16)"
+    mkdir -p "$aux_dir" || return 1
+    latexmk -quiet -pdf -outdir="$aux_dir" "$tex_file" || return 1
+    cp "$aux_dir/$(basename "${tex_file%.tex}").pdf" "$pdf_file"
 }
 
 markpdf()
@@ -55,18 +96,67 @@ markpdf()
     rm -f "$config"
 }
 
+# LaTeXML conversion servers (latexmls) avoid reloading Perl and the
+# binding tables for every document. Servers listen on consecutive ports
+# from $latexml_server_base and exit after $latexml_server_expire idle
+# seconds, so later builds and renders reuse them.
+latexml_server_base=${LATEXML_SERVER_PORT:-3454}
+latexml_server_expire=600
+
+latexmlserverup() { (exec 3<>"/dev/tcp/127.0.0.1/$1") 2>/dev/null; }
+
+# Makes sure a server is listening on port $1, starting one if needed.
+# Fails if latexmls is not installed or doesn't come up.
+startlatexmlserver()
+{
+    local port=$1 tries
+    latexmlserverup "$port" && return 0
+    command -v latexmls >/dev/null 2>&1 || return 1
+    # started from a subshell so it is not a child the build waits for
+    (latexmls --port="$port" --expire="$latexml_server_expire" \
+        </dev/null >/dev/null 2>&1 &)
+    for tries in {1..100}
+    do
+        latexmlserverup "$port" && return 0
+        sleep 0.1
+    done
+    return 1
+}
+
 # Converts a .tex file to HTML with latexmlc (--nodefaultresources so
-# nothing is copied next to the document) and finishes the <head> with
-# utilities/latexml_postprocess.py: shared stylesheet links, favicon,
-# per-page CSP, inline-style conversion, and the texhash stamp.
-renderhtml()
+# nothing is copied next to the document). The result still needs
+# utilities/latexml_postprocess.py; build batches that step across all
+# converted documents, renderhtml runs it for one.
+#
+# With $latexml_server set to a port, the conversion is sent to the
+# server there, with the same options; if that fails, it falls back to
+# a one-shot latexmlc. Paths are absolute since the server runs
+# elsewhere.
+converthtml()
 {
     local tex_file="$1"
     local html_file="$2"
+    local -a options=(--nodefaultresources)
 
     local latexml_log
     latexml_log=$(mktemp) || return 1
-    if ! latexmlc --nodefaultresources \
+    if [[ -n "${latexml_server:-}" ]]
+    then
+        if latexmlc "${options[@]}" \
+            --expire="$latexml_server_expire" --port="$latexml_server" \
+            --sourcedirectory="$PWD" --path="$PWD" \
+            --log="$latexml_log" \
+            --dest="$html_file" \
+            "$PWD/$tex_file" >/dev/null 2>&1 && [[ -s "$html_file" ]]
+        then
+            grep '^Error:' "$latexml_log" >&2 || true
+            rm -f "$latexml_log"
+            return 0
+        fi
+        >&2 echo "LaTeXML server on port $latexml_server failed; converting $tex_file directly"
+        : > "$latexml_log"
+    fi
+    if ! latexmlc "${options[@]}" \
         --log="$latexml_log" \
         --dest="$html_file" \
         "$tex_file" >/dev/null 2>&1
@@ -80,7 +170,17 @@ renderhtml()
     # without failing the build.
     grep '^Error:' "$latexml_log" >&2 || true
     rm -f "$latexml_log"
+}
+
+# Converts a .tex file to HTML and finishes the <head> with
+# utilities/latexml_postprocess.py: shared stylesheet links, favicon,
+# per-page CSP, inline-style conversion, and the texhash stamp.
+renderhtml()
+{
+    local tex_file="$1"
+    local html_file="$2"
 
+    converthtml "$tex_file" "$html_file" || return 1
     local hash
     hash=$(getlatexhash "$tex_file") || return 1
     python3 "${hugo_repo_dir:?}/utilities/latexml_postprocess.py" \
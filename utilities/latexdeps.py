@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""Hash a LaTeX document together with every local file it reads.
+
+Usage: latexdeps.py [--cache DIR] hash <file.tex>
+       latexdeps.py [--cache DIR] deps <file.tex>
+
+The document hash stamped into build artifacts must change whenever any
+input changes, not just the root .tex file. Inputs are discovered by
+scanning the sources, recursively:
+
+- \\input, \\include and \\subfile'd .tex files,
+- \\bibliography / \\addbibresource databases and local \\bibliographystyle
+  .bst files,
+- local .sty and .cls files named by \\usepackage, \\RequirePackage and
+  \\documentclass,
+- LaTeXML bindings (<name>.sty.ltxml, <name>.cls.ltxml, <name>.tex.ltxml)
+  beside any of those,
+- \\includegraphics images.
+
+Only files that exist beside the document count; anything else comes
+from the TeX distribution.
+
+The hash is SHA-384 over "<sha384>  <path>" lines, root first and then
+dependencies sorted by path, with paths relative to the document's
+directory so the result doesn't depend on the caller's directory.
+
+With --cache, the dependency graph (each file's size, mtime, and hash,
+plus the candidate paths that did not exist) is saved per document.
+While none of those files changed and no candidate appeared, the next
+run answers from the graph without reading or scanning any source.
+"""
+
+import hashlib
+import json
+import os
+import re
+import sys
+from pathlib import Path
+
+COMMENT = re.compile(r"(?<!\\)%.*")
+COMMAND = re.compile(
+    r"\\(input|include|subfile|bibliography|addbibresource|bibliographystyle"
+    r"|usepackage|RequirePackage|documentclass|LoadClass|includegraphics)"
+    r"\*?\s*(?:\[[^\]]*\]\s*)*(?:\{([^}]*)\}|\s+([^\s{}\\]+))"
+)
+GRAPHICS_EXTENSIONS = ["", ".pdf", ".png", ".jpg", ".jpeg", ".eps"]
+
+
+def candidates(command: str, name: str) -> list[list[str]]:
+    """Alternative file names for one argument of a command. Each inner
+    list is tried in order and the first existing file is the dependency;
+    every name in a list is a candidate whose appearance invalidates the
+    graph."""
+    match command:
+        case "input" | "include" | "subfile":
+            stem = name.removesuffix(".tex")
+            return [[f"{stem}.tex", name], [f"{stem}.tex.ltxml"]]
+        case "bibliography":
+            return [[f"{name.removesuffix('.bib')}.bib"]]
+        case "addbibresource":
+            return [[name]]
+        case "bibliographystyle":
+            return [[f"{name}.bst"]]
+        case "usepackage" | "RequirePackage":
+            return [[f"{name}.sty"], [f"{name}.sty.ltxml"]]
+        case "documentclass" | "LoadClass":
+            return [[f"{name}.cls"], [f"{name}.cls.ltxml"]]
+        case "includegraphics":
+            return [[name + ext for ext in GRAPHICS_EXTENSIONS]]
+    return []
+
+
+def scan(root: Path) -> tuple[list[str], list[str]]:
+    """Return (dependencies, missing candidates) of a document, as paths
+    relative to its directory."""
+    base = root.parent
+    found: list[str] = []
+    missing: set[str] = set()
+    pending = [root.name]
+    seen = {root.name}
+    while pending:
+        text = (base / pending.pop()).read_text(encoding="utf-8", errors="replace")
+        text = "\n".join(COMMENT.sub("", line) for line in text.splitlines())
+        for match in COMMAND.finditer(text):
+            command = match.group(1)
+            args = match.group(2) if match.group(2) is not None else match.group(3)
+            for name in (arg.strip() for arg in args.split(",")):
+                if not name:
+                    continue
+                for alternatives in candidates(command, name):
+                    for candidate in alternatives:
+                        path = os.path.normpath(candidate)
+                        if (base / path).is_file():
+                            if path not in seen:
+                                seen.add(path)
+                                found.append(path)
+                                if path.endswith((".tex", ".sty", ".cls")):
+                                    pending.append(path)
+                            break
+                        missing.add(path)
+    return sorted(found), sorted(missing - seen)
+
+
+def sha384_file(path: Path) -> str:
+    return hashlib.sha384(path.read_bytes()).hexdigest()
+
+
+def combine(digests: list[tuple[str, str]]) -> str:
+    lines = "".join(f"{digest}  {path}\n" for path, digest in digests)
+    return hashlib.sha384(lines.encode("utf-8")).hexdigest()
+
+
+def stat_key(path: Path) -> list[int]:
+    st = path.stat()
+    return [st.st_size, st.st_mtime_ns]
+
+
+def graph_file(cache: Path, root: Path) -> Path:
+    key = hashlib.sha256(str(root).encode("utf-8")).hexdigest()
+    return cache / f"{key}.json"
+
+
+def load_graph(cache: Path, root: Path) -> dict | None:
+    """The saved graph for a document, if it is still accurate."""
+    try:
+        graph = json.loads(graph_file(cache, root).read_text(encoding="utf-8"))
+        base = root.parent
+        for path, (size, mtime, _) in graph["files"].items():
+            if stat_key(base / path) != [size, mtime]:
+                return None
+        if any((base / path).exists() for path in graph["missing"]):
+            return None
+        return graph
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def build_graph(root: Path) -> dict:
+    deps, missing = scan(root)
+    base = root.parent
+    files = {}
+    digests = []
+    for path in [root.name] + deps:
+        digest = sha384_file(base / path)
+        files[path] = stat_key(base / path) + [digest]
+        digests.append((path, digest))
+    return {"files": files, "missing": missing, "hash": combine(digests)}
+
+
+def save_graph(cache: Path, root: Path, graph: dict) -> None:
+    cache.mkdir(parents=True, exist_ok=True)
+    target = graph_file(cache, root)
+    tmp = target.with_suffix(f".{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(graph, indent=1, sort_keys=True), encoding="utf-8")
+    os.replace(tmp, target)
+
+
+def document_graph(root: Path, cache: Path | None = None) -> dict:
+    root = root.resolve()
+    graph = load_graph(cache, root) if cache else None
+    if graph is None:
+        graph = build_graph(root)
+        if cache:
+            save_graph(cache, root, graph)
+    return graph
+
+
+def document_hash(root: Path, cache: Path | None = None) -> str:
+    """SHA-384 of a document and all local files it reads."""
+    return document_graph(root, cache)["hash"]
+
+
+def main() -> int:
+    args = sys.argv[1:]
+    cache = None
+    if args[:1] == ["--cache"]:
+        cache = Path(args[1])
+        args = args[2:]
+    if len(args) != 2 or args[0] not in ("hash", "deps"):
+        print("\n".join(__doc__.splitlines()[2:4]), file=sys.stderr)
+        return 2
+    command, root = args[0], Path(args[1])
+    graph = document_graph(root, cache)
+    if command == "hash":
+        print(graph["hash"])
+    else:
+        base = root.resolve().parent
+        for path in sorted(graph["files"]):
+            print(base / path)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
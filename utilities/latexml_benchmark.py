@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""Compare the latexml_postprocess.py engines on synthetic documents.
+
+Usage: latexml_benchmark.py [--sizes MB[,MB...]] [--repeat N]
+
+Generates LaTeXML-shaped HTML documents (sections of paragraphs with
+styled spans, inline MathML, tables, and the generated
+footer) of the given sizes (default 1, 10 and 50 MB) and post-processes
+each with both engines. Every run happens in a fresh interpreter so its
+peak RSS is its own; the best time of --repeat runs (default 3) is
+reported, along with whether both engines wrote identical bytes.
+"""
+
+import argparse
+import hashlib
+import os
+import random
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+SCRIPT = Path(__file__).resolve()
+ENGINES = ["bs4", "lxml"]
+
+HEAD = """<!DOCTYPE html><html lang="en">
+<head>
+<meta http-equiv="content-type" content="text/html; charset=UTF-8">
+<title>Synthetic document</title>
+<meta name="viewport" content="width=device-width, initial-scale=1, shrink-to-fit=no">
+</head>
+<body>
+<div class="ltx_page_main">
+<div class="ltx_page_content">
+<article class="ltx_document ltx_authors_1line">
+"""
+FOOT = """</article>
+</div>
+<footer class="ltx_page_footer">
+<div class="ltx_page_logo">Generated by
+<a href="http://dlmf.nist.gov/LaTeXML/" class="ltx_LaTeXML_logo">
+<span style="font-size:90%; position:relative; bottom:-0.2ex;">LaTeXML</span></a>
+</div></footer>
+</div>
+</body>
+</html>
+"""
+SIZES = ["80%", "90%", "120%", "144%", "173%", "207%"]
+WORDS = ["the", "face", "recognition", "of", "données", "&amp;", "&lt;x&gt;", "“q”"]
+
+
+def inline_math(rng: random.Random) -> str:
+    a, b = rng.choice("xyzabn"), rng.choice("ijkmpq")
+    return (
+        f'<math xmlns="http://www.w3.org/1998/Math/MathML" id="p{rng.random():.6f}.m1"'
+        f' class="ltx_Math" alttext="{a}_{{{b}}}&lt;1" display="inline">'
+        f"<semantics><mrow><msub><mi>{a}</mi><mi>{b}</mi></msub><mo>&lt;</mo>"
+        f"<mn>1</mn></mrow><annotation encoding=\"application/x-tex\">"
+        f"{a}_{{{b}}}&lt;1</annotation></semantics></math>"
+    )
+
+
+def paragraph(rng: random.Random, n: int) -> str:
+    words = []
+    for _ in range(rng.randint(40, 120)):
+        roll = rng.random()
+        if roll < 0.05:
+            words.append(inline_math(rng))
+        elif roll < 0.08:
+            words.append(
+                f'<span class="ltx_text" style="font-size:{rng.choice(SIZES)};">'
+                "emphasis</span>"
+            )
+        elif roll < 0.09:
+            words.append(
+                f'<span class="ltx_rule" style="width:{rng.randint(1, 40)}.0pt;'
+                'height:0.4pt;background:black;display:inline-block;">&nbsp;</span>'
+            )
+        else:
+            words.append(rng.choice(WORDS))
+    return (
+        f'<div id="p{n}" class="ltx_para">\n<p class="ltx_p">'
+        + " ".join(words)
+        + "</p>\n</div>\n"
+    )
+
+
+def table(rng: random.Random, n: int) -> str:
+    rows = "".join(
+        '<tr class="ltx_tr">'
+        + "".join(
+            f'<td class="ltx_td ltx_align_center" style="padding-left:{p}pt;">{v}</td>'
+            for p, v in ((rng.choice([2, 4]), rng.randint(0, 999)) for _ in range(4))
+        )
+        + "</tr>\n"
+        for _ in range(8)
+    )
+    return (
+        f'<figure id="T{n}" class="ltx_table">'
+        '<table class="ltx_tabular ltx_align_middle">\n'
+        f'<tbody class="ltx_tbody">\n{rows}</tbody></table></figure>\n'
+    )
+
+
+def generate(path: Path, megabytes: int, seed: int = 1) -> None:
+    rng = random.Random(seed)
+    target = megabytes * 1024 * 1024
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(HEAD)
+        written, n = len(HEAD), 0
+        while written < target:
+            n += 1
+            part = (
+                f'<section id="S{n}" class="ltx_section">\n'
+                f'<h2 class="ltx_title ltx_title_section">Section {n}</h2>\n'
+            )
+            part += "".join(paragraph(rng, n * 100 + i) for i in range(6))
+            part += table(rng, n) + "</section>\n"
+            f.write(part)
+            written += len(part.encode("utf-8"))
+        f.write(FOOT)
+
+
+def measure(engine: str, source: Path, work: Path) -> tuple[float, float, str]:
+    """Post-process a copy of source in a fresh interpreter; return
+    (seconds, peak RSS in MB, output SHA-256)."""
+    shutil.copy(source, work)
+    result = subprocess.run(
+        [sys.executable, SCRIPT, "--run", engine, str(work)],
+        check=True, capture_output=True, text=True,
+    )
+    seconds, rss = result.stdout.split()
+    return float(seconds), float(rss), hashlib.sha256(work.read_bytes()).hexdigest()
+
+
+def run(engine: str, path: str) -> None:
+    sys.path.insert(0, str(SCRIPT.parent))
+    from latexml_postprocess import postprocess
+
+    start = time.perf_counter()
+    postprocess(path, "0" * 96, "bench", engine)
+    seconds = time.perf_counter() - start
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    rss_mb = rss / 1024 / (1024 if sys.platform == "darwin" else 1)
+    print(f"{seconds:.4f} {rss_mb:.1f}")
+
+
+def main() -> int:
+    if sys.argv[1:2] == ["--run"]:
+        run(sys.argv[2], sys.argv[3])
+        return 0
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--sizes", default="1,10,50")
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    print(f"{'size':>6} {'engine':>6} {'time':>9} {'peak RSS':>10}  output")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in (int(s) for s in args.sizes.split(",")):
+            source = Path(tmp) / f"doc-{size}mb.html"
+            generate(source, size)
+            digests = {}
+            for engine in ENGINES:
+                runs = [
+                    measure(engine, source, Path(tmp) / "work.html")
+                    for _ in range(max(1, args.repeat))
+                ]
+                seconds = min(r[0] for r in runs)
+                rss = min(r[1] for r in runs)
+                digests[engine] = runs[0][2]
+                same = digests[engine] == digests[ENGINES[0]]
+                print(
+                    f"{size:>4}MB {engine:>6} {seconds:>8.2f}s {rss:>7.0f} MB  "
+                    + ("identical" if same else "DIFFERS")
+                )
+            os.unlink(source)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -2,6 +2,8 @@
 """Finish the <head> of a LaTeXML-generated HTML document.
 
 Usage: latexml_postprocess.py <file.html> <texhash> <pipeline-version>
+       latexml_postprocess.py --pipeline VERSION [--jobs N] [--engine bs4|lxml]
+                              <file.html> <texhash> [<file.html> <texhash>...]
 
 LaTeXML output is post-processed so each document is self-contained,
 site-styled, and carries a strict per-page Content-Security-Policy:
@@ -21,14 +23,28 @@ site-styled, and carries a strict per-page Content-Security-Policy:
 NOTE: the CSP hash covers the exact bytes of the <style> element, so
 generated documents must not be reformatted afterwards (public/docs/
 is excluded in .prettierignore).
+
+The second form processes many documents in one interpreter, so the
+build pays for importing BeautifulSoup and lxml once rather than per
+document; with --jobs > 1 documents are spread over a process pool.
+Each document's output is the same as from the single-file form.
+
+--engine lxml selects a streaming implementation of the same rewrite
+(see rewrite_lxml) that writes byte-identical output several times
+faster and in a fraction of the memory; utilities/latexml_benchmark.py
+compares the two.
 """
 
+import argparse
 import base64
 import hashlib
+import os
 import re
 import sys
+from concurrent.futures import ProcessPoolExecutor
 
 from bs4 import BeautifulSoup
+from lxml import etree
 
 CHARSET_LEGACY = {"http-equiv": "content-type"}
 STYLESHEETS = [
@@ -55,14 +71,39 @@ def class_name(value: str, taken: dict[str, str]) -> str:
     return name
 
 
-def main() -> None:
-    path, texhash, pipeline = sys.argv[1], sys.argv[2], sys.argv[3]
-    with open(path, encoding="utf-8") as f:
-        soup = BeautifulSoup(f, "lxml")
+def stylesheet(rules: dict[str, str]) -> str:
+    """The document <style> text for the converted inline styles."""
+    return "\n" + "".join(
+        f".{name} {{ {value}; }}\n" for name, value in sorted(rules.items())
+    )
+
+
+def csp_policy(css_text: str | None) -> str:
+    """Per-page CSP, stricter than the site's: no scripts at all."""
+    style_src = "'self'"
+    if css_text is not None:
+        digest = hashlib.sha256(css_text.encode("utf-8")).digest()
+        style_src += f" 'sha256-{base64.b64encode(digest).decode()}'"
+    return (
+        "default-src 'none'; "
+        "img-src 'self'; "
+        f"style-src {style_src}; "
+        "font-src 'self'; "
+        "base-uri 'none'; "
+        "form-action 'none'"
+    )
+
+
+def style_value(style: str) -> str:
+    return re.sub(r"\s+", " ", style).strip().rstrip(";")
+
+
+def rewrite_bs4(text: str, texhash: str, pipeline: str) -> str:
+    soup = BeautifulSoup(text, "lxml")
 
     head = soup.head
     if head is None:
-        sys.exit(f"no <head> in {path}")
+        raise ValueError("no <head>")
 
     legacy = head.find("meta", attrs=CHARSET_LEGACY)
     if legacy is not None:
@@ -79,42 +120,27 @@ def main() -> None:
     taken: dict[str, str] = {}
     rules: dict[str, str] = {}
     for el in soup.select("[style]"):
-        value = re.sub(r"\s+", " ", el["style"]).strip().rstrip(";")
+        value = style_value(el["style"])
         del el["style"]
         if not value:
             continue
         name = class_name(value, taken)
         rules[name] = value
         el["class"] = el.get("class", []) + [name]
+    css_text = stylesheet(rules) if rules else None
 
-    style_src = "'self'"
-    if rules:
-        css_text = "\n" + "".join(
-            f".{name} {{ {value}; }}\n" for name, value in sorted(rules.items())
-        )
-        digest = hashlib.sha256(css_text.encode("utf-8")).digest()
-        style_src += f" 'sha256-{base64.b64encode(digest).decode()}'"
-
-    # Per-page CSP, stricter than the site's: no scripts at all. Meta
-    # CSP must precede the resources it governs, so it goes second in
-    # the head (after the charset declaration).
+    # Meta CSP must precede the resources it governs, so it goes second
+    # in the head (after the charset declaration).
     csp = soup.new_tag("meta")
     csp["http-equiv"] = "Content-Security-Policy"
-    csp["content"] = (
-        "default-src 'none'; "
-        "img-src 'self'; "
-        f"style-src {style_src}; "
-        "font-src 'self'; "
-        "base-uri 'none'; "
-        "form-action 'none'"
-    )
+    csp["content"] = csp_policy(css_text)
     head.insert(1, csp)
 
     for attrs in FAVICONS:
         head.append(soup.new_tag("link", rel="icon", **attrs))
     for href in STYLESHEETS:
         head.append(soup.new_tag("link", rel="stylesheet", href=href, type="text/css"))
-    if rules:
+    if css_text is not None:
         style = soup.new_tag("style")
         style.string = css_text
         head.append(style)
@@ -122,10 +148,284 @@ def main() -> None:
     head.append(
         soup.new_tag("meta", attrs={"name": "latexml-pipeline", "content": pipeline})
     )
+    return str(soup)
+
+
+# The lxml engine makes the same changes in a single streaming pass: a
+# parser target receives lxml's parse events (the ones BeautifulSoup
+# builds its tree from) and writes the output as they arrive, without
+# building a tree at all. Only the <head> additions wait for the end of
+# the document, since the CSP hash depends on every style attribute.
+# Output is byte-identical to str(soup) with the "minimal" formatter,
+# which is what the rules below reproduce: whitespace-only strings
+# collapse to one space or newline outside <pre> and <textarea>,
+# attributes are sorted, multi-valued attributes are normalized, void
+# elements close with "/>", and only &, < and > are escaped (not at all
+# in <script> and <style>).
 
+ASCII_SPACES = " \n\t\x0c\r"
+PRESERVE_WHITESPACE = {"pre", "textarea"}
+RAW_TEXT = {"script", "style"}
+VOID_ELEMENTS = {
+    "area", "base", "basefont", "bgsound", "br", "col", "command", "embed",
+    "frame", "hr", "image", "img", "input", "isindex", "keygen", "link",
+    "menuitem", "meta", "nextid", "param", "source", "spacer", "track", "wbr",
+}
+LIST_ATTRIBUTES = {
+    "*": {"class", "accesskey", "dropzone"},
+    "a": {"rel", "rev"},
+    "link": {"rel", "rev"},
+    "td": {"headers"},
+    "th": {"headers"},
+    "form": {"accept-charset"},
+    "object": {"archive"},
+    "area": {"rel"},
+    "icon": {"sizes"},
+    "iframe": {"sandbox"},
+    "output": {"for"},
+}
+META_CHARSET = re.compile(r"((^|;)\s*charset=)([^;]*)", re.M)
+ESCAPES = {"&": "&amp;", "<": "&lt;", ">": "&gt;"}
+ESCAPED = re.compile("[<>&]")
+TOKENS = re.compile(r"\S+")
+
+
+def escape(text: str) -> str:
+    return ESCAPED.sub(lambda m: ESCAPES[m.group(0)], text)
+
+
+def start_tag(name: str, attrs: dict[str, str], void: bool = False) -> str:
+    parts = [name]
+    for key, value in sorted(attrs.items()):
+        value = escape(value)
+        quote = '"'
+        if '"' in value:
+            if "'" in value:
+                value = value.replace('"', "&quot;")
+            else:
+                quote = "'"
+        parts.append(f"{key}={quote}{value}{quote}")
+    return "<" + " ".join(parts) + ("/>" if void else ">")
+
+
+class StreamRewriter:
+    """lxml parser target that writes the post-processed document."""
+
+    def __init__(self, texhash: str, pipeline: str):
+        self.texhash = texhash
+        self.pipeline = pipeline
+        self.out: list[str] = []
+        self.text: list[str] = []
+        # open elements: (name, index of the start tag in out)
+        self.open: list[tuple[str, int]] = []
+        self.preserve = 0
+        self.skip = 0
+        self.head_start: int | None = None
+        self.head_end: int | None = None
+        self.in_head = False
+        self.legacy_found = False
+        self.taken: dict[str, str] = {}
+        self.rules: dict[str, str] = {}
+
+    def flush(self) -> None:
+        if not self.text:
+            return
+        data = "".join(self.text)
+        self.text = []
+        if self.skip:
+            return
+        if not self.preserve and not data.strip(ASCII_SPACES):
+            data = "\n" if "\n" in data else " "
+        parent = self.open[-1][0] if self.open else None
+        self.out.append(data if parent in RAW_TEXT else escape(data))
+
+    def preformatted(self, prefix: str, data: str, suffix: str) -> None:
+        self.flush()
+        if self.skip:
+            return
+        if not self.preserve and not data.strip(ASCII_SPACES):
+            data = "\n" if "\n" in data else " "
+        self.out.append(prefix + data + suffix)
+
+    def start(self, tag: str, attrib, nsmap=None) -> None:
+        self.flush()
+        attrs = dict(attrib)
+        if tag in PRESERVE_WHITESPACE:
+            self.preserve += 1
+        if self.skip:
+            self.skip += 1
+            self.open.append((tag, -1))
+            return
+        if (
+            tag == "meta"
+            and self.in_head
+            and not self.legacy_found
+            and attrs.get("http-equiv") == CHARSET_LEGACY["http-equiv"]
+        ) or "ltx_page_footer" in TOKENS.findall(attrs.get("class", "")):
+            self.legacy_found = self.legacy_found or tag == "meta"
+            self.skip = 1
+            self.open.append((tag, -1))
+            return
+
+        list_attrs = LIST_ATTRIBUTES["*"] | LIST_ATTRIBUTES.get(tag, set())
+        for key in list_attrs & attrs.keys():
+            attrs[key] = " ".join(TOKENS.findall(attrs[key]))
+        if tag == "meta":
+            if "charset" in attrs:
+                attrs["charset"] = "utf-8"
+            elif "content" in attrs and (
+                attrs.get("http-equiv", "").lower() == "content-type"
+            ):
+                attrs["content"] = META_CHARSET.sub(
+                    lambda m: m.group(1) + "utf-8", attrs["content"]
+                )
+        if "style" in attrs:
+            value = style_value(attrs.pop("style"))
+            if value:
+                name = class_name(value, self.taken)
+                self.rules[name] = value
+                attrs["class"] = " ".join(
+                    TOKENS.findall(attrs.get("class", "")) + [name]
+                )
+
+        self.open.append((tag, len(self.out)))
+        self.out.append(start_tag(tag, attrs))
+        if tag == "head" and self.head_start is None:
+            self.in_head = True
+            self.head_start = len(self.out)
+            self.out.append("")
+
+    def end(self, tag: str) -> None:
+        self.flush()
+        name, index = self.open.pop()
+        if name in PRESERVE_WHITESPACE:
+            self.preserve -= 1
+        if self.skip:
+            self.skip -= 1
+            return
+        if name == "head" and self.in_head:
+            self.in_head = False
+            self.head_end = len(self.out)
+            self.out.append("")
+        if name in VOID_ELEMENTS and index == len(self.out) - 1:
+            self.out[index] = self.out[index][:-1] + "/>"
+        else:
+            self.out.append(f"</{name}>")
+
+    def data(self, data: str) -> None:
+        self.text.append(data)
+
+    def comment(self, text: str) -> None:
+        self.preformatted("<!--", text, "-->")
+
+    def doctype(self, name: str, pubid: str | None, system: str | None) -> None:
+        value = name or ""
+        if pubid is not None:
+            value += f' PUBLIC "{pubid}"'
+            if system is not None:
+                value += f' "{system}"'
+        elif system is not None:
+            value += f' SYSTEM "{system}"'
+        self.preformatted("<!DOCTYPE ", value, ">\n")
+
+    def pi(self, target: str, data: str) -> None:
+        self.preformatted("<?", f"{target} {data}", ">")
+
+    def close(self) -> str:
+        self.flush()
+        if self.head_start is None:
+            raise ValueError("no <head>")
+        css_text = stylesheet(self.rules) if self.rules else None
+        self.out[self.head_start] = start_tag(
+            "meta", {"charset": "utf-8"}, void=True
+        ) + start_tag(
+            "meta",
+            {"http-equiv": "Content-Security-Policy", "content": csp_policy(css_text)},
+            void=True,
+        )
+        tail = [start_tag("link", {"rel": "icon", **attrs}, void=True)
+                for attrs in FAVICONS]
+        tail += [
+            start_tag(
+                "link", {"rel": "stylesheet", "href": href, "type": "text/css"},
+                void=True,
+            )
+            for href in STYLESHEETS
+        ]
+        if css_text is not None:
+            tail.append(f"<style>{css_text}</style>")
+        tail.append(
+            start_tag("meta", {"name": "texhash", "content": self.texhash}, void=True)
+        )
+        tail.append(
+            start_tag(
+                "meta", {"name": "latexml-pipeline", "content": self.pipeline},
+                void=True,
+            )
+        )
+        if self.head_end is not None:
+            self.out[self.head_end] = "".join(tail)
+        return "".join(self.out)
+
+
+def rewrite_lxml(text: str, texhash: str, pipeline: str) -> str:
+    parser = etree.HTMLParser(target=StreamRewriter(texhash, pipeline), recover=True)
+    parser.feed(text.removeprefix("\N{BYTE ORDER MARK}"))
+    return parser.close()
+
+
+ENGINES = {"bs4": rewrite_bs4, "lxml": rewrite_lxml}
+
+
+def postprocess(path: str, texhash: str, pipeline: str, engine: str = "bs4") -> None:
+    with open(path, encoding="utf-8") as f:
+        text = f.read()
+    try:
+        html = ENGINES[engine](text, texhash, pipeline)
+    except ValueError as e:
+        raise ValueError(f"{e} in {path}") from None
     with open(path, "w", encoding="utf-8") as f:
-        f.write(str(soup))
+        f.write(html)
+
+
+def run(job: tuple[str, str, str, str]) -> str | None:
+    """Process one document, returning an error message on failure."""
+    try:
+        postprocess(*job)
+    except (OSError, ValueError) as e:
+        return str(e)
+    return None
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--pipeline")
+    ap.add_argument("--jobs", type=int, default=os.cpu_count() or 1)
+    ap.add_argument("--engine", choices=ENGINES, default="bs4")
+    ap.add_argument("args", nargs="+")
+    args = ap.parse_args()
+    if args.pipeline is None:
+        if len(args.args) != 3:
+            ap.error("expected <file.html> <texhash> <pipeline-version>")
+        args.pipeline = args.args.pop()
+    if len(args.args) % 2:
+        ap.error("documents are given as <file.html> <texhash> pairs")
+    jobs = [
+        (path, texhash, args.pipeline, args.engine)
+        for path, texhash in zip(args.args[::2], args.args[1::2])
+    ]
+
+    workers = min(max(1, args.jobs), len(jobs))
+    if workers == 1:
+        errors = [run(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            errors = list(pool.map(run, jobs))
+    for error in errors:
+        if error:
+            print(error, file=sys.stderr)
+    return 1 if any(errors) else 0
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""Move LaTeXML documents' converted inline styles into one shared sheet.
+
+Usage: latexml_styles.py --out DIR [--sheets DIR]... <file.html>...
+
+latexml_postprocess.py gives each document its own <style> block of
+ltxs-* classes, allowed by a per-page CSP hash. The same rules (e.g.
+.ltxs-font-size-173) recur in every document, and inline rules can't be
+cached. This collects the rules of all given documents into one
+stylesheet, written to DIR as ltxs.<fingerprint>.css, and rewrites each
+document in place to link it (/css/latexml/ltxs.<fingerprint>.css)
+instead of carrying a <style> block. The CSP then needs no hash: the
+sheet is same-origin, so style-src 'self' allows it.
+
+Class names are a function of the style value alone, so they are the
+same in every document and in every build, whatever other documents
+are built with it. A single declaration in LaTeXML's own spelling
+("font-size:173%", "width:2em", "font-weight:bold") gets the readable
+slug latexml_postprocess.py uses, which static/css/latexml/site.css
+relies on; no two such values share a slug. Any other value gets the
+slug with "--" and a short hash of the value appended, which no bare
+slug can end in.
+
+Documents already rewritten by an earlier run are accepted too: their
+rules are read back from the sheet they link, looked up in the --sheets
+directories (the published /css/latexml/). The output is the same as
+from the per-document form, so rerunning on unchanged documents changes
+nothing.
+
+A report is printed to stdout: per document, the bytes its <style>
+block and CSP hash cost compared with the link replacing them, and,
+across documents, how often rules recur and how many sheet fetches a
+reader of every document gets from cache.
+"""
+
+import argparse
+import hashlib
+import re
+import sys
+from pathlib import Path
+
+from bs4 import BeautifulSoup
+
+from latexml_postprocess import csp_policy, stylesheet
+
+SHEET_URL = "/css/latexml/"
+# appended to the latexml-pipeline stamp, so the build tells documents
+# linking the shared sheet apart from self-contained ones
+SHARED_MARK = "+shared"
+SHEET_NAME = re.compile(r"^ltxs\.[0-9a-f]{16}\.css$")
+RULE = re.compile(r"^\.(ltxs-[a-z0-9-]+) \{ (.*); \}$")
+# One declaration, no whitespace, and an amount with a unit or a single
+# keyword: the slug then spells the value back unambiguously.
+CANONICAL = re.compile(
+    r"^[a-z]+(?:-[a-z]+)*:(?:[0-9]+(?:\.[0-9]+)?(?:%|[a-z]+)|[a-z]+)$"
+)
+
+
+def slug(value: str) -> str:
+    return "ltxs-" + re.sub(r"[^a-z0-9]+", "-", value.lower()).strip("-")
+
+
+def shared_name(value: str) -> str:
+    """Stable class name for a style value."""
+    if CANONICAL.match(value):
+        return slug(value)
+    digest = hashlib.sha256(value.encode("utf-8")).hexdigest()[:8]
+    return f"{slug(value)}--{digest}"
+
+
+def shared_names(values: set[str]) -> dict[str, str]:
+    """Stable class name for every style value."""
+    return {value: shared_name(value) for value in values}
+
+
+def parse_rules(css_text: str) -> dict[str, str]:
+    """Class -> value for a sheet written by stylesheet()."""
+    rules = {}
+    for line in css_text.splitlines():
+        match = RULE.match(line)
+        if match:
+            rules[match.group(1)] = match.group(2)
+    return rules
+
+
+def sheet_file(css_text: str) -> str:
+    digest = hashlib.sha256(css_text.encode("utf-8")).hexdigest()
+    return f"ltxs.{digest[:16]}.css"
+
+
+class Document:
+    """A post-processed document and the style rules it uses."""
+
+    def __init__(self, path: Path, sheet_dirs: list[Path]):
+        self.path = path
+        self.before = path.read_bytes()
+        self.soup = BeautifulSoup(self.before.decode("utf-8"), "lxml")
+        head = self.soup.head
+        if head is None:
+            raise ValueError(f"no <head> in {path}")
+        self.rules: dict[str, str] = {}
+        style = head.find("style")
+        if style is not None:
+            self.rules = parse_rules(style.string or "")
+            style.decompose()
+        for link in head.find_all("link", rel="stylesheet"):
+            name = link.get("href", "").removeprefix(SHEET_URL)
+            if link.get("href", "").startswith(SHEET_URL) and SHEET_NAME.match(name):
+                # the sheet holds every document's rules; keep this one's
+                used = {
+                    cls
+                    for el in self.soup.find_all(class_=re.compile("^ltxs-"))
+                    for cls in el["class"]
+                }
+                rules = self.read_sheet(name, sheet_dirs)
+                self.rules.update((k, v) for k, v in rules.items() if k in used)
+                link.decompose()
+
+    def read_sheet(self, name: str, sheet_dirs: list[Path]) -> dict[str, str]:
+        for directory in sheet_dirs:
+            try:
+                return parse_rules((directory / name).read_text(encoding="utf-8"))
+            except OSError:
+                continue
+        raise ValueError(f"{self.path} links {SHEET_URL}{name}, which was not found")
+
+    def inline_bytes(self) -> int:
+        """What the rules cost the per-document form: the <style> block
+        and its hash in the CSP."""
+        if not self.rules:
+            return 0
+        css_text = stylesheet(self.rules)
+        return len(f"<style>{css_text}</style>".encode("utf-8")) + len(
+            csp_policy(css_text)
+        ) - len(csp_policy(None))
+
+    def rewrite(self, names: dict[str, str], href: str) -> int:
+        """Relink the document to the shared sheet; returns the size of
+        the link added."""
+        renamed = {cls: names[value] for cls, value in self.rules.items()}
+        for el in self.soup.find_all(class_=re.compile("^ltxs-")):
+            el["class"] = [renamed.get(cls, cls) for cls in el["class"]]
+
+        head = self.soup.head
+        csp = head.find("meta", attrs={"http-equiv": "Content-Security-Policy"})
+        if csp is not None:
+            csp["content"] = csp_policy(None)
+        pipeline = head.find("meta", attrs={"name": "latexml-pipeline"})
+        if pipeline is not None:
+            pipeline["content"] = (
+                pipeline["content"].removesuffix(SHARED_MARK) + SHARED_MARK
+            )
+        link = self.soup.new_tag("link", rel="stylesheet", href=href, type="text/css")
+        # after the other /css/latexml/ sheets, fingerprinted or not
+        shared = [
+            other for other in head.find_all("link", rel="stylesheet")
+            if other.get("href", "").startswith(SHEET_URL)
+        ]
+        if shared:
+            shared[-1].insert_after(link)
+        else:
+            head.append(link)
+
+        after = str(self.soup).encode("utf-8")
+        if after != self.before:
+            self.path.write_bytes(after)
+        return len(str(link).encode("utf-8"))
+
+
+def report(docs: list[Document], links: list[int], sheet: str, css_text: str) -> None:
+    sheet_bytes = len(css_text.encode("utf-8"))
+    counts: dict[str, int] = {}
+    for doc in docs:
+        for value in set(doc.rules.values()):
+            counts[value] = counts.get(value, 0) + 1
+    print(f"Shared LaTeXML styles: {SHEET_URL}{sheet} "
+          f"({len(counts)} rules, {sheet_bytes} bytes)")
+    print(f"  {'document':<50} {'rules':>5} {'shared':>6} {'inline':>7} {'saved':>7}")
+    saved = 0
+    for doc, link in zip(docs, links):
+        values = set(doc.rules.values())
+        shared = sum(1 for v in values if counts[v] > 1)
+        inline = doc.inline_bytes()
+        saved += inline - link
+        print(f"  {doc.path.name:<50} {len(values):>5} {shared:>6} "
+              f"{inline:>7} {inline - link:>7}")
+    references = sum(counts.values())
+    print(f"  {len(docs)} document(s) save {saved} bytes of HTML; "
+          f"{references} rule reference(s) served by {len(counts)} shared rule(s)")
+    if docs:
+        # One fetch of the sheet serves every later document from cache.
+        hits = (len(docs) - 1) / len(docs)
+        print(f"  sheet cache hit rate reading every document: {hits:.0%}; "
+              f"rule reuse across documents: "
+              f"{references / max(1, len(counts)):.2f}x")
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--out", type=Path, required=True)
+    ap.add_argument("--sheets", type=Path, action="append", default=[])
+    ap.add_argument("--quiet", action="store_true")
+    ap.add_argument("documents", type=Path, nargs="+")
+    args = ap.parse_args()
+
+    try:
+        docs = [Document(path, args.sheets) for path in args.documents]
+    except (OSError, ValueError) as e:
+        print(e, file=sys.stderr)
+        return 1
+    names = shared_names({v for doc in docs for v in doc.rules.values()})
+    css_text = stylesheet({name: value for value, name in names.items()})
+    sheet = sheet_file(css_text)
+    args.out.mkdir(parents=True, exist_ok=True)
+    (args.out / sheet).write_text(css_text, encoding="utf-8")
+    links = [doc.rewrite(names, SHEET_URL + sheet) for doc in docs]
+    if not args.quiet:
+        report(docs, links, sheet, css_text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
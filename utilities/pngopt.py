@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""Losslessly recompress a built site's PNGs.
+
+Usage: pngopt.py [--jobs N] <dir>...
+
+The PNGs under the given directories are deployed as the tools that
+made them wrote them: default zlib effort, full RGB where fewer colors
+would do, ancillary chunks (text, time, pHYs) browsers don't use. Each
+is re-encoded with Pillow, keeping whichever of these is smallest:
+
+- the image as it is,
+- RGBA without an alpha channel when every pixel is opaque, then
+  grayscale when every pixel is gray,
+- a palette image (1, 2, 4 or 8 bits) when there are 256 colors or fewer,
+
+saved at maximum zlib effort with only the pixels and any ICC profile
+kept. When oxipng is on the PATH (it is in the nix environment), the
+result is also run through `oxipng --opt max`. A candidate is only used
+if it decodes to exactly the original's RGBA pixels and is smaller than
+the original; otherwise the file is left as it is. Files whose color
+handling Pillow would not reproduce (16-bit channels, gAMA, cHRM and
+sRGB chunks, which some decoders apply) only go through oxipng, which
+keeps them exact.
+
+Optimized files are kept in a content-addressed store in the build cache
+with an index of results per source SHA-256, so each file is optimized
+once; later builds restore it. Files to optimize are spread over a
+process pool (--jobs, default: all cores). The index is discarded when
+Pillow, zlib or oxipng change.
+
+Prints the bytes before and after for each directory given.
+"""
+
+import argparse
+import hashlib
+import io
+import os
+import shutil
+import subprocess
+import sys
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from buildcache import Store, cache_root, load_json, save_json
+
+try:
+    import PIL
+    from PIL import Image
+except ImportError:
+    Image = None
+
+OXIPNG = shutil.which("oxipng")
+
+
+def oxipng_version() -> str | None:
+    if OXIPNG is None:
+        return None
+    result = subprocess.run([OXIPNG, "--version"], capture_output=True, text=True)
+    return result.stdout.strip() or "oxipng"
+
+
+def pixels(data: bytes) -> bytes:
+    with Image.open(io.BytesIO(data)) as image:
+        return image.convert("RGBA").tobytes()
+
+
+def candidates(image: "Image.Image") -> list["Image.Image"]:
+    """Exact reductions of an 8-bit image, most general first."""
+    if image.mode not in ("RGB", "RGBA") or "transparency" in image.info:
+        image = image.convert("RGBA")
+    found = [image]
+    if image.mode == "RGBA" and image.getchannel("A").getextrema() == (255, 255):
+        image = image.convert("RGB")
+        found.append(image)
+    if image.mode == "RGB":
+        red, green, blue = image.split()
+        if red.tobytes() == green.tobytes() == blue.tobytes():
+            found.append(red)
+    colors = image.getcolors(256)
+    if colors is not None:
+        method = (Image.Quantize.FASTOCTREE if image.mode == "RGBA"
+                  else Image.Quantize.MEDIANCUT)
+        found.append(image.quantize(colors=len(colors), method=method))
+    return found
+
+
+def encode(image: "Image.Image", icc_profile: bytes | None) -> bytes:
+    options = {"optimize": True}
+    if icc_profile:
+        options["icc_profile"] = icc_profile
+    if image.mode == "P":
+        count = len(image.getcolors(256) or []) or 256
+        options["bits"] = next(bits for bits in (1, 2, 4, 8) if count <= 1 << bits)
+    buffer = io.BytesIO()
+    image.save(buffer, "PNG", **options)
+    return buffer.getvalue()
+
+
+def optimize(path: Path) -> bytes | None:
+    """The smallest exact re-encoding of a PNG, or None if none is smaller."""
+    original = path.read_bytes()
+    with Image.open(io.BytesIO(original)) as image:
+        image.load()
+        # IHDR bit depth; Pillow reads 16-bit RGB(A) as 8-bit
+        keep_as_is = (original[24] > 8 or image.mode.startswith("I")
+                      or "gamma" in image.info or "srgb" in image.info
+                      or "chromaticity" in image.info)
+        expected = image.convert("RGBA").tobytes()
+        best = original
+        if not keep_as_is:
+            icc_profile = image.info.get("icc_profile")
+            for candidate in candidates(image):
+                data = encode(candidate, icc_profile)
+                if len(data) < len(best) and pixels(data) == expected:
+                    best = data
+    if OXIPNG is not None:
+        result = subprocess.run(
+            [OXIPNG, "--opt", "max", "--strip", "safe", "--stdout", "-"],
+            input=best, capture_output=True,
+        )
+        if (result.returncode == 0 and len(result.stdout) < len(best)
+                and pixels(result.stdout) == expected):
+            best = result.stdout
+    return best if len(best) < len(original) else None
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("dirs", type=Path, nargs="+")
+    ap.add_argument("--jobs", type=int, default=os.cpu_count() or 1)
+    args = ap.parse_args()
+
+    if Image is None:
+        print("Pillow not found; PNGs are deployed as they are", file=sys.stderr)
+        return 0
+    config = hashlib.sha256(repr((
+        PIL.__version__, zlib.ZLIB_RUNTIME_VERSION, oxipng_version(),
+    )).encode()).hexdigest()
+    index_file = cache_root() / "pngopt" / "index.json"
+    store = Store("pngopt/store")
+    index = load_json(index_file, {})
+    known = index.get("files", {}) if index.get("config") == config else {}
+
+    # sizes[digest] is the optimized size, or 0 when the file can't be
+    # made smaller.
+    sizes: dict[str, int] = {}
+    files: list[tuple[Path, Path, str, int]] = []
+    pending: dict[str, Path] = {}
+    for root in args.dirs:
+        for path in sorted(root.rglob("*.png")):
+            data = path.read_bytes()
+            digest = hashlib.sha256(data).hexdigest()
+            files.append((root, path, digest, len(data)))
+            if digest in sizes or digest in pending:
+                continue
+            size = known.get(digest)
+            if size is not None and (not size or store.has(digest)):
+                sizes[digest] = size
+            else:
+                pending[digest] = path
+
+    workers = min(max(1, args.jobs), len(pending)) or 1
+    if workers == 1:
+        results = [optimize(path) for path in pending.values()]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(optimize, pending.values()))
+    for digest, data in zip(pending, results):
+        if data is None:
+            sizes[digest] = 0
+        else:
+            store.put(digest, data)
+            sizes[digest] = len(data)
+            # already as small as this gets, should it be seen again
+            sizes.setdefault(hashlib.sha256(data).hexdigest(), 0)
+
+    totals: dict[Path, list[int]] = {root: [0, 0, 0] for root in args.dirs}
+    for root, path, digest, size in files:
+        if sizes[digest]:
+            path.write_bytes(store.get(digest))
+        totals[root][0] += 1
+        totals[root][1] += size
+        totals[root][2] += sizes[digest] or size
+
+    save_json(index_file, {"config": config, "files": sizes})
+    store.evict()
+    width = max(len(str(root)) for root in args.dirs)
+    print(f"{'directory':<{width}} {'files':>5} {'before':>10} {'after':>10} {'saved':>6}")
+    for root, (count, before, after) in totals.items():
+        print(f"{str(root):<{width}} {count:>5} {before:>10} {after:>10} "
+              f"{1 - after / max(1, before):>6.1%}")
+    before = sum(t[1] for t in totals.values())
+    after = sum(t[2] for t in totals.values())
+    print(f"Optimized {len(files)} PNG(s) ({len(pending)} optimized, the rest "
+          f"from the cache): {before} -> {after} bytes "
+          f"({1 - after / max(1, before):.1%} saved)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""Write precompressed Brotli and gzip siblings of a site's text assets.
+
+Usage: precompress.py [--jobs N] <dir>
+
+Every text file under <dir> (HTML, CSS, JS, SVG, XML, JSON, ...) gets
+<file>.br and <file>.gz beside it, compressed at the maximum level, for
+hosts that serve precompressed siblings with Content-Encoding (nginx
+gzip_static/brotli_static, S3 objects uploaded with the encoding set,
+...). A sibling is written only when it is smaller than the original.
+
+Hugo cleans its destination on every build, so the siblings would all
+be compressed again each time. Instead, compressed output is kept in a
+content-addressed store in the build cache, and an index records the
+compressed sizes for each source SHA-256, so only files whose content
+changed are compressed; the rest are restored from the store. Files to
+compress are spread over a process pool (--jobs, default: all cores).
+The index is discarded whenever the encoder versions or levels change.
+
+Brotli output needs the brotli Python module (python3Packages.brotli in
+the nix environment); without it only gzip siblings are written.
+
+Prints each file's original and compressed sizes and the total savings.
+"""
+
+import argparse
+import gzip
+import hashlib
+import os
+import sys
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from buildcache import Store, cache_root, load_json, save_json
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+EXTENSIONS = {
+    ".html", ".css", ".js", ".mjs", ".json", ".svg", ".xml", ".txt", ".ico",
+    ".webmanifest",
+}
+SKIPPED_DIRS = {".git"}
+GZIP_LEVEL = 9
+BROTLI_QUALITY = 11
+
+
+def encodings() -> dict[str, str]:
+    """Encoding suffix -> identity of the encoder producing it."""
+    found = {"gz": f"zlib {zlib.ZLIB_RUNTIME_VERSION} level {GZIP_LEVEL}"}
+    if brotli is not None:
+        version = getattr(brotli, "version", getattr(brotli, "__version__", "?"))
+        found["br"] = f"brotli {version} quality {BROTLI_QUALITY}"
+    return found
+
+
+def compress(data: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    # mtime=0 keeps the output a function of the input alone
+    return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def candidates(root: Path) -> list[Path]:
+    found = []
+    for dirpath, dirnames, names in os.walk(root):
+        dirnames[:] = sorted(d for d in dirnames if d not in SKIPPED_DIRS)
+        for name in sorted(names):
+            if os.path.splitext(name)[1] in EXTENSIONS:
+                found.append(Path(dirpath) / name)
+    return found
+
+
+def compress_file(job: tuple[Path, list[str]]) -> dict[str, bytes]:
+    path, wanted = job
+    data = path.read_bytes()
+    return {encoding: compress(data, encoding) for encoding in wanted}
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("root", type=Path)
+    ap.add_argument("--jobs", type=int, default=os.cpu_count() or 1)
+    args = ap.parse_args()
+
+    available = encodings()
+    if brotli is None:
+        print("brotli module not found; writing gzip siblings only",
+              file=sys.stderr)
+    config = hashlib.sha256(repr(sorted(available.items())).encode()).hexdigest()
+    index_file = cache_root() / "precompress" / "index.json"
+    store = Store("precompress/store")
+    index = load_json(index_file, {})
+    known = index.get("files", {}) if index.get("config") == config else {}
+
+    # sizes[digest][encoding] is the compressed size, or 0 when the
+    # encoding doesn't make the file smaller.
+    sizes: dict[str, dict[str, int]] = {}
+    files: list[tuple[Path, str, int]] = []
+    pending: dict[str, Path] = {}
+    for path in candidates(args.root):
+        data = path.read_bytes()
+        digest = hashlib.sha256(data).hexdigest()
+        files.append((path, digest, len(data)))
+        if digest in sizes or digest in pending:
+            continue
+        entry = known.get(digest)
+        if entry is not None and all(
+            not entry[e] or store.has(f"{digest}.{e}") for e in available
+        ):
+            sizes[digest] = entry
+        else:
+            pending[digest] = path
+
+    jobs = [(path, list(available)) for path in pending.values()]
+    workers = min(max(1, args.jobs), len(jobs)) or 1
+    if workers == 1:
+        results = [compress_file(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(compress_file, jobs, chunksize=4))
+    for (digest, path), outputs in zip(pending.items(), results):
+        original = path.stat().st_size
+        sizes[digest] = {}
+        for encoding, data in outputs.items():
+            if len(data) < original:
+                store.put(f"{digest}.{encoding}", data)
+                sizes[digest][encoding] = len(data)
+            else:
+                sizes[digest][encoding] = 0
+
+    totals = {"": 0, **{e: 0 for e in available}}
+    width = max((len(str(p.relative_to(args.root))) for p, _, _ in files), default=4)
+    header = "".join(f" {'.' + e:>9}" for e in available)
+    print(f"{'file':<{width}} {'bytes':>9}{header}")
+    for path, digest, size in files:
+        row = f"{str(path.relative_to(args.root)):<{width}} {size:>9}"
+        totals[""] += size
+        for encoding in available:
+            sibling = path.with_name(f"{path.name}.{encoding}")
+            compressed = sizes[digest][encoding]
+            if compressed:
+                sibling.write_bytes(store.get(f"{digest}.{encoding}"))
+            else:
+                sibling.unlink(missing_ok=True)
+                compressed = size
+            totals[encoding] += compressed
+            row += f" {compressed:>9}"
+        print(row)
+
+    save_json(index_file, {"config": config, "files": sizes})
+    store.evict()
+    summary = ", ".join(
+        f"{e} {totals[e]} bytes ({1 - totals[e] / max(1, totals['']):.0%} saved)"
+        for e in available
+    )
+    print(
+        f"Precompressed {len(files)} file(s) ({len(pending)} compressed, "
+        f"the rest from the cache): {totals['']} bytes -> {summary}"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
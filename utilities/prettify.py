@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""Format a generated site with prettier, touching only changed files.
+
+Usage: prettify.py [--jobs N] [--ignore-path FILE] <dir>
+
+Equivalent to `prettier <dir> --write --ignore-path=FILE`, but Hugo
+regenerates byte-identical pages for almost everything on every build,
+so formatting all of them again is wasted work. An index in the build
+cache records, per file, the hash of the raw input prettier last saw and
+the hash of what it wrote; the formatted bytes are kept in a
+content-addressed store. Each file is then
+
+- left alone if it already holds the formatted output,
+- restored from the store if it holds the same raw input as last time,
+- or handed to prettier.
+
+Files for prettier are split into one shard per job, run concurrently.
+Paths are passed relative to the current directory together with the
+ignore file, so prettier itself still decides what .prettierignore
+excludes (public/docs/ in particular): an excluded file comes back
+unchanged and is recorded as its own formatted output.
+
+The index is discarded whenever the prettier version, its supported
+file types, .prettierrc, or the ignore file changes.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from buildcache import Store, cache_root, load_json, save_json, sha256_file
+
+CONFIG_FILES = [".prettierrc"]
+# prettier never descends into these when expanding a directory
+SKIPPED_DIRS = {".git", ".hg", ".sl", ".svn", "node_modules"}
+# keep each prettier command line well under ARG_MAX
+MAX_FILES_PER_RUN = 500
+
+
+def prettier(*args: str) -> str:
+    return subprocess.run(
+        ["prettier", *args], check=True, capture_output=True, text=True
+    ).stdout
+
+
+def fingerprint(ignore_path: Path, index: dict) -> tuple[str, dict]:
+    """Identify the formatter configuration, and the extensions and file
+    names prettier expands a directory to (cached per version, since
+    asking costs a second node startup)."""
+    version = prettier("--version").strip()
+    support = index.get("support")
+    if not support or support.get("version") != version:
+        info = json.loads(prettier("--support-info"))
+        support = {"version": version, "extensions": [], "filenames": []}
+        for language in info["languages"]:
+            support["extensions"] += language.get("extensions", [])
+            support["filenames"] += language.get("filenames", [])
+    h = hashlib.sha256(version.encode())
+    for path in CONFIG_FILES + [str(ignore_path)]:
+        try:
+            h.update(Path(path).read_bytes())
+        except OSError:
+            h.update(b"-")
+    return h.hexdigest(), support
+
+
+def candidates(root: Path, support: dict) -> list[Path]:
+    extensions = set(support["extensions"])
+    filenames = set(support["filenames"])
+    found = []
+    for dirpath, dirnames, names in os.walk(root):
+        dirnames[:] = sorted(d for d in dirnames if d not in SKIPPED_DIRS)
+        for name in sorted(names):
+            if name in filenames or os.path.splitext(name)[1] in extensions:
+                found.append(Path(dirpath) / name)
+    return found
+
+
+def shards(files: list[tuple[Path, int]], count: int) -> list[list[Path]]:
+    """Split files into shards of similar total size."""
+    buckets: list[tuple[int, list[Path]]] = [(0, []) for _ in range(count)]
+    for path, size in sorted(files, key=lambda f: f[1], reverse=True):
+        total, members = min(buckets, key=lambda b: b[0])
+        buckets.remove((total, members))
+        members.append(path)
+        buckets.append((total + size, members))
+    return [members for _, members in buckets if members]
+
+
+def run_shard(files: list[Path], ignore_path: Path) -> subprocess.CompletedProcess:
+    output = ""
+    for start in range(0, len(files), MAX_FILES_PER_RUN):
+        batch = [str(f) for f in files[start : start + MAX_FILES_PER_RUN]]
+        result = subprocess.run(
+            ["prettier", "--write", "--ignore-unknown",
+             f"--ignore-path={ignore_path}", "--log-level=warn", "--", *batch],
+            capture_output=True,
+            text=True,
+        )
+        output += result.stdout + result.stderr
+        if result.returncode:
+            return subprocess.CompletedProcess(result.args, result.returncode, output)
+    return subprocess.CompletedProcess([], 0, output)
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("root", type=Path)
+    ap.add_argument("--jobs", type=int, default=os.cpu_count() or 1)
+    ap.add_argument("--ignore-path", type=Path, default=Path(".prettierignore"))
+    args = ap.parse_args()
+
+    index_file = cache_root() / "prettier" / "index.json"
+    store = Store("prettier/store")
+    index = load_json(index_file, {})
+    config, support = fingerprint(args.ignore_path, index)
+    known = index.get("files", {}) if index.get("config") == config else {}
+
+    entries: dict[str, dict] = {}
+    pending: list[tuple[Path, int]] = []
+    restored = 0
+    for path in candidates(args.root, support):
+        rel = str(path)
+        digest = sha256_file(path)
+        entry = known.get(rel)
+        if entry and digest == entry["formatted"]:
+            entries[rel] = entry
+            continue
+        if entry and digest == entry["raw"]:
+            formatted = store.get(entry["formatted"])
+            if formatted is not None:
+                path.write_bytes(formatted)
+                entries[rel] = entry
+                restored += 1
+                continue
+        entries[rel] = {"raw": digest}
+        pending.append((path, path.stat().st_size))
+
+    failed = False
+    work = shards(pending, max(1, args.jobs))
+    with ThreadPoolExecutor(max_workers=len(work) or 1) as pool:
+        results = list(pool.map(lambda files: run_shard(files, args.ignore_path), work))
+    for files, result in zip(work, results):
+        if result.stdout:
+            print(result.stdout, end="", file=sys.stderr)
+        if result.returncode:
+            failed = True
+            for path in files:
+                entries.pop(str(path), None)
+            continue
+        for path in files:
+            entry = entries[str(path)]
+            data = path.read_bytes()
+            entry["formatted"] = hashlib.sha256(data).hexdigest()
+            if entry["formatted"] != entry["raw"]:
+                store.put(entry["formatted"], data)
+
+    save_json(index_file, {"config": config, "support": support, "files": entries})
+    store.evict()
+    print(
+        f"Formatted {len(pending)} file(s) in {len(work)} shard(s); "
+        f"restored {restored}, {len(entries) - len(pending) - restored} unchanged"
+    )
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -9,7 +9,8 @@ set -eu
     Usage: render [options] <file.tex>
 
     Compiles a single LaTeX document and leaves the output in its destination
-    directory, cleaning up intermediate files.
+    directory. Intermediate files are kept in the build cache, never beside
+    the source.
 
     Documents under latex/ render to latex/output/<dir>/, which is gitignored
     and mounted to static/docs by Hugo. Documents anywhere else render beside
@@ -26,6 +27,9 @@ set -eu
     Options:
     -f, --format FMT  Output format: pdf (default), html, or both
     -o, --output DIR  Write the output to DIR instead of the default destination
+    --latexml-server  Convert HTML through a persistent LaTeXML server,
+                      started if none is running, so repeated renders skip
+                      LaTeXML's startup
     -h, --help        Display this help message and exit
 
     Arguments:
@@ -40,6 +44,7 @@ EOF
     tex_file=
     output_dir=
     format=pdf
+    use_server=false
     while [[ $# -gt 0 ]]
     do
         case "$1" in
@@ -67,6 +72,10 @@ EOF
                     exit 1
                 fi
             ;;
+            --latexml-server)
+                use_server=true
+                shift
+            ;;
             -h|--help)
                 usage
                 exit
@@ -154,7 +163,8 @@ EOF
     if [[ "$format" == pdf || "$format" == both ]]
     then
         latex_log=$(mktemp) || exit 1
-        if ! latexmk -quiet -pdf "$tex_name" >"$latex_log" 2>&1
+        if ! compilepdf "$tex_name" "${output_dir}/${base_name}.pdf" \
+            >"$latex_log" 2>&1
         then
             >&2 echo "Error compiling $tex_file"
             >&2 cat "$latex_log"
@@ -162,19 +172,21 @@ EOF
             exit 1
         fi
         rm -f "$latex_log"
-
-        latexmk -c >/dev/null 2>&1
-        rm -f "${base_name}".{dvi,bbl,fls,run.xml}
-
-        if [[ "$output_dir" != "$tex_dir" ]]
-        then
-            mv "${base_name}.pdf" "${output_dir}/"
-        fi
         echo "Rendered: ${output_dir}/${base_name}.pdf"
     fi
 
     if [[ "$format" == html || "$format" == both ]]
     then
+        latexml_server=
+        if $use_server
+        then
+            if startlatexmlserver "$latexml_server_base"
+            then
+                latexml_server=$latexml_server_base
+            else
+                >&2 echo "Warning: no LaTeXML server started; converting directly"
+            fi
+        fi
         renderhtml "$tex_name" "${output_dir}/${base_name}.html" || exit 1
         echo "Rendered: ${output_dir}/${base_name}.html"
     fi
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""Bring the hosting repository's working tree in line with a built site.
+
+Usage: sitesync.py [--keep PATH]... <site> <public>
+
+Hugo renders into a staging directory (<site>); this copies into
+<public> only the files whose bytes differ and deletes only the files
+that vanished from the site. Files that did not change keep their
+mtime, so `git add --all` in <public> re-hashes only what was written
+instead of the whole tree (face-dataset images, s3m audio, ...).
+
+<public>'s own .git and .gitignore are never touched, nor are the paths
+given with --keep (published LaTeX artifacts that are still current and
+so were not rebuilt into the site), nor files <public>'s ignore rules
+cover (`git check-ignore`), which the hosting repo never publishes.
+
+A manifest in the build cache records each file's size, mtime and
+SHA-256 as last synced, so unchanged files in <public> are recognized
+from a stat rather than by reading them.
+"""
+
+import argparse
+import hashlib
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+from buildcache import cache_root, load_json, save_json, sha256_file
+
+PRESERVED = {".git", ".gitignore"}
+
+
+def walk(root: Path, skip: set[str] = frozenset()) -> dict[str, Path]:
+    """Regular files under root by POSIX relative path, skipping the
+    top-level names in skip."""
+    found = {}
+    for dirpath, dirnames, names in os.walk(root):
+        top = Path(dirpath) == root
+        if top:
+            dirnames[:] = [d for d in dirnames if d not in skip]
+        for name in names:
+            if top and name in skip:
+                continue
+            path = Path(dirpath) / name
+            found[path.relative_to(root).as_posix()] = path
+    return found
+
+
+def stat_key(path: Path) -> list[int]:
+    st = path.stat()
+    return [st.st_size, st.st_mtime_ns]
+
+
+def copy_atomic(source: Path, target: Path) -> None:
+    if target.is_dir():
+        shutil.rmtree(target)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=target.parent, prefix=".sync.")
+    os.close(fd)
+    try:
+        shutil.copyfile(source, tmp)
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, target)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def prune(path: Path, root: Path) -> None:
+    """Remove the now-empty directories above a deleted file."""
+    for parent in path.parents:
+        if parent == root or not parent.is_relative_to(root):
+            return
+        try:
+            parent.rmdir()
+        except OSError:
+            return
+
+
+def ignored(public: Path, paths: list[str]) -> set[str]:
+    """The paths <public>'s git ignore rules cover; none outside a git
+    checkout."""
+    if not paths or not (public / ".git").exists():
+        return set()
+    result = subprocess.run(
+        ["git", "-C", str(public), "check-ignore", "-z", "--stdin"],
+        input="\0".join(paths).encode("utf-8"), capture_output=True,
+    )
+    # 1: none of them is ignored
+    if result.returncode not in (0, 1):
+        raise OSError(result.stderr.decode("utf-8", "replace").strip())
+    return set(result.stdout.decode("utf-8").split("\0")) - {""}
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("site", type=Path)
+    ap.add_argument("public", type=Path)
+    ap.add_argument("--keep", action="append", default=[], metavar="PATH")
+    args = ap.parse_args()
+    site, public = args.site, args.public
+    keep = set(args.keep)
+
+    key = hashlib.sha256(str(public.resolve()).encode("utf-8")).hexdigest()
+    manifest_file = cache_root() / "sync" / f"{key}.json"
+    manifest = load_json(manifest_file, {})
+
+    wanted = walk(site)
+    present = walk(public, PRESERVED)
+    synced: dict[str, list] = {}
+
+    vanished = sorted(set(present) - set(wanted) - keep)
+    try:
+        kept_ignored = ignored(public, vanished)
+    except OSError as e:
+        print(f"Can't read {public}'s ignore rules: {e}", file=sys.stderr)
+        return 1
+    deleted = 0
+    for rel in vanished:
+        if rel in kept_ignored:
+            continue
+        path = present[rel]
+        path.unlink()
+        prune(path, public)
+        deleted += 1
+
+    written = unchanged = 0
+    for rel, source in sorted(wanted.items()):
+        target = public / rel
+        digest = sha256_file(source)
+        if rel in present:
+            known = manifest.get(rel)
+            current = stat_key(target)
+            if known and known[:2] == current:
+                public_digest = known[2]
+            else:
+                public_digest = sha256_file(target)
+            if public_digest == digest:
+                synced[rel] = current + [digest]
+                unchanged += 1
+                continue
+        copy_atomic(source, target)
+        synced[rel] = stat_key(target) + [digest]
+        written += 1
+
+    for rel in keep & set(present):
+        if rel in manifest:
+            synced[rel] = manifest[rel]
+
+    save_json(manifest_file, synced)
+    print(f"Synced: {written} written, {deleted} deleted, {unchanged} unchanged")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""Compare the test suite's wall time and peak memory across revisions.
+
+Usage: suite_benchmark.py [--baseline REV] [--repeat N] [--public DIR]
+                          [-- PYTEST_ARGS...]
+
+Runs tests/ as of --baseline (default HEAD) and as in the working tree,
+each against the same built site (--public, default public/) and the
+rest of the working tree, and reports the best wall time and peak RSS of
+--repeat runs (default 3) with the outcome counts, which should match.
+Every run is a fresh interpreter, so its peak RSS is its own. Arguments
+after -- go to pytest, e.g. `-- -m "not external"` or a test file.
+
+To see what the session's parsed-page corpus (tests/conftest.py) saves,
+compare against a revision from before it:
+
+    python3 utilities/suite_benchmark.py --baseline <rev> -- -m "not external"
+"""
+
+import argparse
+import io
+import os
+import resource
+import subprocess
+import sys
+import tarfile
+import tempfile
+import time
+from pathlib import Path
+
+SCRIPT = Path(__file__).resolve()
+REPO_DIR = SCRIPT.parent.parent
+
+
+class Outcomes:
+    """pytest plugin counting each test's outcome."""
+
+    def __init__(self):
+        self.counts: dict[str, int] = {}
+
+    def pytest_runtest_logreport(self, report):
+        if report.when == "call" or report.outcome != "passed":
+            outcome = "error" if report.when != "call" and report.failed else report.outcome
+            self.counts[outcome] = self.counts.get(outcome, 0) + 1
+
+
+def run(tree: str, pytest_args: list[str]) -> None:
+    import pytest
+
+    os.chdir(tree)
+    outcomes = Outcomes()
+    start = time.perf_counter()
+    with open(os.devnull, "w") as devnull:
+        stdout, sys.stdout = sys.stdout, devnull
+        try:
+            pytest.main(["-q", "-p", "no:cacheprovider", *pytest_args],
+                         plugins=[outcomes])
+        finally:
+            sys.stdout = stdout
+    seconds = time.perf_counter() - start
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    rss_mb = rss / 1024 / (1024 if sys.platform == "darwin" else 1)
+    summary = ",".join(f"{k}={v}" for k, v in sorted(outcomes.counts.items()))
+    print(f"{seconds:.4f} {rss_mb:.1f} {summary or '-'}")
+
+
+def make_tree(tree: Path, public: Path, baseline: str | None) -> None:
+    """The working tree, linked entry by entry, with public/ and (for a
+    baseline) tests/ replaced."""
+    for entry in REPO_DIR.iterdir():
+        if entry.name in (".git", "public") or (baseline and entry.name == "tests"):
+            continue
+        (tree / entry.name).symlink_to(entry)
+    (tree / "public").symlink_to(public.resolve())
+    if baseline:
+        archive = subprocess.run(
+            ["git", "-C", REPO_DIR, "archive", baseline, "tests"],
+            check=True, capture_output=True,
+        ).stdout
+        with tarfile.open(fileobj=io.BytesIO(archive)) as tar:
+            tar.extractall(tree, filter="data")
+
+
+def measure(tree: Path, pytest_args: list[str]) -> tuple[float, float, str]:
+    result = subprocess.run(
+        [sys.executable, SCRIPT, "--run", str(tree), *pytest_args],
+        check=True, capture_output=True, text=True,
+    )
+    seconds, rss, summary = result.stdout.split()[-3:]
+    return float(seconds), float(rss), summary
+
+
+def main() -> int:
+    if sys.argv[1:2] == ["--run"]:
+        run(sys.argv[2], sys.argv[3:])
+        return 0
+    argv = sys.argv[1:]
+    pytest_args = []
+    if "--" in argv:
+        pytest_args = argv[argv.index("--") + 1:]
+        argv = argv[:argv.index("--")]
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--baseline", default="HEAD")
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--public", type=Path, default=REPO_DIR / "public")
+    args = ap.parse_args(argv)
+    if not args.public.is_dir():
+        print(f"{args.public} not found; run ./build first", file=sys.stderr)
+        return 1
+
+    print(f"{'tests':<24} {'time':>9} {'peak RSS':>10}  outcomes")
+    for label, baseline in [(args.baseline, args.baseline), ("working tree", None)]:
+        with tempfile.TemporaryDirectory(prefix="suite-benchmark-") as tmp:
+            make_tree(Path(tmp), args.public, baseline)
+            runs = [measure(Path(tmp), pytest_args) for _ in range(max(1, args.repeat))]
+        seconds = min(r[0] for r in runs)
+        rss = min(r[1] for r in runs)
+        print(f"{label:<24} {seconds:>8.2f}s {rss:>7.0f} MB  {runs[0][2]}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())